@@ -20,6 +20,8 @@ class AddBundleCommand(BaseCommand):
         self.main_window.refresh_bundle_tree()
     
     def redo(self):
+        # Index on the first redo too, the caller adds the item itself
+        self.main_window.topology_manager.index_bundle(self.bundle)
         if self.first_redo:
             self.first_redo = False
             return
@@ -35,6 +37,7 @@ class AddBundleCommand(BaseCommand):
     def undo(self):
      
         self.scene.removeItem(self.bundle)
+        self.main_window.topology_manager.unindex_bundle(self.bundle)
         
         # Remove from main window bundles list
         if hasattr(self.main_window, 'bundles') and self.bundle in self.main_window.bundles:
@@ -72,6 +75,7 @@ class DeleteBundleCommand(BaseCommand):
             self.main_window.bundles.remove(self.bundle)
         
         self.scene.removeItem(self.bundle)
+        self.main_window.topology_manager.unindex_bundle(self.bundle)
         
         # Refresh tree to reflect removal
         self.main_window.refresh_bundle_tree()
@@ -88,6 +92,7 @@ class DeleteBundleCommand(BaseCommand):
         
         self.scene.addItem(new_bundle)
         self.bundle = new_bundle
+        self.main_window.topology_manager.index_bundle(new_bundle)
         
         # Add to main window
         if hasattr(self.main_window, 'bundles'):
@@ -135,9 +140,17 @@ class MoveBundleEndCommand(BaseCommand):
     
     def redo(self):
         self.bundle.set_end_point(self.new_end)
+        self._notify_topology()
     
     def undo(self):
         self.bundle.set_end_point(self.old_end)
+        self._notify_topology()
+    
+    def _notify_topology(self):
+        """Drawn length changed, lets the bundle graph re-pick this node pair"""
+        main_window = getattr(self.bundle, 'main_window', None)
+        if main_window is not None and hasattr(main_window, 'topology_manager'):
+            main_window.topology_manager.bundle_changed(self.bundle)
 
 
 class AssignWireToBundleCommand(BaseCommand):
@@ -199,6 +212,9 @@ class RouteWiresThroughBundlesCommand(BaseCommand):
         for item in self.created_segments:
             if item.scene() is None:
                 self.main_window.scene.addItem(item)
+            segment = getattr(item, 'segment', None)
+            if segment is not None:
+                self.main_window.topology_manager.add_segment(segment)
         
         # Restore bundle wire assignments
         for bundle, wire_ids in self.bundle_assignments.items():
@@ -237,6 +253,9 @@ class RouteWiresThroughBundlesCommand(BaseCommand):
         for item in self.created_segments:
             if item.scene():
                 self.main_window.scene.removeItem(item)
+            segment = getattr(item, 'segment', None)
+            if segment is not None:
+                self.main_window.topology_manager.remove_segment(segment)
         
         # Clear bundle wire assignments
         for bundle in self.bundles:
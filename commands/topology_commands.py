@@ -74,6 +74,8 @@ class SplitSegmentCommand(CompoundCommand):
         # Add new segments
         for seg in self.new_segments:
             self.scene.addItem(seg)
+        
+        self._update_topology(removed=[self.old_segment], added=self.new_segments)
     
     def undo(self):
         # Remove new segments
@@ -85,3 +87,17 @@ class SplitSegmentCommand(CompoundCommand):
         
         # Restore old segment
         self.scene.addItem(self.old_segment)
+        
+        self._update_topology(removed=self.new_segments, added=[self.old_segment])
+    
+    def _update_topology(self, removed, added):
+        """Keep the topology graph and its indexes in step with the scene"""
+        topology_manager = getattr(self.old_segment, 'topology_manager', None)
+        if not topology_manager:
+            return
+        for item in removed:
+            if getattr(item, 'segment', None) is not None:
+                topology_manager.remove_segment(item.segment)
+        for item in added:
+            if getattr(item, 'segment', None) is not None:
+                topology_manager.add_segment(item.segment)
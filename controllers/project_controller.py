@@ -36,8 +36,14 @@ class ProjectController:
             project = main_window.project_handler.open_project(filepath)
             
             if project:
-                ProjectController._load_project_to_scene(main_window, project)
-                ProjectController._load_bundles_from_project(main_window, filepath)
+                if not ProjectController._load_viewport_first(main_window, project, filepath):
+                    ProjectController._load_project_to_scene(main_window, project)
+                    # Branch points before the bundles ending on them, routes after both
+                    topology = main_window.project_handler.load_topology(filepath)
+                    ProjectController._restore_topology_nodes(main_window, topology)
+                    ProjectController._load_bundles_from_project(main_window, filepath)
+                    if ProjectController._restore_routes(main_window, topology):
+                        main_window.refresh_tree_views()
                 
                 main_window.setWindowTitle(f"ECAD - {project.name} ({Path(filepath).name})")
                 
@@ -48,9 +54,49 @@ class ProjectController:
             else:
                 QMessageBox.critical(main_window, "Error", "Failed to load project")
     
+    @staticmethod
+    def _load_viewport_first(main_window, project, filepath):
+        """
+        Open big projects with the items in view first, see SceneLoader.
+        Returns False when the project is below lazy_load_threshold items
+        or the file has no spatial index, it is then loaded in one go.
+        """
+        threshold = main_window.settings_manager.get('lazy_load_threshold', 5000)
+        if not threshold or threshold <= 0:
+            return False
+        
+        # Files get their spatial index on the first save with this version
+        db = ProjectDatabase(filepath, read_only=True)
+        if not db.has_spatial_index() or db.item_count() < threshold:
+            db.close()
+            return False
+        
+        from controllers.scene_loader import SceneLoader
+        handler = main_window.project_handler
+        loader = SceneLoader(main_window, project, handler.load_bundles(filepath), db,
+                             handler.load_topology(filepath))
+        main_window.scene_loader = loader
+        loader.start()
+        return True
+    
+    @staticmethod
+    def finish_loading(main_window):
+        """Create the items a viewport-first open hasn't reached yet"""
+        loader = getattr(main_window, 'scene_loader', None)
+        if loader is not None:
+            loader.finish()
+    
+    @staticmethod
+    def stop_loading(main_window):
+        """Drop a viewport-first open still in progress"""
+        loader = getattr(main_window, 'scene_loader', None)
+        if loader is not None:
+            loader.cancel()
+    
     @staticmethod
     def save_project(main_window):
         """Save current project"""
+        ProjectController.finish_loading(main_window)
         if main_window.project_handler.current_path:
             success = main_window.project_handler.save_project(
                 filepath=main_window.project_handler.current_path,
@@ -58,6 +104,7 @@ class ProjectController:
             )
             if success:
                 main_window.undo_manager.set_clean()
+                main_window.autosave.discard()
                 main_window.statusBar().showMessage(f"Saved: {main_window.project_handler.current_path}", 3000)
             else:
                 QMessageBox.critical(main_window, "Error", "Failed to save project")
@@ -67,6 +114,7 @@ class ProjectController:
     @staticmethod
     def save_project_as(main_window):
         """Save project with new name"""
+        ProjectController.finish_loading(main_window)
         filepath, _ = QFileDialog.getSaveFileName(
             main_window,
             "Save Project As",
@@ -81,6 +129,7 @@ class ProjectController:
             if not filepath.endswith('.ecad'):
                 filepath += '.ecad'
             
+            autosave_name = main_window.autosave.autosave_name()
             project = ProjectController._create_project_from_scene(main_window)
             main_window.project_handler.current_project = project
             
@@ -90,6 +139,7 @@ class ProjectController:
             )
             if success:
                 main_window.undo_manager.set_clean()
+                main_window.autosave.discard(autosave_name)
                 main_window.setWindowTitle(f"ECAD - {project.name} ({Path(filepath).name})")
                 
                 main_window.settings_manager.add_recent_file(filepath)
@@ -102,6 +152,7 @@ class ProjectController:
     @staticmethod
     def publish_project(main_window):
         """Publish current project to central database"""
+        ProjectController.finish_loading(main_window)
         if not main_window.project_handler.current_project:
             QMessageBox.warning(main_window, "No Project", "No project to publish")
             return
@@ -174,24 +225,24 @@ class ProjectController:
             
             archive_path = None
             if archive_check.isChecked():
-                archive_dir = main_window.settings_manager.settings.default_path + "/ecad/archive"
-                archive_dir = Path(archive_dir)
-                archive_dir.mkdir(parents=True, exist_ok=True)
+                from database.archive_store import ArchiveStore
                 
+                archive_dir = Path(main_window.settings_manager.settings.default_path + "/ecad/archive")
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                archive_name = f"{main_window.project_handler.current_project.name}_v{revision}_{timestamp}.ecad"
-                archive_path = str(archive_dir / archive_name)
-                
-                bundles = getattr(main_window, 'bundles', [])
-                imported_wires = getattr(main_window, 'imported_wire_items', [])
+                archive_name = f"{main_window.project_handler.current_project.name}_v{revision}_{timestamp}"
                 
-                success = main_window.project_handler.save_project(
-                    filepath=archive_path,
-                    main_window=main_window
-                )
-                
-                if success:
-                    main_window.statusBar().showMessage(f"Archived to: {archive_path}", 3000)
+                # Only the chunks that changed since the last archived version are stored,
+                # the .ecad file is written when the version is restored
+                rows = ProjectDatabase().collect_rows(
+                    main_window.project_handler.current_project,
+                    getattr(main_window, 'bundles', []),
+                    getattr(main_window, 'imported_wire_items', []),
+                    main_window.topology_manager)
+                store = ArchiveStore(archive_dir)
+                if store.add(archive_name, rows):
+                    archive_path = store.reference(archive_name)
+                    main_window.statusBar().showMessage(f"Archived as: {archive_name}", 3000)
+                store.close()
             print(central_db)
             publisher = PublishManager(central_db)
             success = publisher.publish_project(
@@ -210,6 +261,32 @@ class ProjectController:
             else:
                 QMessageBox.critical(main_window, "Error", "Failed to publish project")
     
+    @staticmethod
+    def open_archived_version(main_window):
+        """Pick an archived publish, write it out as a .ecad file and open it"""
+        from database.archive_store import ArchiveStore
+        
+        archive_dir = Path(main_window.settings_manager.settings.default_path + "/ecad/archive")
+        store = ArchiveStore(archive_dir)
+        try:
+            versions = store.versions()
+            if not versions:
+                QMessageBox.information(main_window, "Archive", "No archived versions")
+                return
+            labels = [f"{v['project_name']}  rev {v['revision']}  ({v['created'][:19].replace('T', ' ')})"
+                      for v in versions]
+            label, ok = QInputDialog.getItem(main_window, "Open Archived Version", "Version:", labels, 0, False)
+            if not ok:
+                return
+            path = store.materialise(versions[labels.index(label)]['name'])
+        finally:
+            store.close()
+        
+        if path is None:
+            QMessageBox.critical(main_window, "Error", "Failed to restore the archived version")
+            return
+        ProjectController.open_project(main_window, str(path))
+    
     @staticmethod
     def open_from_database(main_window):
         """Open a project from central database"""
@@ -382,6 +459,7 @@ class ProjectController:
         
         publisher = PublishManager(central_db)
         project_data = publisher.get_project(project_id)
+        versions = publisher.get_versions(project_id)
         publisher.close()
         
         if not project_data:
@@ -410,7 +488,23 @@ class ProjectController:
         main_window.db_stats_preview.setItem(2, 0, QTableWidgetItem("Bundles"))
         main_window.db_stats_preview.setItem(2, 1, QTableWidgetItem(str(len(bundles))))
         
-        main_window.db_version_table.setRowCount(0)
+        # Selecting a row here opens that version instead of the latest. Versions
+        # published before history was kept are listed but can't be opened
+        main_window.db_version_table.setRowCount(len(versions))
+        for i, version in enumerate(versions):
+            label = str(version.get('version', ''))
+            if not version.get('has_history'):
+                label += " (no history)"
+            items = [QTableWidgetItem(label),
+                     QTableWidgetItem(str(version.get('published_date') or '')[:10]),
+                     QTableWidgetItem(version.get('comments') or '')]
+            for column, item in enumerate(items):
+                if not version.get('has_history'):
+                    item.setFlags(item.flags() & ~(Qt.ItemIsSelectable | Qt.ItemIsEnabled))
+                main_window.db_version_table.setItem(i, column, item)
+            if version.get('has_history'):
+                items[0].setData(Qt.UserRole, version.get('version'))
+        main_window.db_version_table.setCurrentItem(None)
     
     @staticmethod
     def open_selected_db_project(main_window, dialog):
@@ -445,8 +539,15 @@ class ProjectController:
         
         read_only = (reply == QMessageBox.Yes)
         
+        version = None
+        version_row = main_window.db_version_table.currentRow()
+        if version_row >= 0 and main_window.db_version_table.item(version_row, 0):
+            version = main_window.db_version_table.item(version_row, 0).data(Qt.UserRole)
+        
         publisher = PublishManager(central_db)
         project_data = publisher.get_project(project_id)
+        if project_data and version is not None and version != project_data.get('version'):
+            project_data = publisher.get_project_version(project_id, version)
         publisher.close()
         
         if not project_data:
@@ -530,86 +631,18 @@ class ProjectController:
         if not hasattr(main_window, 'db_loaded_bundles') or not main_window.db_loaded_bundles:
             return
         
-        from graphics.bundle_item import BundleItem
-        from PyQt5.QtCore import QPointF
-        
         print(f"Reconstructing {len(main_window.db_loaded_bundles)} bundles")
         
+        # Lookups built once instead of scanning per bundle end
+        conn_items = {conn.topology_node: conn for conn in main_window.conns if conn.topology_node is not None}
+        branch_items = {}
+        for item in main_window.scene.items():
+            if hasattr(item, 'branch_node'):
+                branch_items.setdefault(item.branch_node, item)
+        
         for bundle_data in main_window.db_loaded_bundles:
             try:
-                start_point = QPointF(
-                    bundle_data.get('start_point_x', 0),
-                    bundle_data.get('start_point_y', 0)
-                )
-                end_point = QPointF(
-                    bundle_data.get('end_point_x', 0),
-                    bundle_data.get('end_point_y', 0)
-                )
-                
-                bundle = BundleItem(
-                    start_point=start_point,
-                    end_point=end_point,
-                    bundle_id=bundle_data['id'],
-                    main_window=main_window
-                )
-                
-                if bundle_data.get('specified_length'):
-                    bundle.set_specified_length(bundle_data['specified_length'])
-                
-                start_node = None
-                end_node = None
-                
-                if bundle_data.get('start_node_id'):
-                    for node in main_window.topology_manager.nodes.values():
-                        if node.id == bundle_data['start_node_id']:
-                            start_node = node
-                            break
-                
-                if bundle_data.get('end_node_id'):
-                    for node in main_window.topology_manager.nodes.values():
-                        if node.id == bundle_data['end_node_id']:
-                            end_node = node
-                            break
-                
-                start_item = None
-                end_item = None
-                
-                for conn in main_window.conns:
-                    if conn.topology_node == start_node:
-                        start_item = conn
-                    if conn.topology_node == end_node:
-                        end_item = conn
-                
-                if not start_item and start_node:
-                    for item in main_window.scene.items():
-                        if hasattr(item, 'branch_node') and item.branch_node == start_node:
-                            start_item = item
-                            break
-                
-                if not end_item and end_node:
-                    for item in main_window.scene.items():
-                        if hasattr(item, 'branch_node') and item.branch_node == end_node:
-                            end_item = item
-                            break
-                
-                bundle.set_start_node(start_node, start_item)
-                bundle.set_end_node(end_node, end_item)
-                
-                if bundle_data.get('wire_ids'):
-                    wire_ids = bundle_data['wire_ids']
-                    if isinstance(wire_ids, str):
-                        import json
-                        try:
-                            wire_ids = json.loads(wire_ids)
-                        except:
-                            wire_ids = []
-                    
-                    for wire_id in wire_ids:
-                        bundle.assign_wire(wire_id)
-                
-                main_window.scene.addItem(bundle)
-                main_window.bundles.append(bundle)
-                
+                ProjectController._add_bundle_item(main_window, bundle_data, conn_items, branch_items)
             except Exception as e:
                 print(f"Error reconstructing bundle {bundle_data.get('id')}: {e}")
                 import traceback
@@ -619,88 +652,277 @@ class ProjectController:
         print(f"Reconstructed {len(main_window.bundles)} bundles")
     
     @staticmethod
-    def _load_project_to_scene(main_window, project):
-        """Load project data into scene"""
-        main_window.scene.clear()
-        main_window.conns = []
-        main_window.wires = []
-        main_window.imported_wire_items = []
+    def _add_bundle_item(main_window, bundle_data, conn_items, branch_items):
+        """Create one bundle from its database row, conn_items/branch_items map topology nodes to their items"""
+        from graphics.bundle_item import BundleItem
+        from PyQt5.QtCore import QPointF
         
-        for conn_id, connector in project.connectors.items():
-            pin_ids = list(connector.pins.keys())
-            pin_ids.sort()
-            
-            from graphics.connector_item import ConnectorItem
-            conn_item = ConnectorItem(
-                connector.position[0],
-                connector.position[1],
-                pins=pin_ids
-            )
-            conn_item.cid = conn_id
-            conn_item.part_number = connector.part_number
-            conn_item.manufacturer = connector.manufacturer
-            
-            conn_item.set_topology_manager(main_window.topology_manager)
-            conn_item.set_main_window(main_window)
-            conn_item.create_topology_node()
-            
-            main_window.scene.addItem(conn_item)
-            main_window.conns.append(conn_item)
+        start_point = QPointF(
+            bundle_data.get('start_point_x', 0),
+            bundle_data.get('start_point_y', 0)
+        )
+        end_point = QPointF(
+            bundle_data.get('end_point_x', 0),
+            bundle_data.get('end_point_y', 0)
+        )
         
-        from graphics.wire_item import WireItem
-        from model.netlist import Netlist
+        bundle = BundleItem(
+            start_point=start_point,
+            end_point=end_point,
+            bundle_id=bundle_data['id'],
+            main_window=main_window
+        )
         
-        netlist = Netlist()
-        main_window.topology_manager.set_netlist(netlist)
+        if bundle_data.get('specified_length'):
+            bundle.set_specified_length(bundle_data['specified_length'])
         
-        for wire_id, wire in project.wires.items():
-            from_conn = None
-            to_conn = None
-            
-            for conn in main_window.conns:
-                if conn.cid in wire.from_node_id:
-                    from_conn = conn
-                if conn.cid in wire.to_node_id:
-                    to_conn = conn
+        nodes = main_window.topology_manager.nodes
+        start_node = nodes.get(bundle_data.get('start_node_id'))
+        end_node = nodes.get(bundle_data.get('end_node_id'))
+        
+        start_item = conn_items.get(start_node)
+        end_item = conn_items.get(end_node)
+        
+        if not start_item and start_node:
+            start_item = branch_items.get(start_node)
+        
+        if not end_item and end_node:
+            end_item = branch_items.get(end_node)
+        
+        bundle.set_start_node(start_node, start_item)
+        bundle.set_end_node(end_node, end_item)
+        main_window.topology_manager.index_bundle(bundle)
+        
+        if bundle_data.get('wire_ids'):
+            wire_ids = bundle_data['wire_ids']
+            if isinstance(wire_ids, str):
+                import json
+                try:
+                    wire_ids = json.loads(wire_ids)
+                except:
+                    wire_ids = []
             
-            if not from_conn or not to_conn:
+            bundle.assign_wires(wire_ids)
+        
+        main_window.scene.addItem(bundle)
+        main_window.bundles.append(bundle)
+        return bundle
+    
+    @staticmethod
+    def _restore_topology_nodes(main_window, topology_data):
+        """Branch points, junctions and fasteners of the saved routing graph, returns {node: graphics item}"""
+        from model.topology import BranchPointNode, JunctionNode, FastenerNode
+        from graphics.topology_item import BranchPointGraphicsItem, JunctionGraphicsItem, FastenerGraphicsItem
+        
+        manager = main_window.topology_manager
+        router = ProjectController._auto_router(main_window)
+        node_items = {}
+        for data in topology_data.get('nodes', []):
+            if data['id'] in manager.nodes:
+                continue  # already there, e.g. a connector's own node
+            kind, position, properties = data['kind'], tuple(data['position']), data['properties']
+            if kind == "branch_point":
+                node = BranchPointNode(position, properties.get('branch_type', "split"))
+                item_class = BranchPointGraphicsItem
+            elif kind == "junction":
+                node = JunctionNode(position)
+                item_class = JunctionGraphicsItem
+            elif kind == "fastener":
+                node = FastenerNode(position, properties.get('fastener_type', "cable_tie"),
+                                    properties.get('part_number'))
+                node.orientation = properties.get('orientation', 0)
+                item_class = FastenerGraphicsItem
+            else:
+                # Connector nodes written as plain nodes by earlier saves, the connectors bring their own
                 continue
+            node.id = data['id']
+            manager.add_node(node)
             
-            from_pin = from_conn.get_pin_by_id(wire.from_pin) if wire.from_pin else None
-            to_pin = to_conn.get_pin_by_id(wire.to_pin) if wire.to_pin else None
-            
-            if not from_pin or not to_pin:
+            item = item_class(node)
+            main_window.scene.addItem(item)
+            router.branch_points.append(item)
+            node_items[node] = item
+        return node_items
+    
+    @staticmethod
+    def _auto_router(main_window):
+        """The window's HarnessAutoRouter, which clears restored topology items along with its own"""
+        if not hasattr(main_window, 'auto_router'):
+            from utils.auto_route import HarnessAutoRouter
+            main_window.auto_router = HarnessAutoRouter(main_window.topology_manager, main_window)
+        return main_window.auto_router
+    
+    @staticmethod
+    def _restore_routes(main_window, topology_data):
+        """
+        Segments of the saved routing graph and the routed wires along them,
+        as the auto and bundle routers leave them, without routing again.
+        Runs after the wires and bundles are loaded. Returns the number of
+        routed wire items created.
+        """
+        from model.topology import WireSegment
+        from model.wire import Wire
+        from graphics.segment_item import SegmentGraphicsItem
+        from graphics.wire_item import SegmentedWireItem
+        
+        manager = main_window.topology_manager
+        bundles = {bundle.bundle_id: bundle for bundle in getattr(main_window, 'bundles', [])}
+        for data in topology_data.get('segments', []):
+            start_node = manager.nodes.get(data['start_node_id'])
+            end_node = manager.nodes.get(data['end_node_id'])
+            if start_node is None or end_node is None:
                 continue
+            segment = WireSegment(data['id'], start_node, end_node)
+            if data['specified_length'] is not None:
+                segment.specified_length = data['specified_length']
+            manager.add_segment(segment)
             
-            net = netlist.connect(from_pin, to_pin)
-            
-            wire_item = WireItem(
-                wire.id,
-                from_pin,
-                to_pin,
-                wire.color.base_color,
-                net
-            )
-            wire_item.wire_data = wire
-            wire_item.net = net
+            bundle = bundles.get(data['bundle_id'])
+            if bundle is not None:
+                # Linked as TopologyManager.create_bundle_from_segment does
+                bundle.topology_segment = segment
+                bundle.wires = segment.wires
+                segment.graphics_item = bundle
+            else:
+                item = SegmentGraphicsItem(segment, manager)
+                main_window.scene.addItem(item)
+                ProjectController._auto_router(main_window).segment_items.append(item)
+        
+        # Wires sharing a routed item were saved with the same route id
+        wire_items = {item.wid: item for item in main_window.imported_wire_items if hasattr(item, 'wid')}
+        routes = {}
+        for wire_id, (route_id, segment_ids) in topology_data.get('routes', {}).items():
+            wire_item = wire_items.get(wire_id)
+            if wire_item is not None:
+                routes.setdefault(route_id, (segment_ids, []))[1].append(wire_item)
+        
+        routed = []
+        for route_id, (segment_ids, members) in routes.items():
+            segments = [manager.segments.get(segment_id) for segment_id in segment_ids]
+            if not segments or None in segments:
+                continue
+            template = members[0]
+            wire = Wire(route_id, template.start_pin, template.end_pin, template.color_data.base_color)
+            wire.color_data = template.color_data
+            wire.length = (getattr(getattr(template, 'wire_data', None), 'calculated_length_mm', None)
+                           or manager.path_length(segments))
+            wire.segments = segments
+            for segment in segments:
+                segment.wires.append(wire)
             
-            main_window.scene.addItem(wire_item)
-            main_window.imported_wire_items.append(wire_item)
+            wire_graphics = SegmentedWireItem(wire)
+            wire_graphics.set_main_window(main_window)
+            main_window.scene.addItem(wire_graphics)
+            wire.graphics_item = wire_graphics
+            routed.append(wire_graphics)
             
-            from_pin.wires.append(wire_item)
-            to_pin.wires.append(wire_item)
+            for wire_item in members:
+                wire_item.routed_visualization = [wire_graphics]
+                wire_item.routed_length = (getattr(getattr(wire_item, 'wire_data', None), 'calculated_length_mm', None)
+                                           or wire.length)
+                wire_item.setVisible(False)
+        
+        if routed:
+            main_window.routed_wire_items.extend(routed)
+            main_window.wires = [item.wire for item in main_window.routed_wire_items if hasattr(item, 'wire')]
+            if hasattr(main_window, 'viz_manager'):
+                from graphics.visualization_manager import VisualizationMode
+                main_window.viz_manager.set_mode(VisualizationMode.ALL)
+                main_window.viz_manager.show_direct_wires = False
+                main_window.viz_manager.update_visibility()
+            print(f"Restored {len(manager.segments)} segments and {len(routed)} routed wires")
+        return len(routed)
+    
+    @staticmethod
+    def _load_project_to_scene(main_window, project):
+        """Load project data into scene"""
+        from model.netlist import Netlist
+        
+        main_window.scene.clear()
+        main_window.conns = []
+        main_window.wires = []
+        main_window.imported_wire_items = []
+        
+        conn_items = {}
+        for connector in project.connectors.values():
+            conn_items[connector.id] = ProjectController._add_connector_item(main_window, connector)
+        
+        netlist = Netlist()
+        main_window.topology_manager.set_netlist(netlist)
+        
+        for wire in project.wires.values():
+            ProjectController._add_wire_item(main_window, netlist, wire, conn_items)
         
         main_window.refresh_tree_views()
         main_window.refresh_connector_labels()
     
+    @staticmethod
+    def _add_connector_item(main_window, connector):
+        """Create the scene item of a loaded connector"""
+        from graphics.connector_item import ConnectorItem
+        
+        conn_item = ConnectorItem(model=connector)
+        conn_item.cid = connector.id
+        conn_item.part_number = connector.part_number
+        conn_item.manufacturer = connector.manufacturer
+        
+        conn_item.set_topology_manager(main_window.topology_manager)
+        conn_item.set_main_window(main_window)
+        conn_item.create_topology_node()
+        
+        main_window.scene.addItem(conn_item)
+        main_window.conns.append(conn_item)
+        return conn_item
+    
+    @staticmethod
+    def _add_wire_item(main_window, netlist, wire, conn_items):
+        """Create the scene item of a loaded wire, conn_items maps connector ids to their items.
+        Returns None when an end connector or pin isn't there."""
+        from graphics.wire_item import WireItem
+        from database.project_db import wire_end_connector_id
+        
+        from_conn = conn_items.get(wire_end_connector_id(wire.from_node_id))
+        to_conn = conn_items.get(wire_end_connector_id(wire.to_node_id))
+        
+        if not from_conn or not to_conn:
+            return None
+        
+        from_pin = ProjectController._find_pin(from_conn, wire.from_pin)
+        to_pin = ProjectController._find_pin(to_conn, wire.to_pin)
+        
+        if not from_pin or not to_pin:
+            return None
+        
+        net = netlist.connect(from_pin, to_pin)
+        
+        wire_item = WireItem(
+            wire.id,
+            from_pin,
+            to_pin,
+            wire.color.base_color,
+            net
+        )
+        wire_item.wire_data = wire
+        wire_item.net = net
+        
+        main_window.scene.addItem(wire_item)
+        main_window.imported_wire_items.append(wire_item)
+        return wire_item
+    
+    @staticmethod
+    def _find_pin(conn_item, pin_ref):
+        """Pin of a connector item by pin id, or by pin number as wires store it"""
+        if not pin_ref:
+            return None
+        pin = conn_item.get_pin_by_id(pin_ref)
+        if pin is None:
+            pin = next((pin for pin in conn_item.pins if pin.model.number == pin_ref), None)
+        return pin
+    
     @staticmethod
     def _load_bundles_from_project(main_window, filepath):
         """Load bundles from project file"""
-        from database.project_db import ProjectDatabase
-        
-        db = ProjectDatabase(filepath)
-        bundles_data = db.load_bundles()
-        db.close()
+        bundles_data = main_window.project_handler.load_bundles(filepath)
         
         if bundles_data:
             print(f"Found {len(bundles_data)} bundles in project file")
@@ -743,6 +965,7 @@ class ProjectController:
                         wire_id = wire.wire.id
                 
                 pin = Pin(
+                    pid=f"{connector.id}_{pin_item.original_id or pin_item.pid}",
                     number=pin_item.original_id or pin_item.pid,
                     gender=Gender.FEMALE,
                     seal=SealType.UNSEALED,
@@ -777,7 +1000,8 @@ class ProjectController:
                     to_pin=wd.to_pin,
                     signal_name=wd.signal_name,
                     part_number=wd.part_number,
-                    cross_section=wd.cross_section
+                    cross_section=wd.cross_section,
+                    calculated_length_mm=getattr(wire_item, 'routed_length', None)
                 )
                 harness.wires[wire.id] = wire
         
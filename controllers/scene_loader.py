@@ -0,0 +1,205 @@
+"""
+Viewport-first scene loading for large projects
+"""
+
+import time
+from PyQt5.QtCore import QTimer
+
+from controllers.project_controller import ProjectController
+from database.project_db import wire_end_connector_id
+
+# Time one background step may take (ms), the UI handles input in between
+LOAD_STEP_MS = 30
+
+
+class SceneLoader:
+    """
+    Creates the scene items of a loaded project, the part in view first.
+
+    The project model and bundle rows are loaded whole, only the graphics
+    items are deferred. start() creates the connectors, wires and bundles
+    whose bounds intersect the visible scene rect, found through the R*Tree
+    in the project file, and hands control back. The rest is created in
+    timer steps of LOAD_STEP_MS; whatever scrolls into view before its turn
+    is created on the next step. finish() creates everything left at once,
+    anything that needs the whole scene (saving) calls it first.
+    
+    Saved branch points are created up front, the bundles ending on them
+    need them; segments and routed wires once everything else is there.
+    """
+
+    def __init__(self, main_window, project, bundles_data, db, topology_data=None):
+        self.main_window = main_window
+        self.db = db
+        self.topology_data = topology_data or {}
+        self.pending_connectors = dict(project.connectors)
+        self.pending_wires = dict(project.wires)
+        self.pending_bundles = {data['id']: data for data in bundles_data}
+        self.total = len(self.pending_connectors) + len(self.pending_wires) + len(self.pending_bundles)
+        self.conn_items = {}  # connector id -> item
+        self.node_items = {}  # topology node -> connector item, for the bundle ends
+        self.branch_items = {}  # topology node -> branch point item
+        self.netlist = None
+        self.started = None
+        self._view_moved = False
+
+        self.timer = QTimer()
+        self.timer.setInterval(0)
+        self.timer.timeout.connect(self._step)
+
+    @property
+    def remaining(self) -> int:
+        return len(self.pending_connectors) + len(self.pending_wires) + len(self.pending_bundles)
+
+    def start(self):
+        """Create the items in view, then keep loading in the background"""
+        from model.netlist import Netlist
+
+        main_window = self.main_window
+        self.started = time.perf_counter()
+        main_window.scene.clear()
+        main_window.conns = []
+        main_window.wires = []
+        main_window.imported_wire_items = []
+        self.netlist = Netlist()
+        main_window.topology_manager.set_netlist(self.netlist)
+        self.branch_items = ProjectController._restore_topology_nodes(main_window, self.topology_data)
+
+        ids = self._items_in_view()
+        if not any(ids.values()):
+            # Nothing where the view is, look at the middle of the board instead
+            extent = self.db.item_extent()
+            if extent:
+                main_window.view.centerOn((extent[0] + extent[2]) / 2.0, (extent[1] + extent[3]) / 2.0)
+                ids = self._items_in_view()
+        self.load_items(ids)
+
+        main_window.refresh_tree_views()
+        main_window.refresh_bundle_tree()
+        print(f"Viewport loaded: {self.total - self.remaining} of {self.total} items "
+              f"in {time.perf_counter() - self.started:.3f}s")
+
+        for bar in (main_window.view.horizontalScrollBar(), main_window.view.verticalScrollBar()):
+            bar.valueChanged.connect(self._on_view_moved)
+        self.timer.start()
+
+    def finish(self):
+        """Create everything still pending right away"""
+        if self.timer.isActive():
+            self._load_all()
+            self._done()
+
+    def cancel(self):
+        """Stop loading, the scene is being cleared"""
+        self._stop()
+        if self.main_window.scene_loader is self:
+            self.main_window.scene_loader = None
+
+    # ---- loading ----
+
+    def _items_in_view(self):
+        view = self.main_window.view
+        rect = view.mapToScene(view.viewport().rect()).boundingRect()
+        return self.db.items_in_rect(rect.left(), rect.top(), rect.right(), rect.bottom())
+
+    def load_items(self, ids):
+        """Create the given connectors, wires and bundles (and the connectors they end on)"""
+        for connector_id in ids.get('connectors', []):
+            self._load_connector(connector_id)
+        for wire_id in ids.get('wires', []):
+            wire = self.pending_wires.get(wire_id)
+            if wire is not None:
+                self._load_wire(wire)
+        for bundle_id in ids.get('bundles', []):
+            data = self.pending_bundles.get(bundle_id)
+            if data is not None:
+                self._load_bundle(data)
+
+    def _load_connector(self, connector_id):
+        connector = self.pending_connectors.pop(connector_id, None)
+        if connector is None:
+            return
+        conn_item = ProjectController._add_connector_item(self.main_window, connector)
+        self.conn_items[connector_id] = conn_item
+        if conn_item.topology_node is not None:
+            self.node_items[conn_item.topology_node] = conn_item
+
+    def _load_wire(self, wire):
+        del self.pending_wires[wire.id]
+        self._load_connector(wire_end_connector_id(wire.from_node_id))
+        self._load_connector(wire_end_connector_id(wire.to_node_id))
+        ProjectController._add_wire_item(self.main_window, self.netlist, wire, self.conn_items)
+
+    def _load_bundle(self, data):
+        del self.pending_bundles[data['id']]
+        # Connector nodes carry the connector id
+        self._load_connector(data.get('start_node_id'))
+        self._load_connector(data.get('end_node_id'))
+        try:
+            ProjectController._add_bundle_item(self.main_window, data, self.node_items, self.branch_items)
+        except Exception as e:
+            print(f"Error reconstructing bundle {data.get('id')}: {e}")
+            import traceback
+            traceback.print_exc()
+
+    def _load_next(self) -> bool:
+        """Create one pending item, connectors first. False when nothing is left."""
+        if self.pending_connectors:
+            self._load_connector(next(iter(self.pending_connectors)))
+        elif self.pending_wires:
+            self._load_wire(next(iter(self.pending_wires.values())))
+        elif self.pending_bundles:
+            self._load_bundle(next(iter(self.pending_bundles.values())))
+        else:
+            return False
+        return True
+
+    def _load_all(self):
+        while self._load_next():
+            pass
+
+    # ---- background steps ----
+
+    def _on_view_moved(self, _value):
+        self._view_moved = True
+
+    def _step(self):
+        if self._view_moved:
+            self._view_moved = False
+            self.load_items(self._items_in_view())
+
+        deadline = time.perf_counter() + LOAD_STEP_MS / 1000.0
+        while time.perf_counter() < deadline:
+            if not self._load_next():
+                break
+
+        if self.remaining:
+            self.main_window.statusBar().showMessage(
+                f"Loading... {self.total - self.remaining}/{self.total} items")
+        else:
+            self._done()
+
+    def _done(self):
+        self._stop()
+        main_window = self.main_window
+        if main_window.scene_loader is self:
+            main_window.scene_loader = None
+        ProjectController._restore_routes(main_window, self.topology_data)
+        main_window.refresh_tree_views()
+        main_window.refresh_connector_labels()
+        main_window.refresh_bundle_tree()
+        print(f"Loaded {self.total} items in {time.perf_counter() - self.started:.3f}s")
+        main_window.statusBar().showMessage(f"Loaded {self.total} items", 3000)
+
+    def _stop(self):
+        if not self.timer.isActive() and self.db is None:
+            return
+        self.timer.stop()
+        for bar in (self.main_window.view.horizontalScrollBar(), self.main_window.view.verticalScrollBar()):
+            try:
+                bar.valueChanged.disconnect(self._on_view_moved)
+            except TypeError:
+                pass  # never connected
+        if self.db is not None:
+            self.db.close()
+            self.db = None
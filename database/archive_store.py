@@ -0,0 +1,271 @@
+#database/archive_store
+"""
+Content-addressed archive of published project versions, <archive>/archive.db
+
+An archived version is a manifest: per table, the ordered list of chunks
+holding its rows. A chunk is a run of rows (one JSON array per line,
+zlib compressed) stored once under the SHA-256 of its content, so
+versions share every chunk that didn't change and archiving a version
+writes only the chunks that did.
+
+Chunk boundaries are chosen by the rows' keys (a row whose key hash hits
+CHUNK_ROWS ends its chunk), not by position. Inserting or deleting a row
+changes only the chunk around it, the rest of the table still hashes
+the same.
+
+materialise() writes a version back out as a regular .ecad file. Publishing
+records reference(), archive.db plus the version name, as its file path.
+"""
+
+import hashlib
+import json
+import sqlite3
+import zlib
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from database.project_db import (
+    KEY_COLUMNS, SAVE_ORDER, SCHEMA_VERSION, TABLE_COLUMNS, VOLATILE_COLUMNS, ProjectDatabase
+)
+
+ARCHIVE_FILE = "archive.db"
+
+# Rows per chunk on average, a power of two
+CHUNK_ROWS = 256
+
+# Upper bound on rows per chunk, whatever the keys
+MAX_CHUNK_ROWS = 4 * CHUNK_ROWS
+
+ARCHIVE_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS chunks (
+        hash TEXT PRIMARY KEY,
+        size INTEGER,
+        data BLOB
+    )""",
+    """CREATE TABLE IF NOT EXISTS manifests (
+        name TEXT PRIMARY KEY,
+        project_id TEXT,
+        project_name TEXT,
+        revision TEXT,
+        created TEXT,
+        schema_version INTEGER,
+        columns TEXT,
+        row_count INTEGER
+    )""",
+    """CREATE TABLE IF NOT EXISTS manifest_chunks (
+        manifest TEXT,
+        table_name TEXT,
+        position INTEGER,
+        hash TEXT,
+        PRIMARY KEY (manifest, table_name, position)
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_manifest_chunks_hash ON manifest_chunks(hash)",
+]
+
+
+class ArchiveStore:
+    """Deduplicated store of project versions in one SQLite file under root"""
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.root / ARCHIVE_FILE))
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        for statement in ARCHIVE_SCHEMA:
+            self.conn.execute(statement)
+        self.conn.commit()
+
+    def close(self):
+        if self.conn:
+            self.conn.close()
+            self.conn = None
+
+    def path_for(self, name: str) -> Path:
+        """Where materialise() puts a version by default"""
+        return self.root / f"{name}.ecad"
+
+    def reference(self, name: str) -> str:
+        """Where an archived version lives, <archive>/archive.db#<name>; it has no .ecad file until materialised"""
+        return f"{self.root / ARCHIVE_FILE}#{name}"
+
+    # ---- archiving ----
+
+    def add(self, name: str, rows: Dict[str, List[tuple]]) -> bool:
+        """Archive rows from ProjectDatabase.collect_rows as version name (replacing one of that name)"""
+        try:
+            created = datetime.now().isoformat()
+            info = dict(rows.get('project_info', []))
+            chunks = {}  # hash -> payload
+            manifest = []
+            for table in SAVE_ORDER:
+                for position, (digest, payload) in enumerate(self._chunk_table(table, rows.get(table, []))):
+                    chunks[digest] = payload
+                    manifest.append((name, table, position, digest))
+
+            cursor = self.conn.cursor()
+            cursor.execute("BEGIN")
+            stored = self._stored(cursor, list(chunks))
+            new = [(digest, len(payload), zlib.compress(payload, 6))
+                   for digest, payload in chunks.items() if digest not in stored]
+            cursor.executemany("INSERT INTO chunks (hash, size, data) VALUES (?, ?, ?)", new)
+
+            replaced = self._drop_manifest(cursor, name)
+            cursor.execute(
+                "INSERT INTO manifests (name, project_id, project_name, revision, created, "
+                "schema_version, columns, row_count) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (name, info.get('id'), info.get('name'), info.get('revision'), created, SCHEMA_VERSION,
+                 json.dumps({table: TABLE_COLUMNS[table] for table in SAVE_ORDER}),
+                 sum(len(rows.get(table, [])) for table in SAVE_ORDER)))
+            cursor.executemany(
+                "INSERT INTO manifest_chunks (manifest, table_name, position, hash) VALUES (?, ?, ?, ?)",
+                manifest)
+            self._prune(cursor, replaced)
+            self.conn.commit()
+
+            written = sum(len(data) for _digest, _size, data in new)
+            print(f"Archived {name}: {len(new)} of {len(chunks)} chunks new, {written / 1024:.1f} KB written")
+            return True
+
+        except Exception as e:
+            print(f"Error archiving {name}: {e}")
+            import traceback
+            traceback.print_exc()
+            self.conn.rollback()
+            return False
+
+    def add_file(self, name: str, project_path) -> bool:
+        """Archive an existing .ecad file, e.g. one of the full copies older versions archived"""
+        db = ProjectDatabase(str(project_path), read_only=True)
+        try:
+            rows = {table: list(keyed.values()) for table, keyed in db.read_rows().items()}
+        finally:
+            db.close()
+        return self.add(name, rows)
+
+    @staticmethod
+    def _chunk_table(table: str, rows: List[tuple]):
+        """(hash, payload) of each chunk of a table's rows, in row order"""
+        volatile = VOLATILE_COLUMNS.get(table, 0)
+        key_columns = KEY_COLUMNS[table]
+        lines = []
+        for row in rows:
+            if volatile:
+                # Stamped with the save time, materialise() puts the archive time back
+                row = tuple(row[:-volatile]) + (None,) * volatile
+            line = json.dumps(list(row), separators=(',', ':'))
+            lines.append(line)
+            key = json.dumps(list(row[:key_columns]), separators=(',', ':')).encode('utf-8')
+            if (zlib.crc32(key) & (CHUNK_ROWS - 1)) == 0 or len(lines) >= MAX_CHUNK_ROWS:
+                yield ArchiveStore._chunk(table, lines)
+                lines = []
+        if lines:
+            yield ArchiveStore._chunk(table, lines)
+
+    @staticmethod
+    def _chunk(table: str, lines: List[str]):
+        payload = '\n'.join(lines).encode('utf-8')
+        return hashlib.sha256(table.encode('utf-8') + b'\n' + payload).hexdigest(), payload
+
+    @staticmethod
+    def _stored(cursor, digests: List[str]) -> set:
+        """The digests already in the store"""
+        stored = set()
+        for start in range(0, len(digests), 500):
+            batch = digests[start:start + 500]
+            cursor.execute(f"SELECT hash FROM chunks WHERE hash IN ({', '.join('?' * len(batch))})", batch)
+            stored.update(row[0] for row in cursor.fetchall())
+        return stored
+
+    @staticmethod
+    def _drop_manifest(cursor, name: str) -> List[str]:
+        """Delete a manifest, returns the chunks it referenced"""
+        cursor.execute("SELECT DISTINCT hash FROM manifest_chunks WHERE manifest = ?", (name,))
+        digests = [row[0] for row in cursor.fetchall()]
+        cursor.execute("DELETE FROM manifest_chunks WHERE manifest = ?", (name,))
+        cursor.execute("DELETE FROM manifests WHERE name = ?", (name,))
+        return digests
+
+    @staticmethod
+    def _prune(cursor, digests: List[str]):
+        """Delete those of digests no manifest references any more"""
+        cursor.executemany(
+            "DELETE FROM chunks WHERE hash = ? AND NOT EXISTS "
+            "(SELECT 1 FROM manifest_chunks WHERE manifest_chunks.hash = chunks.hash)",
+            [(digest,) for digest in digests])
+
+    # ---- reading ----
+
+    def versions(self, project_id: str = None) -> List[dict]:
+        """Archived versions, newest first"""
+        self.conn.row_factory = sqlite3.Row
+        try:
+            query = "SELECT name, project_id, project_name, revision, created, row_count FROM manifests"
+            params = []
+            if project_id:
+                query += " WHERE project_id = ?"
+                params.append(project_id)
+            query += " ORDER BY created DESC"
+            return [dict(row) for row in self.conn.execute(query, params).fetchall()]
+        finally:
+            self.conn.row_factory = None
+
+    def rows(self, name: str) -> Optional[Dict[str, List[tuple]]]:
+        """The rows of an archived version, columns as in TABLE_COLUMNS; None if there is no such version"""
+        manifest = self.conn.execute(
+            "SELECT created, columns FROM manifests WHERE name = ?", (name,)).fetchone()
+        if manifest is None:
+            return None
+        created, columns = manifest[0], json.loads(manifest[1])
+
+        rows = {table: [] for table in SAVE_ORDER}
+        cursor = self.conn.execute(
+            "SELECT manifest_chunks.table_name, chunks.data FROM manifest_chunks "
+            "JOIN chunks ON chunks.hash = manifest_chunks.hash "
+            "WHERE manifest_chunks.manifest = ? ORDER BY manifest_chunks.table_name, manifest_chunks.position",
+            (name,))
+        for table, data in cursor:
+            if table in rows:
+                rows[table].extend(tuple(json.loads(line))
+                                   for line in zlib.decompress(data).decode('utf-8').split('\n'))
+
+        for table in SAVE_ORDER:
+            rows[table] = self._current_columns(table, rows[table], columns.get(table), created)
+        return rows
+
+    @staticmethod
+    def _current_columns(table: str, rows: List[tuple], archived: Optional[list], created: str) -> List[tuple]:
+        """Rows with the volatile columns filled in, mapped to TABLE_COLUMNS if the archive used other ones"""
+        current = TABLE_COLUMNS[table]
+        volatile = VOLATILE_COLUMNS.get(table, 0)
+        if archived is not None and tuple(archived) != current:
+            index = {column: i for i, column in enumerate(archived)}
+            rows = [tuple(row[index[column]] if column in index else None for column in current)
+                    for row in rows]
+        if volatile:
+            rows = [tuple(row[:-volatile]) + (created,) * volatile for row in rows]
+        return rows
+
+    def materialise(self, name: str, path=None) -> Optional[Path]:
+        """Write an archived version out as a .ecad file (default path_for(name)), returns its path"""
+        rows = self.rows(name)
+        if rows is None:
+            print(f"No archived version {name}")
+            return None
+        path = Path(path) if path else self.path_for(name)
+        db = ProjectDatabase(str(path))
+        ok = db.save_rows(rows)
+        db.close()
+        return path if ok else None
+
+    def remove(self, name: str):
+        """Delete an archived version and the chunks only it used"""
+        cursor = self.conn.cursor()
+        cursor.execute("BEGIN")
+        self._prune(cursor, self._drop_manifest(cursor, name))
+        self.conn.commit()
+
+    def size(self) -> int:
+        """Compressed bytes held in chunks"""
+        return self.conn.execute("SELECT COALESCE(SUM(LENGTH(data)), 0) FROM chunks").fetchone()[0]
@@ -2,9 +2,10 @@
 
 import sqlite3
 import json
+import threading
 from pathlib import Path
 from datetime import datetime
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Tuple
 import uuid
 
 from model.models import (
@@ -13,22 +14,203 @@ from model.models import (
     WireType, NodeType
 )
 
+# Columns written per table, in insert order
+TABLE_COLUMNS = {
+    'project_info': ('key', 'value'),
+    'connectors': ('id', 'part_number', 'name', 'manufacturer', 'series', 'description',
+                   'gender', 'seal_type', 'housing_color', 'position_x', 'position_y',
+                   'rotation', 'created_date', 'modified_date'),
+    'pins': ('id', 'connector_id', 'pin_number', 'original_id', 'wire_id'),
+    'nodes': ('id', 'name', 'node_type', 'connector_id',
+              'position_x', 'position_y', 'branch_type', 'properties'),
+    'wires': ('id', 'name', 'signal_name', 'wire_type', 'cross_section',
+              'base_color', 'stripe_color', 'from_node_id', 'to_node_id',
+              'from_pin', 'to_pin', 'calculated_length', 'part_number', 'notes'),
+    'bundles': ('id', 'name', 'start_node_id', 'end_node_id',
+                'start_point_x', 'start_point_y', 'end_point_x', 'end_point_y',
+                'specified_length', 'wire_count', 'auto_created'),
+    'bundle_wires': ('bundle_id', 'wire_id'),
+    'segments': ('id', 'name', 'start_node_id', 'end_node_id', 'path_points'),
+    'wire_segments': ('wire_id', 'segment_id'),
+    # Routed topology: nodes other than connectors, segments, and the segments
+    # each routed wire runs through in order (route_id is its routed item)
+    'branch_points': ('id', 'project_id', 'position_x', 'position_y', 'branch_type', 'properties'),
+    'topology_segments': ('id', 'start_node_id', 'end_node_id', 'bundle_id', 'specified_length'),
+    'wire_routes': ('wire_id', 'position', 'route_id', 'segment_id'),
+}
+
+# Parents before children; deletes run in reverse
+SAVE_ORDER = ('project_info', 'connectors', 'pins', 'nodes', 'wires',
+              'bundles', 'bundle_wires', 'segments', 'wire_segments',
+              'branch_points', 'topology_segments', 'wire_routes')
+
+# Leading columns forming the primary key, link tables are keyed by the whole row
+KEY_COLUMNS = {table: 1 for table in SAVE_ORDER}
+KEY_COLUMNS.update({'bundle_wires': 2, 'wire_segments': 2, 'wire_routes': 2})
+
+# Trailing columns that change on every save without the entity changing
+VOLATILE_COLUMNS = {'connectors': 2}  # created_date, modified_date
+
+# Node attributes kept in branch_points.properties, by node kind
+TOPOLOGY_NODE_PROPERTIES = ('branch_type', 'fastener_type', 'part_number', 'orientation')
+
+# Stored in PRAGMA user_version. Files are migrated up to it when opened;
+# incremental saves only go to files on exactly this version, anything else
+# gets a full rewrite (which also stamps the version).
+SCHEMA_VERSION = 3
+
+# Statements bringing a file up to each schema version
+MIGRATIONS = {
+    1: [],  # version stamp only
+    2: [
+        # Child rows are loaded per parent id; bundle_wires is covered by its primary key
+        "CREATE INDEX IF NOT EXISTS idx_pins_connector ON pins(connector_id)",
+        "CREATE INDEX IF NOT EXISTS idx_wire_segments_segment ON wire_segments(segment_id)",
+    ],
+    3: [],  # topology_segments and wire_routes, created by _create_tables
+}
+
+
+# Scene units added around item positions in the spatial index, covers the
+# connector body, its label and info table
+ITEM_MARGIN = 50.0
+
+# Wire ends are stored as connector node ids, "NODE_<connector id>". Files
+# re-saved by older versions can carry the prefix several times over.
+NODE_PREFIX = 'NODE_'
+
+
+def wire_end_connector_id(node_id: str) -> str:
+    """Connector id a wire end node id refers to"""
+    return node_id.replace(NODE_PREFIX, '') if node_id else node_id
+
+
+def topology_from_rows(rows: Dict[str, List[tuple]]) -> dict:
+    """
+    Routed topology from branch_points, topology_segments and wire_routes
+    rows (in TABLE_COLUMNS order): {'nodes': [dict], 'segments': [dict],
+    'routes': {wire id: (route id, [segment ids in path order])}}
+    """
+    nodes = []
+    for node_id, _project_id, x, y, kind, properties in rows.get('branch_points', ()):
+        nodes.append({'id': node_id, 'kind': kind, 'position': (x, y),
+                      'properties': json.loads(properties) if properties else {}})
+    columns = TABLE_COLUMNS['topology_segments']
+    segments = [dict(zip(columns, row)) for row in rows.get('topology_segments', ())]
+    routes = {}
+    for wire_id, position, route_id, segment_id in sorted(rows.get('wire_routes', ()), key=lambda row: row[:2]):
+        routes.setdefault(wire_id, (route_id, []))[1].append(segment_id)
+    return {'nodes': nodes, 'segments': segments, 'routes': routes}
+
+
+# R*Trees of connector, wire and bundle bounds, one row per item keyed by the
+# item's rowid. Triggers keep them in step with full and incremental saves;
+# wires take the box around the connectors at their two ends. The triggers
+# delete before inserting, an OR REPLACE inside them would be overridden by
+# the conflict policy of the UPSERTs incremental saves run.
+_WIRE_END = "replace({column}, '" + NODE_PREFIX + "', '')"
+_WIRE_BOUNDS = f"""
+    SELECT w.rowid, MIN(c.position_x) - {ITEM_MARGIN}, MAX(c.position_x) + {ITEM_MARGIN},
+           MIN(c.position_y) - {ITEM_MARGIN}, MAX(c.position_y) + {ITEM_MARGIN}
+    FROM wires w
+    JOIN connectors c ON c.id IN ({_WIRE_END.format(column='w.from_node_id')},
+                                  {_WIRE_END.format(column='w.to_node_id')})"""
+_WIRE_REFRESH = f"""
+    DELETE FROM wire_bounds WHERE id = NEW.rowid;
+    INSERT INTO wire_bounds {_WIRE_BOUNDS} WHERE w.rowid = NEW.rowid GROUP BY w.rowid;"""
+_CONNECTOR_WIRES = f"""
+    SELECT rowid FROM wires WHERE {_WIRE_END.format(column='from_node_id')} = NEW.id
+    UNION
+    SELECT rowid FROM wires WHERE {_WIRE_END.format(column='to_node_id')} = NEW.id"""
+_CONNECTOR_REFRESH = f"""
+    DELETE FROM connector_bounds WHERE id = NEW.rowid;
+    INSERT INTO connector_bounds VALUES (
+        NEW.rowid, NEW.position_x - {ITEM_MARGIN}, NEW.position_x + {ITEM_MARGIN},
+        NEW.position_y - {ITEM_MARGIN}, NEW.position_y + {ITEM_MARGIN});"""
+_BUNDLE_REFRESH = f"""
+    DELETE FROM bundle_bounds WHERE id = NEW.rowid;
+    INSERT INTO bundle_bounds VALUES (
+        NEW.rowid,
+        MIN(NEW.start_point_x, NEW.end_point_x) - {ITEM_MARGIN}, MAX(NEW.start_point_x, NEW.end_point_x) + {ITEM_MARGIN},
+        MIN(NEW.start_point_y, NEW.end_point_y) - {ITEM_MARGIN}, MAX(NEW.start_point_y, NEW.end_point_y) + {ITEM_MARGIN});"""
+SPATIAL_SCHEMA = [
+    "CREATE VIRTUAL TABLE connector_bounds USING rtree(id, min_x, max_x, min_y, max_y)",
+    "CREATE VIRTUAL TABLE wire_bounds USING rtree(id, min_x, max_x, min_y, max_y)",
+    "CREATE VIRTUAL TABLE bundle_bounds USING rtree(id, min_x, max_x, min_y, max_y)",
+    # Wires are found from their end connectors when a connector moves
+    f"CREATE INDEX IF NOT EXISTS idx_wires_from_connector ON wires({_WIRE_END.format(column='from_node_id')})",
+    f"CREATE INDEX IF NOT EXISTS idx_wires_to_connector ON wires({_WIRE_END.format(column='to_node_id')})",
+    f"CREATE TRIGGER connector_bounds_insert AFTER INSERT ON connectors BEGIN {_CONNECTOR_REFRESH} END",
+    f"""CREATE TRIGGER connector_bounds_update AFTER UPDATE OF position_x, position_y ON connectors BEGIN
+        {_CONNECTOR_REFRESH}
+        DELETE FROM wire_bounds WHERE id IN ({_CONNECTOR_WIRES});
+        INSERT INTO wire_bounds {_WIRE_BOUNDS} WHERE w.rowid IN ({_CONNECTOR_WIRES}) GROUP BY w.rowid;
+    END""",
+    "CREATE TRIGGER connector_bounds_delete AFTER DELETE ON connectors BEGIN "
+    "DELETE FROM connector_bounds WHERE id = OLD.rowid; END",
+    f"CREATE TRIGGER wire_bounds_insert AFTER INSERT ON wires BEGIN {_WIRE_REFRESH} END",
+    f"""CREATE TRIGGER wire_bounds_update AFTER UPDATE OF from_node_id, to_node_id ON wires
+        BEGIN {_WIRE_REFRESH} END""",
+    "CREATE TRIGGER wire_bounds_delete AFTER DELETE ON wires BEGIN "
+    "DELETE FROM wire_bounds WHERE id = OLD.rowid; END",
+    f"CREATE TRIGGER bundle_bounds_insert AFTER INSERT ON bundles BEGIN {_BUNDLE_REFRESH} END",
+    f"""CREATE TRIGGER bundle_bounds_update AFTER UPDATE OF start_point_x, start_point_y,
+        end_point_x, end_point_y ON bundles BEGIN {_BUNDLE_REFRESH} END""",
+    "CREATE TRIGGER bundle_bounds_delete AFTER DELETE ON bundles BEGIN "
+    "DELETE FROM bundle_bounds WHERE id = OLD.rowid; END",
+    # Files saved before the index existed
+    f"""INSERT INTO connector_bounds
+        SELECT rowid, position_x - {ITEM_MARGIN}, position_x + {ITEM_MARGIN},
+               position_y - {ITEM_MARGIN}, position_y + {ITEM_MARGIN} FROM connectors""",
+    f"INSERT INTO wire_bounds {_WIRE_BOUNDS} GROUP BY w.rowid",
+    f"""INSERT INTO bundle_bounds
+        SELECT rowid,
+               MIN(start_point_x, end_point_x) - {ITEM_MARGIN}, MAX(start_point_x, end_point_x) + {ITEM_MARGIN},
+               MIN(start_point_y, end_point_y) - {ITEM_MARGIN}, MAX(start_point_y, end_point_y) + {ITEM_MARGIN}
+        FROM bundles""",
+]
+
+# Owning table of each bounds table, in the order items_in_rect returns them
+SPATIAL_TABLES = {'connectors': 'connector_bounds', 'wires': 'wire_bounds', 'bundles': 'bundle_bounds'}
+
+
 class ProjectDatabase:
     """SQLite database for saving/loading harness projects"""
     
-    def __init__(self, project_path: str = None):
+    def __init__(self, project_path: str = None, read_only: bool = False):
         self.project_path = project_path
         self.conn = None
+        self.read_only = read_only
+        self.saved_rows = None  # rows of the last save, see save_project
         
         if project_path:
-            self.open(project_path)
+            self.open(project_path, read_only)
     
-    def open(self, project_path: str):
-        """Open or create project database"""
+    def open(self, project_path: str, read_only: bool = False):
+        """
+        Open or create project database. Writable opens bring the file up to
+        the current schema (tables, migrations, spatial index); read_only
+        ones leave the file untouched, tables it lacks read as empty.
+        """
         self.project_path = project_path
+        self.read_only = read_only
+        if read_only:
+            self.conn = sqlite3.connect(f"file:{project_path}?mode=ro", uri=True)
+            self.conn.row_factory = sqlite3.Row
+            return
         self.conn = sqlite3.connect(project_path)
         self.conn.row_factory = sqlite3.Row
+        self._tune_connection()
         self._create_tables()
+        self._migrate()
+        self._create_spatial_index()
+    
+    def _tune_connection(self):
+        """WAL journal with relaxed syncing and a bigger page cache, saves are one big write"""
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA cache_size=-32000")  # KiB
+        self.conn.execute("PRAGMA temp_store=MEMORY")
     
     def close(self):
         """Close database connection"""
@@ -184,72 +366,129 @@ class ProjectDatabase:
             )
         ''')
         
+        # Routing graph segments (TopologyManager), bundle_id when a bundle was made from it
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS topology_segments (
+                id TEXT PRIMARY KEY,
+                start_node_id TEXT,
+                end_node_id TEXT,
+                bundle_id TEXT,
+                specified_length REAL
+            )
+        ''')
+        
+        # Path of each routed wire through the topology segments
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS wire_routes (
+                wire_id TEXT,
+                position INTEGER,
+                route_id TEXT,
+                segment_id TEXT,
+                PRIMARY KEY (wire_id, position),
+                FOREIGN KEY (wire_id) REFERENCES wires(id),
+                FOREIGN KEY (segment_id) REFERENCES topology_segments(id)
+            )
+        ''')
+        
+        self.conn.commit()
+    
+    def _migrate(self):
+        """Run the migrations between the file's schema version and SCHEMA_VERSION"""
+        version = self.schema_version()
+        if version >= SCHEMA_VERSION:
+            return
+        cursor = self.conn.cursor()
+        for target in sorted(MIGRATIONS):
+            if version < target <= SCHEMA_VERSION:
+                for statement in MIGRATIONS[target]:
+                    cursor.execute(statement)
+        cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
         self.conn.commit()
+        print(f"Migrated project schema from version {version} to {SCHEMA_VERSION}")
+    
+    def _create_spatial_index(self):
+        """Create the item bounds R*Trees (see SPATIAL_SCHEMA) if the file has none yet"""
+        if self.has_spatial_index():
+            return
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute("BEGIN")
+            for statement in SPATIAL_SCHEMA:
+                cursor.execute(statement)
+            self.conn.commit()
+        except sqlite3.OperationalError as e:
+            # SQLite built without R*Tree, projects just open without lazy loading
+            self.conn.rollback()
+            print(f"Spatial index not available: {e}")
+    
+    def has_spatial_index(self) -> bool:
+        row = self.conn.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name IN (?, ?, ?)",
+            tuple(SPATIAL_TABLES.values())).fetchone()
+        return row[0] == len(SPATIAL_TABLES)
+    
+    def has_table(self, table: str) -> bool:
+        return self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone() is not None
     
-    def save_project(self, harness: WiringHarness, bundles: list = None, imported_wires: list = None) -> bool:
-        """Save complete harness project to database"""
+    def items_in_rect(self, min_x: float, min_y: float, max_x: float, max_y: float) -> Dict[str, List[str]]:
+        """Ids of the connectors, wires and bundles whose bounds intersect the rectangle"""
+        found = {}
+        for table, bounds in SPATIAL_TABLES.items():
+            cursor = self.conn.execute(
+                f"SELECT t.id FROM {bounds} b JOIN {table} t ON t.rowid = b.id "
+                f"WHERE b.max_x >= ? AND b.min_x <= ? AND b.max_y >= ? AND b.min_y <= ?",
+                (min_x, max_x, min_y, max_y))
+            found[table] = [row[0] for row in cursor.fetchall()]
+        return found
+    
+    def item_extent(self) -> Optional[Tuple[float, float, float, float]]:
+        """(min_x, min_y, max_x, max_y) around all connectors, None for an empty project"""
+        row = self.conn.execute(
+            "SELECT MIN(min_x), MIN(min_y), MAX(max_x), MAX(max_y) FROM connector_bounds").fetchone()
+        return None if row[0] is None else tuple(row)
+    
+    def item_count(self) -> int:
+        return sum(self.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                   for table in SPATIAL_TABLES)
+    
+    def save_project(self, harness: WiringHarness, bundles: list = None, imported_wires: list = None,
+                     previous: Dict[str, Dict[tuple, tuple]] = None, topology=None) -> bool:
+        """
+        Save complete harness project to database in one transaction.
+        previous are the saved_rows of the last save to (or load from) this
+        file; with them only changed rows are written, without them, or when
+        the file is on an older schema, the whole project is rewritten.
+        """
         try:
+            rows = self.collect_rows(harness, bundles, imported_wires, topology)
+        except Exception as e:
+            print(f"Error saving project: {e}")
+            import traceback
+            traceback.print_exc()
+            return False
+        return self.save_rows(rows, previous)
+    
+    def save_rows(self, rows: Dict[str, List[tuple]], previous: Dict[str, Dict[tuple, tuple]] = None) -> bool:
+        """Write rows from collect_rows, the database half of save_project. Plain
+        tuples only, so this can run on another thread than the collecting."""
+        try:
+            rows = self.key_rows(rows)
             cursor = self.conn.cursor()
+            cursor.execute("BEGIN")
             
-            # Clear existing data
-            cursor.execute("DELETE FROM bundle_wires")
-            cursor.execute("DELETE FROM bundles")
-            cursor.execute("DELETE FROM wire_segments")
-            cursor.execute("DELETE FROM segments")
-            cursor.execute("DELETE FROM wires")
-            cursor.execute("DELETE FROM pins")
-            cursor.execute("DELETE FROM nodes")
-            cursor.execute("DELETE FROM connectors")
-            cursor.execute("DELETE FROM project_info")
-            
-            # Save project info
-            project_info = {
-                'id': harness.id,
-                'name': harness.name,
-                'part_number': harness.part_number,
-                'revision': harness.revision,
-                'created_date': harness.created_date.isoformat(),
-                'modified_date': datetime.now().isoformat()
-            }
-            
-            for key, value in project_info.items():
-                cursor.execute('''
-                    INSERT INTO project_info (key, value)
-                    VALUES (?, ?)
-                ''', (key, str(value)))
-            
-            # Save connectors
-            for conn in harness.connectors.values():
-                self._save_connector(cursor, conn)
-            
-            # Save nodes
-            for node in harness.nodes.values():
-                self._save_node(cursor, node)
-            
-            # Save wires (from harness model)
-            for wire in harness.wires.values():
-                self._save_wire(cursor, wire)
-            
-            # Save imported wires (graphics items)
-            if imported_wires:
-                for wire_item in imported_wires:
-                    if hasattr(wire_item, 'wire_data'):
-                        wire_data = wire_item.wire_data
-                        # Check if wire already saved
-                        cursor.execute("SELECT id FROM wires WHERE id = ?", (wire_item.wid,))
-                        if not cursor.fetchone():
-                            self._save_imported_wire(cursor, wire_item, wire_data, harness)
-            
-            # Save bundles
-            if bundles:
-                for bundle in bundles:
-                    self._save_bundle(cursor, bundle, harness)
-            
-            # Save segments
-            for segment in harness.branches.values():
-                self._save_segment(cursor, segment)
+            if previous is not None and self.schema_version() == SCHEMA_VERSION:
+                upserts, deletes = self.write_changes(cursor, previous, rows)
+                print(f"Saved changes: {upserts} rows written, {deletes} deleted")
+            else:
+                # Clear existing data
+                for table in SAVE_ORDER[::-1]:
+                    cursor.execute(f"DELETE FROM {table}")
+                self.write_rows(cursor, {table: list(keyed.values()) for table, keyed in rows.items()})
+                cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
             
             self.conn.commit()
+            self.saved_rows = rows
             return True
             
         except Exception as e:
@@ -259,15 +498,135 @@ class ProjectDatabase:
             self.conn.rollback()
             return False
     
-    def _save_connector(self, cursor, connector: Connector):
-        """Save a connector to database"""
-        cursor.execute('''
-            INSERT INTO connectors (
-                id, part_number, name, manufacturer, series, description,
-                gender, seal_type, housing_color, position_x, position_y,
-                rotation, created_date, modified_date
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
+    def schema_version(self) -> int:
+        return self.conn.execute("PRAGMA user_version").fetchone()[0]
+    
+    @staticmethod
+    def key_rows(rows: Dict[str, List[tuple]]) -> Dict[str, Dict[tuple, tuple]]:
+        """Rows per table keyed by their primary key"""
+        return {table: {row[:KEY_COLUMNS[table]]: row for row in table_rows}
+                for table, table_rows in rows.items()}
+    
+    def read_rows(self) -> Dict[str, Dict[tuple, tuple]]:
+        """Rows currently stored, keyed like key_rows, to diff the next save against"""
+        rows = {}
+        for table in SAVE_ORDER:
+            if self.read_only and not self.has_table(table):
+                rows[table] = {}
+                continue
+            cursor = self.conn.execute(f"SELECT {', '.join(TABLE_COLUMNS[table])} FROM {table}")
+            rows[table] = {tuple(row[:KEY_COLUMNS[table]]): tuple(row) for row in cursor.fetchall()}
+        return rows
+    
+    @staticmethod
+    def write_changes(cursor, previous: Dict[str, Dict[tuple, tuple]],
+                      current: Dict[str, Dict[tuple, tuple]]) -> Tuple[int, int]:
+        """UPSERT changed rows and DELETE vanished ones, returns (upserts, deletes)"""
+        upserts = deletes = 0
+        for table in SAVE_ORDER[::-1]:
+            columns = TABLE_COLUMNS[table]
+            key_columns = columns[:KEY_COLUMNS[table]]
+            old, new = previous.get(table, {}), current.get(table, {})
+            gone = [key for key in old if key not in new]
+            if gone:
+                where = ' AND '.join(f"{column} = ?" for column in key_columns)
+                cursor.executemany(f"DELETE FROM {table} WHERE {where}", gone)
+                deletes += len(gone)
+        
+        for table in SAVE_ORDER:
+            columns = TABLE_COLUMNS[table]
+            key_columns = columns[:KEY_COLUMNS[table]]
+            old, new = previous.get(table, {}), current.get(table, {})
+            stable = len(columns) - VOLATILE_COLUMNS.get(table, 0)
+            changed = [row for key, row in new.items()
+                       if key not in old or tuple(old[key][:stable]) != row[:stable]]
+            if not changed:
+                continue
+            # created_date keeps the value of the first save
+            updates = [column for column in columns[len(key_columns):] if column != 'created_date']
+            conflict = (f"DO UPDATE SET {', '.join(f'{column} = excluded.{column}' for column in updates)}"
+                        if updates else "DO NOTHING")
+            cursor.executemany(
+                f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+                f"ON CONFLICT ({', '.join(key_columns)}) {conflict}", changed)
+            upserts += len(changed)
+        return upserts, deletes
+    
+    def collect_rows(self, harness: WiringHarness, bundles: list = None, imported_wires: list = None,
+                     topology=None) -> Dict[str, List[tuple]]:
+        """Rows of every table for a project, keyed by table name (columns as in TABLE_COLUMNS).
+        topology is the TopologyManager, its graph and the wire routes are saved with it."""
+        now = datetime.now().isoformat()
+        rows = {table: [] for table in SAVE_ORDER}
+        
+        # Project info
+        project_info = {
+            'id': harness.id,
+            'name': harness.name,
+            'part_number': harness.part_number,
+            'revision': harness.revision,
+            'created_date': harness.created_date.isoformat(),
+            'modified_date': now
+        }
+        rows['project_info'] = [(key, str(value)) for key, value in project_info.items()]
+        
+        for conn in harness.connectors.values():
+            rows['connectors'].append(self._connector_row(conn, now))
+            rows['pins'].extend(self._pin_rows(conn))
+        
+        for node in harness.nodes.values():
+            rows['nodes'].append(self._node_row(node))
+        
+        # Wires from the harness model, then imported wires (graphics items) not saved yet
+        saved_wires = set()
+        for wire in harness.wires.values():
+            rows['wires'].append(self._wire_row(wire))
+            saved_wires.add(wire.id)
+        for wire_item in imported_wires or []:
+            if hasattr(wire_item, 'wire_data') and wire_item.wid not in saved_wires:
+                rows['wires'].append(self._imported_wire_row(wire_item, wire_item.wire_data))
+                saved_wires.add(wire_item.wid)
+        
+        for bundle in bundles or []:
+            rows['bundles'].append(self._bundle_row(bundle))
+            rows['bundle_wires'].extend((bundle.bundle_id, wire_id) for wire_id in bundle.wire_ids)
+        
+        for segment in harness.branches.values():
+            rows['segments'].append(self._segment_row(segment))
+            rows['wire_segments'].extend((wire_id, segment.id) for wire_id in segment.wire_ids)
+        
+        if topology is not None:
+            from model.topology import BranchPointNode, JunctionNode, FastenerNode
+            
+            # Connector nodes come back with their connectors (and may be plain TopologyNodes)
+            for node in topology.nodes.values():
+                if (isinstance(node, (BranchPointNode, JunctionNode, FastenerNode))
+                        and node.id not in harness.connectors):
+                    rows['branch_points'].append(self._topology_node_row(harness.id, node))
+            rows['topology_segments'] = [self._topology_segment_row(segment)
+                                         for segment in topology.segments.values()]
+            for wire_item in imported_wires or []:
+                routes = getattr(wire_item, 'routed_visualization', None)
+                if routes and hasattr(wire_item, 'wid') and wire_item.wid in saved_wires:
+                    route = routes[-1].wire
+                    rows['wire_routes'].extend((wire_item.wid, position, route.id, segment.id)
+                                               for position, segment in enumerate(route.segments))
+        
+        return rows
+    
+    @staticmethod
+    def write_rows(cursor, rows: Dict[str, List[tuple]]):
+        """Insert collected rows, one executemany per table"""
+        for table in SAVE_ORDER:
+            if rows.get(table):
+                columns = TABLE_COLUMNS[table]
+                cursor.executemany(
+                    f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                    rows[table])
+    
+    @staticmethod
+    def _connector_row(connector: Connector, now: str) -> tuple:
+        return (
             connector.id,
             connector.part_number,
             connector.name,
@@ -280,32 +639,23 @@ class ProjectDatabase:
             connector.position[0] if connector.position else 0,
             connector.position[1] if connector.position else 0,
             0, # rotation
-            datetime.now().isoformat(),
-            datetime.now().isoformat()
-        ))
-        
-        # Save pins
-        for pin in connector.pins.values():
-            cursor.execute('''
-                INSERT INTO pins (
-                    id, connector_id, pin_number, original_id, wire_id
-                ) VALUES (?, ?, ?, ?, ?)
-            ''', (
-                f"{connector.id}_{pin.number}",
-                connector.id,
-                pin.number,
-                pin.number,
-                pin.wire_id
-            ))
-    
-    def _save_node(self, cursor, node):
-        """Save a topology node"""
-        cursor.execute('''
-            INSERT INTO nodes (
-                id, name, node_type, connector_id,
-                position_x, position_y, branch_type, properties
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
+            now,
+            now
+        )
+    
+    @staticmethod
+    def _pin_rows(connector: Connector) -> List[tuple]:
+        return [(
+            f"{connector.id}_{pin.number}",
+            connector.id,
+            pin.number,
+            pin.number,
+            pin.wire_id
+        ) for pin in connector.pins.values()]
+    
+    @staticmethod
+    def _node_row(node) -> tuple:
+        return (
             node.id,
             node.name,
             node.type.value if hasattr(node.type, 'value') else str(node.type),
@@ -314,17 +664,12 @@ class ProjectDatabase:
             node.position[1],
             getattr(node, 'branch_type', None),
             json.dumps(getattr(node, 'properties', {}))
-        ))
+        )
     
-    def _save_wire(self, cursor, wire: Wire):
-        """Save a wire from model"""
-        cursor.execute('''
-            INSERT INTO wires (
-                id, name, signal_name, wire_type, cross_section,
-                base_color, stripe_color, from_node_id, to_node_id,
-                from_pin, to_pin, calculated_length, part_number, notes
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
+    @staticmethod
+    def _wire_row(wire: Wire) -> tuple:
+        """Row of a wire from the model"""
+        return (
             wire.id,
             wire.id,
             wire.signal_name,
@@ -339,17 +684,12 @@ class ProjectDatabase:
             wire.calculated_length_mm,
             wire.part_number,
             wire.notes
-        ))
+        )
     
-    def _save_imported_wire(self, cursor, wire_item, wire_data, harness):
-        """Save an imported wire from graphics item"""
-        cursor.execute('''
-            INSERT INTO wires (
-                id, name, signal_name, wire_type, cross_section,
-                base_color, stripe_color, from_node_id, to_node_id,
-                from_pin, to_pin, calculated_length, part_number, notes
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
+    @staticmethod
+    def _imported_wire_row(wire_item, wire_data) -> tuple:
+        """Row of an imported wire from its graphics item"""
+        return (
             wire_item.wid,
             wire_item.wid,
             wire_data.signal_name if hasattr(wire_data, 'signal_name') else '',
@@ -361,14 +701,14 @@ class ProjectDatabase:
             f"NODE_{wire_data.to_device}",
             wire_data.from_pin,
             wire_data.to_pin,
-            0.0,
+            getattr(wire_item, 'routed_length', None) or 0.0,
             wire_data.part_number if hasattr(wire_data, 'part_number') else None,
             None
-        ))
+        )
     
-    def _save_bundle(self, cursor, bundle, harness):
-        """Save a bundle to database"""
-        # Get node IDs
+    @staticmethod
+    def _bundle_row(bundle) -> tuple:
+        # Node IDs, from the bundle or the items it is attached to
         start_node_id = None
         end_node_id = None
         
@@ -382,13 +722,7 @@ class ProjectDatabase:
         elif bundle.end_item and hasattr(bundle.end_item, 'topology_node'):
             end_node_id = bundle.end_item.topology_node.id
         
-        cursor.execute('''
-            INSERT INTO bundles (
-                id, name, start_node_id, end_node_id,
-                start_point_x, start_point_y, end_point_x, end_point_y,
-                specified_length, wire_count, auto_created
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
+        return (
             bundle.bundle_id,
             getattr(bundle, 'name', bundle.bundle_id),
             start_node_id,
@@ -400,41 +734,44 @@ class ProjectDatabase:
             bundle.specified_length,
             bundle.wire_count,
             1 if getattr(bundle, 'auto_created', False) else 0
-        ))
-        
-        # Save bundle-wire relationships
-        for wire_id in bundle.wire_ids:
-            cursor.execute('''
-                INSERT INTO bundle_wires (bundle_id, wire_id)
-                VALUES (?, ?)
-            ''', (bundle.bundle_id, wire_id))
+        )
     
-    def _save_segment(self, cursor, segment: HarnessBranch):
-        """Save a branch/segment"""
-        path_json = json.dumps(segment.path_points)
-        
+    @staticmethod
+    def _topology_node_row(project_id: str, node) -> tuple:
+        """Row of a branch point, junction or fastener of the routing graph"""
+        properties = {name: getattr(node, name) for name in TOPOLOGY_NODE_PROPERTIES
+                      if getattr(node, name, None) is not None}
+        return (
+            node.id,
+            project_id,
+            node.position[0],
+            node.position[1],
+            node.type,
+            json.dumps(properties)
+        )
+    
+    @staticmethod
+    def _topology_segment_row(segment) -> tuple:
+        bundle = getattr(segment, 'graphics_item', None)
+        return (
+            segment.id,
+            segment.start_node.id if segment.start_node else None,
+            segment.end_node.id if segment.end_node else None,
+            getattr(bundle, 'bundle_id', None),
+            getattr(segment, 'specified_length', None)
+        )
+    
+    @staticmethod
+    def _segment_row(segment: HarnessBranch) -> tuple:
+        """Row of a branch/segment"""
         nodes = segment.node_ids
-        start_node = nodes[0] if nodes else None
-        end_node = nodes[-1] if len(nodes) > 1 else None
-        
-        cursor.execute('''
-            INSERT INTO segments (
-                id, name, start_node_id, end_node_id, path_points
-            ) VALUES (?, ?, ?, ?, ?)
-        ''', (
+        return (
             segment.id,
             segment.name,
-            start_node,
-            end_node,
-            path_json
-        ))
-        
-        # Save wire-segment relationships
-        for wire_id in segment.wire_ids:
-            cursor.execute('''
-                INSERT INTO wire_segments (wire_id, segment_id)
-                VALUES (?, ?)
-            ''', (wire_id, segment.id))
+            nodes[0] if nodes else None,
+            nodes[-1] if len(nodes) > 1 else None,
+            json.dumps(segment.path_points)
+        )
     
     def load_project(self) -> Optional[WiringHarness]:
         """Load a project from database"""
@@ -457,10 +794,11 @@ class ProjectDatabase:
                 revision=info.get('revision', '1.0')
             )
             
-            # Load connectors
+            # Load connectors, pins in one query for all of them
+            pins = self._group_rows("pins", "connector_id")
             cursor.execute("SELECT * FROM connectors")
             for row in cursor.fetchall():
-                connector = self._load_connector(row)
+                connector = self._load_connector(row, pins.get(row['id'], []))
                 if connector:
                     harness.connectors[connector.id] = connector
             
@@ -479,9 +817,10 @@ class ProjectDatabase:
                     harness.wires[wire.id] = wire
             
             # Load segments
+            segment_wires = self._group_rows("wire_segments", "segment_id", "wire_id")
             cursor.execute("SELECT * FROM segments")
             for row in cursor.fetchall():
-                segment = self._load_segment(row, harness)
+                segment = self._load_segment(row, harness, segment_wires.get(row['id'], []))
                 if segment:
                     harness.branches[segment.id] = segment
             
@@ -506,15 +845,13 @@ class ProjectDatabase:
                 LEFT JOIN nodes n2 ON b.end_node_id = n2.id
             ''')
             
+            rows = cursor.fetchall()
+            bundle_wires = self._group_rows("bundle_wires", "bundle_id", "wire_id")
+            
             bundles = []
-            for row in cursor.fetchall():
+            for row in rows:
                 bundle_data = dict(row)
-                
-                # Get wire IDs for this bundle
-                cursor.execute("SELECT wire_id FROM bundle_wires WHERE bundle_id = ?", (bundle_data['id'],))
-                wire_ids = [r['wire_id'] for r in cursor.fetchall()]
-                bundle_data['wire_ids'] = wire_ids
-                
+                bundle_data['wire_ids'] = bundle_wires.get(bundle_data['id'], [])
                 bundles.append(bundle_data)
             
             print(f"Loaded {len(bundles)} bundles from database")
@@ -527,8 +864,32 @@ class ProjectDatabase:
             return []
 
     
-    def _load_connector(self, row) -> Optional[Connector]:
-        """Load a connector from database row"""
+    def load_topology(self) -> dict:
+        """Routed topology saved with the project, see topology_from_rows"""
+        rows = {}
+        for table in ('branch_points', 'topology_segments', 'wire_routes'):
+            if self.read_only and not self.has_table(table):
+                # Saved before routed topologies were kept
+                rows[table] = []
+                continue
+            cursor = self.conn.execute(f"SELECT {', '.join(TABLE_COLUMNS[table])} FROM {table} ORDER BY rowid")
+            rows[table] = [tuple(row) for row in cursor.fetchall()]
+        return topology_from_rows(rows)
+    
+    def _group_rows(self, table: str, parent_column: str, value_column: str = None) -> Dict[str, list]:
+        """
+        All rows of a child table in one query, grouped by parent id in
+        insertion order. Rows, or just value_column when given.
+        """
+        columns = value_column or '*'
+        cursor = self.conn.execute(f"SELECT {parent_column} AS parent_id, {columns} FROM {table} ORDER BY rowid")
+        grouped = {}
+        for row in cursor.fetchall():
+            grouped.setdefault(row['parent_id'], []).append(row[value_column] if value_column else row)
+        return grouped
+    
+    def _load_connector(self, row, pin_rows=None) -> Optional[Connector]:
+        """Load a connector from database row, pin_rows as grouped by load_project"""
         from model.models import Connector, Gender, SealType, ConnectorType, Pin
         
         connector = Connector(
@@ -543,10 +904,11 @@ class ProjectDatabase:
         )
         
         # Load pins
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT * FROM pins WHERE connector_id = ?", (row['id'],))
-        for pin_row in cursor.fetchall():
+        if pin_rows is None:
+            pin_rows = self.conn.execute("SELECT * FROM pins WHERE connector_id = ?", (row['id'],)).fetchall()
+        for pin_row in pin_rows:
             pin = Pin(
+                pid=pin_row['id'],
                 number=pin_row['pin_number'],
                 gender=connector.gender,
                 seal=connector.seal,
@@ -593,16 +955,16 @@ class ProjectDatabase:
         )
         return wire
     
-    def _load_segment(self, row, harness):
-        """Load a segment from database row"""
+    def _load_segment(self, row, harness, wire_ids=None):
+        """Load a segment from database row, wire_ids as grouped by load_project"""
         from model.models import HarnessBranch
         
         path_points = json.loads(row['path_points']) if row['path_points'] else []
         
         # Get wire IDs from wire_segments
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT wire_id FROM wire_segments WHERE segment_id = ?", (row['id'],))
-        wire_ids = [r['wire_id'] for r in cursor.fetchall()]
+        if wire_ids is None:
+            cursor = self.conn.execute("SELECT wire_id FROM wire_segments WHERE segment_id = ?", (row['id'],))
+            wire_ids = [r['wire_id'] for r in cursor.fetchall()]
         
         segment = HarnessBranch(
             id=row['id'],
@@ -640,6 +1002,9 @@ class ProjectDatabase:
             cursor.execute("DELETE FROM nodes")
             cursor.execute("DELETE FROM connectors")
             cursor.execute("DELETE FROM project_info")
+            cursor.execute("DELETE FROM wire_routes")
+            cursor.execute("DELETE FROM topology_segments")
+            cursor.execute("DELETE FROM branch_points")
             self.conn.commit()
             return True
         except Exception as e:
@@ -654,6 +1019,21 @@ class ProjectFileHandler:
         self.current_project = None
         self.current_path = None
         self.modified = False
+        self._saved_rows = None  # what the file at _saved_stamp holds (None: read it there), to save only changes
+        self._saved_stamp = None
+        self.bundles_data = None  # bundle rows of current_path when it was opened from its snapshot
+        self.topology_data = None  # and its routed topology, see topology_from_rows
+        self.use_snapshots = True  # keep a .snap next to the file for fast opening, see project_snapshot
+    
+    @staticmethod
+    def _file_stamp(path: str):
+        """(path, mtime, size), tells whether someone else wrote the file since we did"""
+        try:
+            stat = Path(path).stat()
+        except OSError:
+            return None
+        return (str(Path(path).resolve()), stat.st_mtime_ns, stat.st_size)
+    
     def set_name(self,name):
         self.current_project.name = name
     def new_project(self, name: str = "New Project") -> WiringHarness:
@@ -665,22 +1045,64 @@ class ProjectFileHandler:
         return self.current_project
     
     def open_project(self, filepath: str) -> Optional[WiringHarness]:
-        """Open a .ecad project file"""
-        db = ProjectDatabase(filepath)
-        self.current_project = db.load_project()
-        
-        # Also load bundles data separately if needed
-        if hasattr(self, 'bundles_data'):
-            self.bundles_data = db.load_bundles()
+        """Open a .ecad project file, from its snapshot when that is still fresh"""
+        from database.project_snapshot import load_snapshot
         
-        db.close()
+        loaded = load_snapshot(filepath) if self.use_snapshots else None
+        if loaded is not None:
+            self.current_project, self.bundles_data, self.topology_data, saved_rows = loaded
+            print(f"Opened {filepath} from its snapshot")
+        else:
+            try:
+                db = ProjectDatabase(filepath, read_only=True)
+            except sqlite3.Error as e:
+                print(f"Error opening {filepath}: {e}")
+                return None
+            self.current_project = db.load_project()
+            db.close()
+            self.bundles_data = self.topology_data = saved_rows = None
         
         if self.current_project:
             self.current_path = filepath
             self.modified = False
+            # Without a snapshot the rows are read back from the file on the
+            # first save, while it is unchanged that is the same as reading
+            # them now and keeps it off the open path
+            self._saved_rows = saved_rows
+            self._saved_stamp = self._file_stamp(filepath)
+            if loaded is None:
+                self.update_snapshot(filepath)
         
         return self.current_project
     
+    def load_bundles(self, filepath: str) -> List[dict]:
+        """Bundle rows of a project file, kept from open_project when it used the snapshot"""
+        if self.bundles_data is not None and filepath == self.current_path:
+            return self.bundles_data
+        db = ProjectDatabase(filepath, read_only=True)
+        bundles_data = db.load_bundles()
+        db.close()
+        return bundles_data
+    
+    def load_topology(self, filepath: str) -> dict:
+        """Routed topology of a project file, kept from open_project when it used the snapshot"""
+        if self.topology_data is not None and filepath == self.current_path:
+            return self.topology_data
+        db = ProjectDatabase(filepath, read_only=True)
+        topology_data = db.load_topology()
+        db.close()
+        return topology_data
+    
+    def update_snapshot(self, filepath: str):
+        """(Re)write the snapshot of a project file on a background thread"""
+        from database.project_snapshot import remove_snapshot, write_snapshot
+        
+        if not self.use_snapshots:
+            remove_snapshot(filepath)
+            return
+        threading.Thread(target=write_snapshot, args=(filepath,),
+                         name="project-snapshot", daemon=True).start()
+    
     def save_project(self, filepath: str = None, main_window=None) -> bool:
         """Save project to file - UPDATED to get bundles from main_window"""
         if not self.current_project:
@@ -697,21 +1119,34 @@ class ProjectFileHandler:
         # Get bundles and imported wires from main window
         bundles = []
         imported_wires = []
+        topology = None
         
         if main_window:
             bundles = getattr(main_window, 'bundles', [])
             imported_wires = getattr(main_window, 'imported_wire_items', [])
+            topology = getattr(main_window, 'topology_manager', None)
             print(f"Saving {len(bundles)} bundles and {len(imported_wires)} wires")
         
+        # Only the changes go out when the file still holds what we last wrote
+        previous = None
+        stamp = self._file_stamp(save_path)
         db = ProjectDatabase(save_path)
+        if stamp is not None and stamp == self._saved_stamp:
+            previous = self._saved_rows if self._saved_rows is not None else db.read_rows()
         success = db.save_project(
             self.current_project, 
             bundles=bundles, 
-            imported_wires=imported_wires
+            imported_wires=imported_wires,
+            previous=previous,
+            topology=topology
         )
         db.close()
         
         if success:
+            self._saved_rows = db.saved_rows
+            self._saved_stamp = self._file_stamp(save_path)
+            self.bundles_data = self.topology_data = None
+            self.update_snapshot(save_path)
             self.current_path = save_path
             self.modified = False
             print(f"Successfully saved to {save_path}")
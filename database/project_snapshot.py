@@ -0,0 +1,426 @@
+#database/project_snapshot
+"""
+Binary snapshot of a project file for fast opening, <file>.ecad.snap
+
+The snapshot holds the same rows as the SQLite tables, column by column:
+numbers as raw float64/int64 arrays, text as int32 indices into one
+table of interned strings. It is read in one go and the arrays are used
+straight from the file buffer, so opening a big project skips the SQL
+queries and the per-row conversions of ProjectDatabase.load_project.
+
+The .ecad file stays the only source of truth. A snapshot records the
+modification time and size of the file it was made from and is used only
+while those still match, anything else (edited elsewhere, copied, older
+schema, unreadable snapshot) opens the file the normal way.
+
+File layout: SNAPSHOT_MAGIC, header length (uint32), JSON header, then the
+arrays, each at an 8-byte aligned offset given in the header.
+"""
+
+import json
+import os
+import sqlite3
+import struct
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from database.project_db import KEY_COLUMNS, SAVE_ORDER, SCHEMA_VERSION, TABLE_COLUMNS, topology_from_rows
+
+SNAPSHOT_FORMAT = 1
+SNAPSHOT_MAGIC = b"ECADSNAP"
+SNAPSHOT_SUFFIX = ".snap"
+
+# Column kinds: text, float, integer, all NULL
+TEXT, FLOAT, INTEGER, EMPTY = "s", "f", "i", "n"
+
+# Interned strings are stored joined by this, strings containing it aren't snapshotted
+_SEPARATOR = "\x00"
+
+
+def snapshot_path(project_path) -> Path:
+    return Path(str(project_path) + SNAPSHOT_SUFFIX)
+
+
+def file_stamp(project_path) -> Optional[Tuple[int, int]]:
+    """(mtime_ns, size) of the project file, None if it doesn't exist"""
+    try:
+        stat = os.stat(project_path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def remove_snapshot(project_path):
+    try:
+        snapshot_path(project_path).unlink()
+    except OSError:
+        pass
+
+
+# ---- writing ----
+
+def write_snapshot(project_path) -> bool:
+    """
+    Snapshot the project file as it is now. Reads the file over its own
+    read-only connection, so this can run on a worker thread. False (and
+    no snapshot) when the file changed meanwhile or has values a snapshot
+    can't hold.
+    """
+    stamp = file_stamp(project_path)
+    if stamp is None:
+        return False
+    try:
+        rows = _read_tables(project_path)
+        if rows is None or file_stamp(project_path) != stamp:
+            return False
+
+        strings = {}
+        header = {'format': SNAPSHOT_FORMAT, 'schema': SCHEMA_VERSION,
+                  'stamp': list(stamp), 'tables': {}}
+        arrays = []
+        for table in SAVE_ORDER:
+            table_rows = rows[table]
+            columns = {}
+            for index, column in enumerate(TABLE_COLUMNS[table]):
+                encoded = _encode_column([row[index] for row in table_rows], strings)
+                if encoded is None:
+                    print(f"Snapshot skipped: {table}.{column} can't be stored")
+                    return False
+                kind, values, nulls = encoded
+                columns[column] = {'kind': kind, 'data': _add_array(arrays, values),
+                                   'nulls': _add_array(arrays, nulls)}
+            header['tables'][table] = {'rows': len(table_rows), 'columns': columns}
+
+        blob = _SEPARATOR.join(strings).encode('utf-8')
+        header['strings'] = {'count': len(strings),
+                             'data': _add_array(arrays, np.frombuffer(blob, dtype=np.uint8))}
+
+        target = snapshot_path(project_path)
+        temp = target.with_name(f"{target.name}.{threading.get_ident()}.tmp")
+        _write_file(temp, header, arrays)
+        if file_stamp(project_path) != stamp:
+            temp.unlink()
+            return False
+        os.replace(temp, target)
+        return True
+    except Exception as e:
+        print(f"Error writing snapshot: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def _read_tables(project_path) -> Optional[Dict[str, List[tuple]]]:
+    """Every table in rowid order, None when the file isn't on the current schema"""
+    conn = sqlite3.connect(f"file:{project_path}?mode=ro", uri=True)
+    try:
+        if conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            return None
+        return {table: conn.execute(f"SELECT {', '.join(TABLE_COLUMNS[table])} FROM {table} "
+                                    f"ORDER BY rowid").fetchall()
+                for table in SAVE_ORDER}
+    finally:
+        conn.close()
+
+
+def _encode_column(values: list, strings: Dict[str, int]):
+    """(kind, values array, null mask or None) for one column, None if it mixes types"""
+    present = [value for value in values if value is not None]
+    nulls = None
+    if len(present) != len(values):
+        nulls = np.fromiter((value is None for value in values), dtype=bool, count=len(values))
+    if not present:
+        return EMPTY, None, None
+    types = set(map(type, present))
+
+    if types == {str}:
+        indices = np.empty(len(values), dtype=np.int32)
+        for position, value in enumerate(values):
+            if value is None:
+                indices[position] = -1
+                continue
+            index = strings.get(value)
+            if index is None:
+                if _SEPARATOR in value:
+                    return None
+                index = strings[value] = len(strings)
+            indices[position] = index
+        return TEXT, indices, None
+    if types == {float}:
+        data = np.array([0.0 if value is None else value for value in values], dtype=np.float64)
+        return FLOAT, data, nulls
+    if types == {int}:
+        try:
+            data = np.array([0 if value is None else value for value in values], dtype=np.int64)
+        except OverflowError:
+            return None
+        return INTEGER, data, nulls
+    return None
+
+
+def _add_array(arrays: list, array) -> Optional[int]:
+    if array is None:
+        return None
+    arrays.append(np.ascontiguousarray(array))
+    return len(arrays) - 1
+
+
+def _write_file(path: Path, header: dict, arrays: list):
+    # Offsets are relative to the end of the header, so they can be filled in before its length is known
+    entries, offset = [], 0
+    for array in arrays:
+        entries.append([offset, array.dtype.str, int(array.size)])
+        offset += (array.nbytes + 7) // 8 * 8
+    header['arrays'] = entries
+
+    header_bytes = json.dumps(header, separators=(',', ':')).encode('utf-8')
+    header_bytes += b" " * (-(len(SNAPSHOT_MAGIC) + 4 + len(header_bytes)) % 8)
+    with open(path, 'wb') as f:
+        f.write(SNAPSHOT_MAGIC)
+        f.write(struct.pack('<I', len(header_bytes)))
+        f.write(header_bytes)
+        for array in arrays:
+            data = array.tobytes()
+            f.write(data)
+            f.write(b"\0" * (-len(data) % 8))
+
+
+# ---- reading ----
+
+def read_snapshot(project_path) -> Optional[Dict[str, Dict[str, list]]]:
+    """Columns of every table as Python lists, None when there is no fresh snapshot"""
+    path = snapshot_path(project_path)
+    try:
+        data = path.read_bytes()
+    except OSError:
+        return None
+    try:
+        if not data.startswith(SNAPSHOT_MAGIC):
+            return None
+        start = len(SNAPSHOT_MAGIC) + 4
+        (length,) = struct.unpack_from('<I', data, len(SNAPSHOT_MAGIC))
+        header = json.loads(data[start:start + length])
+        if (header.get('format') != SNAPSHOT_FORMAT or header.get('schema') != SCHEMA_VERSION
+                or tuple(header.get('stamp', ())) != file_stamp(project_path)):
+            return None
+
+        base = start + length
+        buffer = memoryview(data)
+
+        def array(index):
+            offset, dtype, size = header['arrays'][index]
+            return np.frombuffer(buffer, dtype=np.dtype(dtype), count=size, offset=base + offset)
+
+        strings_info = header['strings']
+        blob = array(strings_info['data']).tobytes().decode('utf-8')
+        strings = np.array(blob.split(_SEPARATOR) if strings_info['count'] else [], dtype=object)
+        # Index -1 (NULL) picks the None appended last
+        strings = np.append(strings, None)
+
+        tables = {}
+        for table in SAVE_ORDER:
+            info = header['tables'][table]
+            columns = {}
+            for column in TABLE_COLUMNS[table]:
+                columns[column] = _decode_column(info['columns'][column], info['rows'], array, strings)
+            tables[table] = columns
+        return tables
+    except Exception as e:
+        print(f"Ignoring unreadable snapshot {path}: {e}")
+        return None
+
+
+def _decode_column(info: dict, rows: int, array, strings) -> list:
+    kind = info['kind']
+    if kind == EMPTY:
+        return [None] * rows
+    values = array(info['data'])
+    if kind == TEXT:
+        return strings[values].tolist()
+    values = values.tolist()
+    if info['nulls'] is not None:
+        for position in np.flatnonzero(array(info['nulls'])).tolist():
+            values[position] = None
+    return values
+
+
+def table_rows(columns: Dict[str, list], table: str) -> List[tuple]:
+    return list(zip(*(columns[column] for column in TABLE_COLUMNS[table])))
+
+
+def load_snapshot(project_path):
+    """
+    (harness, bundles_data, topology_data, rows) from a fresh snapshot, the
+    same as ProjectDatabase.load_project, load_bundles, load_topology and
+    read_rows give. None
+    when there is none, the file is then opened the normal way.
+    """
+    tables = read_snapshot(project_path)
+    if tables is None:
+        return None
+    try:
+        harness = _build_harness(tables)
+        if harness is None:
+            return None
+        bundles_data = _build_bundles(tables)
+        rows = {table: {row[:KEY_COLUMNS[table]]: row for row in table_rows(tables[table], table)}
+                for table in SAVE_ORDER}
+        topology_data = topology_from_rows({table: list(rows[table].values())
+                                            for table in ('branch_points', 'topology_segments', 'wire_routes')})
+        return harness, bundles_data, topology_data, rows
+    except Exception as e:
+        print(f"Error loading snapshot, reading the project file instead: {e}")
+        import traceback
+        traceback.print_exc()
+        return None
+
+
+def _build_harness(tables):
+    """The model, built column by column like ProjectDatabase.load_project builds it row by row"""
+    import uuid
+    from model.models import (
+        WiringHarness, Connector, Pin, Node, Wire, HarnessBranch, CombinedWireColor,
+        ConnectorType, Gender, SealType, NodeType, WireType
+    )
+
+    info = dict(zip(tables['project_info']['key'], tables['project_info']['value']))
+    if not info:
+        return None
+    harness = WiringHarness(
+        id=info.get('id', str(uuid.uuid4())),
+        name=info.get('name', 'Unnamed Project'),
+        part_number=info.get('part_number', ''),
+        revision=info.get('revision', '1.0')
+    )
+
+    # Enum members and colors per distinct stored value; colors are never
+    # changed in place, wires share them as auto routing already does
+    def cached(convert, default):
+        cache = {}
+
+        def lookup(value):
+            if not value:
+                return default
+            found = cache.get(value)
+            if found is None:
+                found = cache[value] = convert(value)
+            return found
+        return lookup
+
+    gender = cached(Gender, Gender.FEMALE)
+    seal = cached(SealType, SealType.UNSEALED)
+    node_type = cached(NodeType, NodeType.CONNECTOR)
+    wire_type = cached(WireType, WireType.FLRY_B_0_5)
+    colors = {}
+
+    columns = tables['pins']
+    pins = {}
+    for pid, connector_id, number, wire_id in zip(columns['id'], columns['connector_id'],
+                                                  columns['pin_number'], columns['wire_id']):
+        pins.setdefault(connector_id, []).append((pid, number, wire_id))
+
+    columns = tables['connectors']
+    connectors = harness.connectors
+    for cid, name, part_number, manufacturer, gender_value, seal_value, x, y in zip(
+            columns['id'], columns['name'], columns['part_number'], columns['manufacturer'],
+            columns['gender'], columns['seal_type'], columns['position_x'], columns['position_y']):
+        connector = Connector(
+            id=cid,
+            name=name or part_number,
+            type=ConnectorType.OTHER,
+            gender=gender(gender_value),
+            seal=seal(seal_value),
+            part_number=part_number,
+            manufacturer=manufacturer,
+            position=(x, y)
+        )
+        connector_pins = connector.pins
+        for pid, number, wire_id in pins.get(cid, ()):
+            connector_pins[number] = Pin(pid=pid, number=number, gender=connector.gender,
+                                         seal=connector.seal, wire_id=wire_id)
+        connectors[cid] = connector
+
+    columns = tables['nodes']
+    nodes = harness.nodes
+    for nid, name, type_value, connector_id, x, y in zip(
+            columns['id'], columns['name'], columns['node_type'], columns['connector_id'],
+            columns['position_x'], columns['position_y']):
+        nodes[nid] = Node(id=nid, harness_id='', name=name, type=node_type(type_value),
+                          connector_id=connector_id, position=(x, y))
+
+    columns = tables['wires']
+    wires = harness.wires
+    harness_id = harness.id
+    for (wid, signal_name, type_value, base_color, stripe_color, from_node_id, to_node_id,
+         from_pin, to_pin, length, part_number, notes) in zip(
+            columns['id'], columns['signal_name'], columns['wire_type'], columns['base_color'],
+            columns['stripe_color'], columns['from_node_id'], columns['to_node_id'],
+            columns['from_pin'], columns['to_pin'], columns['calculated_length'],
+            columns['part_number'], columns['notes']):
+        color_key = (base_color, stripe_color)
+        color = colors.get(color_key)
+        if color is None:
+            color = colors[color_key] = CombinedWireColor(base_color=base_color or 'SW',
+                                                          stripe_color=stripe_color)
+        wires[wid] = Wire(
+            id=wid,
+            harness_id=harness_id,
+            type=wire_type(type_value),
+            color=color,
+            from_node_id=from_node_id,
+            to_node_id=to_node_id,
+            from_pin=from_pin,
+            to_pin=to_pin,
+            calculated_length_mm=length,
+            signal_name=signal_name,
+            part_number=part_number,
+            notes=notes
+        )
+
+    columns = tables['wire_segments']
+    segment_wires = {}
+    for wire_id, segment_id in zip(columns['wire_id'], columns['segment_id']):
+        segment_wires.setdefault(segment_id, []).append(wire_id)
+
+    columns = tables['segments']
+    branches = harness.branches
+    for sid, name, start_node_id, end_node_id, path_points in zip(
+            columns['id'], columns['name'], columns['start_node_id'], columns['end_node_id'],
+            columns['path_points']):
+        branches[sid] = HarnessBranch(
+            id=sid,
+            harness_id=harness_id,
+            name=name or f"Segment_{sid[:8]}",
+            protection_id=None,
+            path_points=json.loads(path_points) if path_points else [],
+            node_ids=[start_node_id, end_node_id] if start_node_id and end_node_id else [],
+            wire_ids=segment_wires.get(sid, [])
+        )
+
+    return harness
+
+
+def _build_bundles(tables) -> List[dict]:
+    """Bundle dicts as ProjectDatabase.load_bundles returns them"""
+    node_columns = tables['nodes']
+    positions = dict(zip(node_columns['id'], zip(node_columns['position_x'], node_columns['position_y'])))
+
+    columns = tables['bundle_wires']
+    bundle_wires = {}
+    for bundle_id, wire_id in zip(columns['bundle_id'], columns['wire_id']):
+        bundle_wires.setdefault(bundle_id, []).append(wire_id)
+
+    names = TABLE_COLUMNS['bundles']
+    bundles = []
+    for row in table_rows(tables['bundles'], 'bundles'):
+        bundle_data = dict(zip(names, row))
+        start_x, start_y = positions.get(bundle_data['start_node_id'], (None, None))
+        end_x, end_y = positions.get(bundle_data['end_node_id'], (None, None))
+        bundle_data.update(start_x=start_x, start_y=start_y, end_x=end_x, end_y=end_y)
+        bundle_data['wire_ids'] = bundle_wires.get(bundle_data['id'], [])
+        bundles.append(bundle_data)
+    print(f"Loaded {len(bundles)} bundles from snapshot")
+    return bundles
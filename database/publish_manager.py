@@ -6,6 +6,29 @@ from typing import List, Dict, Optional, Any
 import uuid
 import os
 from model.models import WiringHarness
+
+# Published tables with version history and their columns (besides
+# project_id), the first one identifies the entity. published_history
+# keeps rows as JSON arrays in this order.
+PUBLISHED_COLUMNS = {
+    'published_connectors': ('id', 'part_number', 'name', 'manufacturer', 'series',
+                             'gender', 'seal_type', 'position_x', 'position_y', 'rotation'),
+    'published_pins': ('id', 'connector_id', 'pin_number', 'wire_id'),
+    'published_wires': ('wid', 'wire_name', 'signal_name', 'wire_type', 'cross_section',
+                        'base_color', 'stripe_color', 'from_connector_id', 'from_pin',
+                        'to_connector_id', 'to_pin', 'length_mm', 'part_number'),
+    'published_bundles': ('bid', 'name', 'start_node_id', 'end_node_id',
+                          'start_point_x', 'start_point_y', 'end_point_x', 'end_point_y',
+                          'specified_length', 'wire_count', 'wire_ids'),
+    'published_segments': ('sid', 'name', 'start_node_id', 'end_node_id', 'path_points', 'wire_ids'),
+}
+
+# A version stores the whole project (instead of its changes) when the last
+# checkpoint is this many versions back; fetching a version replays at most
+# this many deltas
+CHECKPOINT_INTERVAL = 10
+
+
 class PublishManager:
     """Manages publishing projects to central database"""
     
@@ -45,7 +68,9 @@ class PublishManager:
             )
         ''')
         
-        # Project versions (history)
+        # Project versions (history). A row describes the version it published;
+        # rows written before published_history existed describe the version
+        # that publish replaced and have no rows to rebuild it from
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS project_versions (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -57,6 +82,10 @@ class PublishManager:
                 published_by TEXT,
                 comments TEXT,
                 file_path TEXT,
+                checkpoint INTEGER DEFAULT 0,
+                added INTEGER DEFAULT 0,
+                changed INTEGER DEFAULT 0,
+                removed INTEGER DEFAULT 0,
                 FOREIGN KEY (project_id) REFERENCES published_projects(id)
             )
         ''')
@@ -162,6 +191,34 @@ class PublishManager:
             )
         ''')
         
+        # Row changes of each version, or all its rows when it is a checkpoint
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS published_history (
+                project_id TEXT,
+                version INTEGER,
+                entity TEXT,
+                entity_id TEXT,
+                change TEXT,
+                data TEXT,
+                PRIMARY KEY (project_id, version, entity, entity_id),
+                FOREIGN KEY (project_id) REFERENCES published_projects(id)
+            )
+        ''')
+        
+        # Databases from before history was kept lack these
+        version_columns = {row[1] for row in cursor.execute("PRAGMA table_info(project_versions)")}
+        for column in ('checkpoint', 'added', 'changed', 'removed'):
+            if column not in version_columns:
+                cursor.execute(f"ALTER TABLE project_versions ADD COLUMN {column} INTEGER DEFAULT 0")
+        
+        # Changed rows are replaced by entity id
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_published_connectors_project ON published_connectors(project_id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_published_pins_connector ON published_pins(connector_id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_published_wires_project ON published_wires(project_id, wid)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_published_bundles_project ON published_bundles(project_id, bid)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_published_segments_project ON published_segments(project_id, sid)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_project_versions_project ON project_versions(project_id, version)")
+        
         self.conn.commit()
     
     def publish_project(self, harness: WiringHarness, 
@@ -172,9 +229,14 @@ class PublishManager:
                         author: str = None,
                         archive_local_file: str = None) -> bool:
         """
-        Publish a project to central database
+        Publish a project to central database as its next version.
+        Only the rows that changed since the previous version are written,
+        to the published tables and as that version's delta in
+        published_history; every CHECKPOINT_INTERVAL versions the whole
+        project is stored as a checkpoint instead.
         """
         try:
+            rows = self._collect_rows(harness, bundles, imported_wires)
             cursor = self.conn.cursor()
             
             # Check if project already exists
@@ -189,17 +251,7 @@ class PublishManager:
                 project_id = existing[0]
                 old_version = existing[1]
                 new_version = old_version + 1
-                
-                # Archive old version
-                cursor.execute('''
-                    INSERT INTO project_versions (
-                        project_id, version, revision, status,
-                        published_date, comments, file_path
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    project_id, old_version, harness.revision,
-                    status, datetime.now(), comments, archive_local_file
-                ))
+                previous = self._version_rows(cursor, project_id, old_version)
                 
                 # Update main project
                 cursor.execute('''
@@ -220,18 +272,15 @@ class PublishManager:
                     project_id
                 ))
                 
-                # Delete old components
-                cursor.execute('DELETE FROM published_wires WHERE project_id = ?', (project_id,))
-                cursor.execute('DELETE FROM published_bundles WHERE project_id = ?', (project_id,))
-                cursor.execute('DELETE FROM published_segments WHERE project_id = ?', (project_id,))
-                cursor.execute('DELETE FROM published_pins WHERE connector_id IN '
-                              '(SELECT id FROM published_connectors WHERE project_id = ?)', 
-                              (project_id,))
-                cursor.execute('DELETE FROM published_connectors WHERE project_id = ?', (project_id,))
+                if previous is None:
+                    # Published before versions were kept, start over from a checkpoint
+                    self._delete_rows(cursor, project_id)
                 
             else:
                 # New project
                 project_id = harness.id
+                new_version = 1
+                previous = None
                 cursor.execute('''
                     INSERT INTO published_projects (
                         id, name, part_number, revision, version,
@@ -246,156 +295,46 @@ class PublishManager:
                     archive_local_file, harness.name, comments
                 ))
             
-            # Publish connectors
-            conn_id_map = {} # Map old ID to new published ID
-            for conn in harness.connectors.values():
-                pub_conn_id = f"{conn.id}"
-                conn_id_map[conn.id] = pub_conn_id
-                
-                cursor.execute('''
-                    INSERT INTO published_connectors (
-                        id, project_id, part_number, name, manufacturer,
-                        series, gender, seal_type, position_x, position_y, rotation
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    pub_conn_id, project_id, conn.part_number, conn.name,
-                    conn.manufacturer, conn.series,
-                    conn.gender.value if conn.gender else None,
-                    conn.seal.value if conn.seal else None,
-                    conn.position[0], conn.position[1], 0
-                ))
-                
-                # Publish pins
-                for pin_num, pin in conn.pins.items():
-                    cursor.execute('''
-                        INSERT INTO published_pins (
-                            id, connector_id, pin_number, wire_id
-                        ) VALUES (?, ?, ?, ?)
-                    ''', (
-                        f"{pub_conn_id}_{pin_num}",
-                        pub_conn_id,
-                        pin_num,
-                        pin.wire_id
-                    ))
+            changes = self._diff_rows(previous or {}, rows)
+            self._write_changes(cursor, project_id, changes)
             
-            # Publish wires (from harness model)
-            for wire in harness.wires.values():
-                # Find which connectors this wire connects
-                from_conn_id = None
-                to_conn_id = None
-                
-                for node_id in [wire.from_node_id, wire.to_node_id]:
-                    for orig_id, pub_id in conn_id_map.items():
-                        if orig_id in node_id:
-                            if not from_conn_id:
-                                from_conn_id = pub_id
-                            else:
-                                to_conn_id = pub_id
-                
-                cursor.execute('''
-                    INSERT INTO published_wires (
-                        wid, project_id, wire_name, signal_name, wire_type,
-                        cross_section, base_color, stripe_color,
-                        from_connector_id, from_pin, to_connector_id, to_pin,
-                        length_mm, part_number
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    wire.id, project_id, wire.id, wire.signal_name,
-                    wire.type.value if wire.type else None,
-                    getattr(wire, 'cross_section', 0.5),
-                    wire.color.base_color if hasattr(wire, 'color') else 'SW',
-                    wire.color.stripe_color if hasattr(wire, 'color') else None,
-                    from_conn_id, wire.from_pin,
-                    to_conn_id, wire.to_pin,
-                    wire.calculated_length_mm,
-                    wire.part_number
-                ))
-            
-            # Publish imported wires (graphics items)
-            if imported_wires:
-                for wire_item in imported_wires:
-                    if hasattr(wire_item, 'wire_data'):
-                        wd = wire_item.wire_data
-                        color = "SW"
-                        if not isinstance(wd.color, str):
-                            if hasattr(wd.color,'code') and callable(wd.color.code):
-                                color = wd.color.code()
-                        else:
-                            color = wd.color
-
-                        cursor.execute('''
-                            INSERT OR IGNORE INTO published_wires (
-                                wid, project_id, wire_name, signal_name,
-                                cross_section, base_color,
-                                from_connector_id, from_pin, to_connector_id, to_pin,
-                                length_mm, part_number
-                            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                        ''', (
-                            wire_item.wid, project_id, wire_item.wid,
-                            wd.signal_name if hasattr(wd, 'signal_name') else '',
-                            wd.cross_section if hasattr(wd, 'cross_section') else 0.5,
-                            color,
-                            conn_id_map.get(f"CONN_{wd.from_node_id}"),
-                            wd.from_pin,
-                            conn_id_map.get(f"CONN_{wd.to_node_id}"),
-                            wd.to_pin,
-                            0.0,
-                            wd.part_number if hasattr(wd, 'part_number') else None
-                        ))
-            
-            # Publish bundles
-            if bundles:
-                for bundle in bundles:
-                    # Get connector IDs
-                    from_conn_id = None
-                    to_conn_id = None
-                    
-                    if bundle.start_node:
-                        for orig_id, pub_id in conn_id_map.items():
-                            if orig_id in str(bundle.start_node.id):
-                                from_conn_id = pub_id
-                                break
-                    
-                    if bundle.end_node:
-                        for orig_id, pub_id in conn_id_map.items():
-                            if orig_id in str(bundle.end_node.id):
-                                to_conn_id = pub_id
-                                break
-                    
-                    cursor.execute('''
-                        INSERT INTO published_bundles (
-                            bid, project_id, name,
-                            start_node_id, end_node_id,
-                            start_point_x, start_point_y,
-                            end_point_x, end_point_y,
-                            specified_length, wire_count, wire_ids
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (
-                        bundle.bundle_id, project_id,
-                        getattr(bundle, 'name', bundle.bundle_id),
-                        from_conn_id, to_conn_id,
-                        bundle.start_point.x(), bundle.start_point.y(),
-                        bundle.end_point.x(), bundle.end_point.y(),
-                        bundle.specified_length,
-                        bundle.wire_count,
-                        json.dumps(bundle.wire_ids)
-                    ))
+            cursor.execute('''
+                SELECT MAX(version) FROM project_versions WHERE project_id = ? AND checkpoint = 1
+            ''', (project_id,))
+            last_checkpoint = cursor.fetchone()[0]
+            checkpoint = (previous is None or last_checkpoint is None
+                          or new_version - last_checkpoint >= CHECKPOINT_INTERVAL)
+            if checkpoint:
+                history = [(project_id, new_version, table, entity_id, 'checkpoint', json.dumps(row))
+                           for table, table_rows in rows.items() for entity_id, row in table_rows.items()]
+            else:
+                history = [(project_id, new_version, table, entity_id, change,
+                            json.dumps(row) if row is not None else None)
+                           for change, table, entity_id, row in changes]
+            cursor.executemany('''
+                INSERT INTO published_history (
+                    project_id, version, entity, entity_id, change, data
+                ) VALUES (?, ?, ?, ?, ?, ?)
+            ''', history)
             
-            # Publish segments
-            for segment in harness.branches.values():
-                cursor.execute('''
-                    INSERT INTO published_segments (
-                        sid, project_id, name, start_node_id, end_node_id,
-                        path_points, wire_ids
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    segment.id, project_id, segment.name,
-                    None, None,
-                    json.dumps(segment.path_points),
-                    json.dumps(segment.wire_ids)
-                ))
+            counts = {change: 0 for change in ('added', 'changed', 'removed')}
+            for change, _table, _entity_id, _row in changes:
+                counts[change] += 1
+            cursor.execute('''
+                INSERT INTO project_versions (
+                    project_id, version, revision, status,
+                    published_date, published_by, comments, file_path,
+                    checkpoint, added, changed, removed
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                project_id, new_version, harness.revision, status,
+                datetime.now().isoformat(), author, comments, archive_local_file,
+                int(checkpoint), counts['added'], counts['changed'], counts['removed']
+            ))
             
             self.conn.commit()
+            print(f"Published version {new_version}: {counts['added']} added, {counts['changed']} changed, "
+                  f"{counts['removed']} removed{' (checkpoint)' if checkpoint else ''}")
             return True
             
         except Exception as e:
@@ -405,6 +344,199 @@ class PublishManager:
             self.conn.rollback()
             return False
     
+    def _collect_rows(self, harness: WiringHarness, bundles: list = None,
+                      imported_wires: list = None) -> Dict[str, Dict[str, list]]:
+        """Rows of every published table, {table: {entity id: values in PUBLISHED_COLUMNS order}}"""
+        rows = {table: {} for table in PUBLISHED_COLUMNS}
+        
+        def add(table, values):
+            # As they come back from the JSON in published_history
+            values = json.loads(json.dumps(list(values)))
+            rows[table][str(values[0])] = values
+        
+        # Publish connectors
+        conn_id_map = {} # Map old ID to new published ID
+        for conn in harness.connectors.values():
+            pub_conn_id = f"{conn.id}"
+            conn_id_map[conn.id] = pub_conn_id
+            
+            add('published_connectors', (
+                pub_conn_id, conn.part_number, conn.name,
+                conn.manufacturer, conn.series,
+                conn.gender.value if conn.gender else None,
+                conn.seal.value if conn.seal else None,
+                conn.position[0], conn.position[1], 0
+            ))
+            
+            # Publish pins
+            for pin_num, pin in conn.pins.items():
+                add('published_pins', (
+                    f"{pub_conn_id}_{pin_num}",
+                    pub_conn_id,
+                    pin_num,
+                    pin.wire_id
+                ))
+        
+        # Publish wires (from harness model)
+        for wire in harness.wires.values():
+            # Find which connectors this wire connects
+            from_conn_id = None
+            to_conn_id = None
+            
+            for node_id in [wire.from_node_id, wire.to_node_id]:
+                for orig_id, pub_id in conn_id_map.items():
+                    if orig_id in node_id:
+                        if not from_conn_id:
+                            from_conn_id = pub_id
+                        else:
+                            to_conn_id = pub_id
+            
+            add('published_wires', (
+                wire.id, wire.id, wire.signal_name,
+                wire.type.value if wire.type else None,
+                getattr(wire, 'cross_section', 0.5),
+                wire.color.base_color if hasattr(wire, 'color') else 'SW',
+                wire.color.stripe_color if hasattr(wire, 'color') else None,
+                from_conn_id, wire.from_pin,
+                to_conn_id, wire.to_pin,
+                wire.calculated_length_mm,
+                wire.part_number
+            ))
+        
+        # Publish imported wires (graphics items) not in the harness model
+        for wire_item in imported_wires or []:
+            if hasattr(wire_item, 'wire_data') and wire_item.wid not in rows['published_wires']:
+                wd = wire_item.wire_data
+                color = "SW"
+                if not isinstance(wd.color, str):
+                    if hasattr(wd.color,'code') and callable(wd.color.code):
+                        color = wd.color.code()
+                else:
+                    color = wd.color
+                
+                add('published_wires', (
+                    wire_item.wid, wire_item.wid,
+                    wd.signal_name if hasattr(wd, 'signal_name') else '',
+                    None,
+                    wd.cross_section if hasattr(wd, 'cross_section') else 0.5,
+                    color, None,
+                    conn_id_map.get(f"CONN_{wd.from_node_id}"),
+                    wd.from_pin,
+                    conn_id_map.get(f"CONN_{wd.to_node_id}"),
+                    wd.to_pin,
+                    getattr(wire_item, 'routed_length', None) or 0.0,
+                    wd.part_number if hasattr(wd, 'part_number') else None
+                ))
+        
+        # Publish bundles
+        for bundle in bundles or []:
+            # Get connector IDs
+            from_conn_id = None
+            to_conn_id = None
+            
+            if bundle.start_node:
+                for orig_id, pub_id in conn_id_map.items():
+                    if orig_id in str(bundle.start_node.id):
+                        from_conn_id = pub_id
+                        break
+            
+            if bundle.end_node:
+                for orig_id, pub_id in conn_id_map.items():
+                    if orig_id in str(bundle.end_node.id):
+                        to_conn_id = pub_id
+                        break
+            
+            add('published_bundles', (
+                bundle.bundle_id,
+                getattr(bundle, 'name', bundle.bundle_id),
+                from_conn_id, to_conn_id,
+                bundle.start_point.x(), bundle.start_point.y(),
+                bundle.end_point.x(), bundle.end_point.y(),
+                bundle.specified_length,
+                bundle.wire_count,
+                json.dumps(bundle.wire_ids)
+            ))
+        
+        # Publish segments
+        for segment in harness.branches.values():
+            add('published_segments', (
+                segment.id, segment.name,
+                None, None,
+                json.dumps(segment.path_points),
+                json.dumps(segment.wire_ids)
+            ))
+        
+        return rows
+    
+    @staticmethod
+    def _diff_rows(previous: Dict[str, Dict[str, list]], current: Dict[str, Dict[str, list]]) -> List[tuple]:
+        """(change, table, entity id, row) turning previous into current, row is None for 'removed'"""
+        changes = []
+        for table in PUBLISHED_COLUMNS:
+            old, new = previous.get(table, {}), current.get(table, {})
+            for entity_id, row in new.items():
+                if entity_id not in old:
+                    changes.append(('added', table, entity_id, row))
+                elif old[entity_id] != row:
+                    changes.append(('changed', table, entity_id, row))
+            changes.extend(('removed', table, entity_id, None) for entity_id in old if entity_id not in new)
+        return changes
+    
+    @staticmethod
+    def _write_changes(cursor, project_id: str, changes: List[tuple]):
+        """Apply changes from _diff_rows to the published tables"""
+        for table, columns in PUBLISHED_COLUMNS.items():
+            gone = [(entity_id,) for change, t, entity_id, _row in changes if t == table and change != 'added']
+            fresh = [row for change, t, _entity_id, row in changes if t == table and change != 'removed']
+            if table == 'published_pins':
+                cursor.executemany(f"DELETE FROM {table} WHERE {columns[0]} = ?", gone)
+            else:
+                cursor.executemany(f"DELETE FROM {table} WHERE project_id = ? AND {columns[0]} = ?",
+                                   [(project_id,) + key for key in gone])
+                columns = ('project_id',) + columns
+                fresh = [[project_id] + row for row in fresh]
+            cursor.executemany(
+                f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})", fresh)
+    
+    @staticmethod
+    def _delete_rows(cursor, project_id: str):
+        """Remove all published rows of a project"""
+        cursor.execute('DELETE FROM published_wires WHERE project_id = ?', (project_id,))
+        cursor.execute('DELETE FROM published_bundles WHERE project_id = ?', (project_id,))
+        cursor.execute('DELETE FROM published_segments WHERE project_id = ?', (project_id,))
+        cursor.execute('DELETE FROM published_pins WHERE connector_id IN '
+                      '(SELECT id FROM published_connectors WHERE project_id = ?)', 
+                      (project_id,))
+        cursor.execute('DELETE FROM published_connectors WHERE project_id = ?', (project_id,))
+    
+    @staticmethod
+    def _version_rows(cursor, project_id: str, version: int) -> Optional[Dict[str, Dict[str, list]]]:
+        """
+        Rows of a published version, like _collect_rows: the nearest checkpoint
+        at or before it with the deltas of the versions after applied. None
+        for versions published before history was kept.
+        """
+        cursor.execute('''
+            SELECT MAX(version) FROM project_versions
+            WHERE project_id = ? AND checkpoint = 1 AND version <= ?
+        ''', (project_id, version))
+        checkpoint = cursor.fetchone()[0]
+        if checkpoint is None:
+            return None
+        
+        rows = {table: {} for table in PUBLISHED_COLUMNS}
+        cursor.execute('''
+            SELECT entity, entity_id, change, data FROM published_history
+            WHERE project_id = ? AND version BETWEEN ? AND ?
+            ORDER BY version
+        ''', (project_id, checkpoint, version))
+        for table, entity_id, change, data in cursor.fetchall():
+            if change == 'removed':
+                rows[table].pop(entity_id, None)
+            else:
+                rows[table][entity_id] = json.loads(data)
+        return rows
+    
     def search_projects(self, status: str = None, 
                         part_number: str = None,
                         name_contains: str = None,
@@ -477,6 +609,59 @@ class PublishManager:
         
         return project_data
     
+    def get_versions(self, project_id: str) -> List[dict]:
+        """Published versions of a project, newest first
+        
+        'has_history' is false for versions published before history was kept,
+        get_project_version can't rebuild those.
+        """
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            SELECT *, version >= COALESCE(
+                (SELECT MIN(version) FROM project_versions WHERE project_id = ? AND checkpoint = 1),
+                version + 1) AS has_history
+            FROM project_versions WHERE project_id = ? ORDER BY version DESC
+        ''', (project_id, project_id))
+        return [dict(row, has_history=bool(row['has_history'])) for row in cursor.fetchall()]
+    
+    def get_project_version(self, project_id: str, version: int) -> Optional[Dict[str, Any]]:
+        """A published version of a project, shaped like get_project; None if it wasn't kept"""
+        cursor = self.conn.cursor()
+        
+        cursor.execute('SELECT * FROM published_projects WHERE id = ?', (project_id,))
+        proj_row = cursor.fetchone()
+        cursor.execute('SELECT * FROM project_versions WHERE project_id = ? AND version = ? ORDER BY id DESC',
+                       (project_id, version))
+        version_row = cursor.fetchone()
+        if not proj_row or not version_row:
+            return None
+        
+        rows = self._version_rows(cursor, project_id, version)
+        if rows is None:
+            return None
+        
+        project_data = dict(proj_row)
+        for key in ('version', 'revision', 'status', 'published_date', 'comments', 'file_path'):
+            project_data[key] = version_row[key]
+        project_data['author'] = version_row['published_by']
+        
+        for key, table in (('connectors', 'published_connectors'), ('pins', 'published_pins'),
+                           ('wires', 'published_wires'), ('bundles', 'published_bundles'),
+                           ('segments', 'published_segments')):
+            columns = PUBLISHED_COLUMNS[table]
+            entities = []
+            for row in rows[table].values():
+                entity = dict(zip(columns, row))
+                if columns[0] != 'id':
+                    # No row id outside the live tables, the entity id stands in for it
+                    entity['id'] = entity[columns[0]]
+                if table != 'published_pins':
+                    entity['project_id'] = project_id
+                entities.append(entity)
+            project_data[key] = entities
+        
+        return project_data
+    
     def close(self):
         """Close database connection"""
         if self.conn:
@@ -66,6 +66,10 @@ class SettingsDialog(QDialog):
         self.autosave_interval.setSpecialValueText("Disabled")
         autosave_layout.addRow("Interval:", self.autosave_interval)
         
+        self.autosave_generations = QSpinBox()
+        self.autosave_generations.setRange(1, 20)
+        autosave_layout.addRow("Keep:", self.autosave_generations)
+        
         self.autosave_path_display = QLineEdit()
         self.autosave_path_display.setReadOnly(True)
         autosave_layout.addRow("Path:", self.autosave_path_display)
@@ -377,6 +381,7 @@ class SettingsDialog(QDialog):
         """Load current settings into UI"""
         # General
         self.autosave_interval.setValue(self.settings.autosave_interval)
+        self.autosave_generations.setValue(self.settings.autosave_generations)
         self.autosave_path_display.setText(self.settings.autosave_path)
         self.undo_limit.setValue(self.settings.undo_limit)
         self.max_recent.setValue(self.settings.max_recent_files)
@@ -431,6 +436,7 @@ class SettingsDialog(QDialog):
         """Apply settings from UI to settings object"""
         # General
         self.settings.autosave_interval = self.autosave_interval.value()
+        self.settings.autosave_generations = self.autosave_generations.value()
         self.settings.undo_limit = self.undo_limit.value()
         self.settings.max_recent_files = self.max_recent.value()
         
@@ -24,6 +24,7 @@ class BundleItem(QGraphicsPathItem):
         self.node_type = "Bundle"
         self.length = 0.0
         self.specified_length = None  # User-specified length override
+        self.max_diameter = None  # Outer diameter limit (mm) for capacity routing, None = project default
         self.wire_count = 0
         self.wire_ids = []  # Wires assigned to this bundle
         self.broken = broken
@@ -189,6 +190,8 @@ class BundleItem(QGraphicsPathItem):
         """Set user-specified length override"""
         self.specified_length = length
         self.update_label_text()
+        if self.main_window and hasattr(self.main_window, 'topology_manager'):
+            self.main_window.topology_manager.bundle_changed(self)
     
     def assign_wire(self, wire_id: str):
         """Assign a wire to this bundle"""
@@ -16,7 +16,10 @@ class BundleToolbar(QToolBar):
     def route_wires_through_bundles(self):
         """Route wires through drawn bundles"""
         from utils.bundle_router import BundleRouter
+        from controllers.project_controller import ProjectController
         
+        # Every wire of the project, the ones a viewport-first open hasn't created yet too
+        ProjectController.finish_loading(self.main_window)
         router = BundleRouter(self.main_window)
         router.route_wires_through_bundles()
 
@@ -220,5 +223,6 @@ class BundleToolbar(QToolBar):
                     if bundle.scene():
                         self.main_window.scene.removeItem(bundle)
                 self.main_window.bundles.clear()
+                self.main_window.topology_manager.clear_bundle_index()
             
             self.main_window.statusBar().showMessage("All bundles cleared", 2000)
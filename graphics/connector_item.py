@@ -100,8 +100,11 @@ class ConnectorItem(QGraphicsRectItem):
             # print("no topology node")
             return
         
-        # Find all bundles connected to this node
-        if hasattr(self.main_window, 'bundles'):
+        # Bundles connected to this node come from the node index
+        if self.topology_manager:
+            for bundle in list(self.topology_manager.bundles_at(self.topology_node)):
+                bundle.update_position_from_nodes()
+        elif hasattr(self.main_window, 'bundles'):
             for bundle in self.main_window.bundles:
                 if bundle.start_node == self.topology_node or bundle.end_node == self.topology_node:
                     bundle.update_position_from_nodes()
@@ -147,7 +150,7 @@ class ConnectorItem(QGraphicsRectItem):
                 self.model.id, 
                 (self.pos().x(), self.pos().y())
             )
-            self.topology_manager.nodes[self.topology_node.id] = self.topology_node
+            self.topology_manager.add_node(self.topology_node)
             
     def get_pin_scene_positions(self):
         """Get scene positions of all pins"""
@@ -175,7 +178,10 @@ class ConnectorItem(QGraphicsRectItem):
                 # self.info_table.update_table()
             # Update topology node position
             if self.topology_node:
-                self.topology_node.position = (self.pos().x(), self.pos().y())
+                if self.topology_manager:
+                    self.topology_manager.move_node(self.topology_node, (self.pos().x(), self.pos().y()))
+                else:
+                    self.topology_node.position = (self.pos().x(), self.pos().y())
             self.model.position = [self.pos().x(),self.pos().y()]
             # Update pins
             for pin in self.pins:
@@ -237,17 +243,16 @@ class ConnectorItem(QGraphicsRectItem):
         if not self.topology_node or not self.topology_manager:
             return
             
-        # Find all segments connected to this node
-        for segment_id, segment in list(self.topology_manager.segments.items()):
-            if segment.start_node == self.topology_node or segment.end_node == self.topology_node:
-                # Update segment graphics if it exists
-                if hasattr(segment, 'graphics_item'):
-                    segment.graphics_item.update_path()
-                    
-                # Update any wires in this segment
-                for wire in segment.wires:
-                    if hasattr(wire, 'graphics_item'):
-                        wire.graphics_item.update_path()
+        # Segments connected to this node come straight from the adjacency index
+        for segment in list(self.topology_manager.segments_at(self.topology_node)):
+            # Update segment graphics if it exists
+            if hasattr(segment, 'graphics_item'):
+                segment.graphics_item.update_path()
+                
+            # Update any wires in this segment
+            for wire in segment.wires:
+                if hasattr(wire, 'graphics_item'):
+                    wire.graphics_item.update_path()
     
     def rotate_90(self):
         """Rotate connector by 90 degrees"""
@@ -6,4 +6,5 @@ from PyQt5.QtGui import QPainterPath,QPen, QColor, QPainter
 class SegmentGraphicsItem(QGraphicsPathItem):
     def __init__(self, segment, topology_manager=None,broken = False):
         super().__init__()
-        pass
\ No newline at end of file
+        self.segment = segment
+        self.topology_manager = topology_manager
\ No newline at end of file
@@ -36,7 +36,11 @@ class JunctionGraphicsItem(QGraphicsEllipseItem):
         
         self._updating = True
         try:
-            if hasattr(self.main_window, 'bundles'):
+            manager = getattr(getattr(self, 'main_window', None), 'topology_manager', None)
+            if manager:
+                for bundle in list(manager.bundles_at(self.junction_node)):
+                    bundle.update_position_from_nodes()
+            elif hasattr(getattr(self, 'main_window', None), 'bundles'):
                 for bundle in self.main_window.bundles:
                     if bundle.start_node == self.junction_node or bundle.end_node == self.junction_node:
                         bundle.update_position_from_nodes()
@@ -76,7 +80,11 @@ class JunctionGraphicsItem(QGraphicsEllipseItem):
     def itemChange(self, change, value):
         if change == self.ItemPositionHasChanged:
             # Update node position
-            self.junction_node.position = (self.pos().x(), self.pos().y())
+            manager = getattr(getattr(self, 'main_window', None), 'topology_manager', None)
+            if manager:
+                manager.move_node(self.junction_node, (self.pos().x(), self.pos().y()))
+            else:
+                self.junction_node.position = (self.pos().x(), self.pos().y())
             
             # Update connected segments
             for segment in self.junction_node.connected_segments:
@@ -129,7 +137,11 @@ class BranchPointGraphicsItem(QGraphicsEllipseItem):
         
         self._updating = True
         try:
-            if hasattr(self.main_window, 'bundles'):
+            manager = getattr(getattr(self, 'main_window', None), 'topology_manager', None)
+            if manager:
+                for bundle in list(manager.bundles_at(self.branch_node)):
+                    bundle.update_position_from_nodes()
+            elif hasattr(getattr(self, 'main_window', None), 'bundles'):
                 for bundle in self.main_window.bundles:
                     if bundle.start_node == self.branch_node or bundle.end_node == self.branch_node:
                         bundle.update_position_from_nodes()
@@ -138,7 +150,11 @@ class BranchPointGraphicsItem(QGraphicsEllipseItem):
     
     def itemChange(self, change, value):
         if change == self.ItemPositionHasChanged:
-            self.branch_node.position = (self.pos().x(), self.pos().y())
+            manager = getattr(getattr(self, 'main_window', None), 'topology_manager', None)
+            if manager:
+                manager.move_node(self.branch_node, (self.pos().x(), self.pos().y()))
+            else:
+                self.branch_node.position = (self.pos().x(), self.pos().y())
             
             # Update connected segments
             for segment in self.branch_node.connected_segments:
@@ -186,7 +202,11 @@ class BranchPointGraphicsItem(QGraphicsEllipseItem):
 
     def itemChange(self, change, value):
         if change == self.ItemPositionHasChanged:
-            self.branch_node.position = (self.pos().x(), self.pos().y())
+            manager = getattr(getattr(self, 'main_window', None), 'topology_manager', None)
+            if manager:
+                manager.move_node(self.branch_node, (self.pos().x(), self.pos().y()))
+            else:
+                self.branch_node.position = (self.pos().x(), self.pos().y())
             for segment in self.branch_node.connected_segments:
                 if hasattr(segment, 'graphics_item'):
                     segment.graphics_item.update_path()
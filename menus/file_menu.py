@@ -56,6 +56,10 @@ class FileMenu:
         open_from_db_action.triggered.connect(self.main_window.open_from_database)
         self.menu.addAction(open_from_db_action)
         
+        open_archived_action = QAction("Open Archived Version...", self.main_window)
+        open_archived_action.triggered.connect(self.main_window.open_archived_version)
+        self.menu.addAction(open_archived_action)
+        
         self.menu.addSeparator()
         
         # Recent files
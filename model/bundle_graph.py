@@ -0,0 +1,147 @@
+#model/bundle_graph
+from typing import Dict, Tuple
+import math
+
+from model.topology_journal import NODE, BUNDLE, TOPOLOGY, MOVE
+
+
+def bundle_length(bundle) -> float:
+    """Routing length of a bundle: specified length if set, drawn length otherwise"""
+    if bundle.specified_length is not None:
+        return float(bundle.specified_length)
+    if bundle.length:
+        return bundle.length
+    return node_distance(bundle.start_node, bundle.end_node)
+
+
+def node_distance(node1, node2) -> float:
+    if node1 is None or node2 is None:
+        return 0.0
+    return math.hypot(node1.position[0] - node2.position[0], node1.position[1] - node2.position[1])
+
+
+class BundleGraph:
+    """
+    Session-long routing graph over the indexed bundles: {node: {neighbor: bundle}},
+    keeping the shortest bundle where several connect the same two nodes.
+
+    Follows the TopologyManager journal like TopologyArrays, but never rebuilds
+    for a bundle event: only the node pairs the bundle left or joined are
+    refreshed, so a bundle command costs O(bundles on that pair). Node moves
+    refresh the pairs around the moved node. Only a journal gap or a bulk
+    clear rebuilds from the bundle index.
+
+    revision is bumped whenever the adjacency changes, route caches key on it
+    (segments added by routing bump the topology version, not the revision).
+    """
+
+    def __init__(self, manager):
+        self.manager = manager
+        self.version = -1
+        self.revision = 0
+        self.adjacency: Dict[object, Dict[object, object]] = {}
+        self._placed: Dict[str, Tuple[object, object]] = {}  # bundle id -> nodes it was filed under
+        # Lower bound of length / straight distance over all bundles. It only
+        # tightens between rebuilds: a lower scale keeps A* admissible.
+        self.heuristic_scale = 1.0
+
+    # ---- mapping access used by the searches ----
+
+    def get(self, node, default=None):
+        return self.adjacency.get(node, default)
+
+    def __contains__(self, node) -> bool:
+        return node in self.adjacency
+
+    def __len__(self) -> int:
+        return len(self.adjacency)
+
+    # ---- sync ----
+
+    def sync(self):
+        """Bring the graph up to date with the manager's bundle index"""
+        manager = self.manager
+        if self.version == manager.version:
+            return self
+        changes = manager.changes_since(self.version) if self.version >= 0 else None
+        if changes is None or any(change.kind == TOPOLOGY for change in changes):
+            return self.rebuild()
+
+        for change in changes:
+            if change.kind == BUNDLE:
+                self._refresh_bundle(change.entity_id, change.node_ids)
+            elif change.kind == NODE and change.action == MOVE:
+                node = manager.nodes.get(change.entity_id)
+                if node is not None:
+                    for bundle in list(manager.bundles_at(node)):
+                        self._refresh_pair(bundle.start_node, bundle.end_node)
+        self.version = manager.version
+        return self
+
+    def rebuild(self):
+        """Rebuild the whole graph from the bundle index"""
+        self.adjacency = {}
+        self._placed = {}
+        self.heuristic_scale = 1.0
+        for bundle in self.manager.pair_index.all_bundles():
+            self._place(bundle)
+        self.revision += 1
+        self.version = self.manager.version
+        return self
+
+    def _refresh_bundle(self, bundle_id, node_ids):
+        """A bundle was added, removed, re-filed or changed length"""
+        old = self._placed.pop(bundle_id, None)
+        if old is not None:
+            self._refresh_pair(*old)
+        if len(node_ids) == 2:
+            entries = self.manager.pair_index.bundles_between_ids(*node_ids)
+            bundle = next((entry for entry in entries if entry.bundle_id == bundle_id), None)
+            if bundle is not None:
+                self._placed[bundle_id] = (bundle.start_node, bundle.end_node)
+                self._refresh_pair(bundle.start_node, bundle.end_node)
+
+    def _refresh_pair(self, node_a, node_b):
+        """Re-pick the shortest bundle between two nodes, dropping the edge if none is left"""
+        if node_a is None or node_b is None:
+            return
+        best = self.manager.bundle_between(node_a, node_b, key=bundle_length)
+        current = self.adjacency.get(node_a, {}).get(node_b)
+        if best is current:
+            if best is not None:
+                self._tighten_scale(best)
+            return
+        if best is None:
+            self._unlink(node_a, node_b)
+            self._unlink(node_b, node_a)
+        else:
+            self._link(node_a, node_b, best)
+        self.revision += 1
+
+    def _place(self, bundle):
+        """Rebuild helper, same choice as _refresh_pair without the index lookup"""
+        start, end = bundle.start_node, bundle.end_node
+        if start is None or end is None:
+            return
+        self._placed[bundle.bundle_id] = (start, end)
+        existing = self.adjacency.get(start, {}).get(end)
+        if existing is not None and bundle_length(existing) <= bundle_length(bundle):
+            return
+        self._link(start, end, bundle)
+
+    def _link(self, node_a, node_b, bundle):
+        self.adjacency.setdefault(node_a, {})[node_b] = bundle
+        self.adjacency.setdefault(node_b, {})[node_a] = bundle
+        self._tighten_scale(bundle)
+
+    def _unlink(self, node, neighbor):
+        around = self.adjacency.get(node)
+        if around is not None:
+            around.pop(neighbor, None)
+            if not around:
+                del self.adjacency[node]
+
+    def _tighten_scale(self, bundle):
+        distance = node_distance(bundle.start_node, bundle.end_node)
+        if distance > 0:
+            self.heuristic_scale = max(min(self.heuristic_scale, bundle_length(bundle) / distance), 0.0)
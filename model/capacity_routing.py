@@ -0,0 +1,307 @@
+#model/capacity_routing
+from typing import Dict, List, Optional, Tuple
+import heapq
+import math
+import numpy as np
+
+from model.parallel_routing import route_plain
+
+# Cross-section (mm²) assumed for wires that don't have one, same as the project files
+DEFAULT_CROSS_SECTION = 0.5
+
+# Share of a bundle's cross-sectional area that is copper; the rest is
+# insulation, gaps between round wires and tape
+BUNDLE_FILL_FACTOR = 0.5
+
+# Negotiated congestion (rip-up and reroute) parameters
+CAPACITY_ITERATIONS = 30
+PRESENT_FACTOR = 1.0  # a bundle that would overflow costs (1 + this) times its length
+PRESENT_GROWTH = 1.5  # present penalty grows by this every iteration
+HISTORY_FACTOR = 0.5  # bundles that keep overflowing get more expensive for good
+SEARCH_ROUNDS = 4  # searches per source in one iteration before wires are forced onto their path
+STALL_ITERATIONS = 4  # stop after this many iterations without less overflow
+
+
+def capacity_from_diameter(diameter: float) -> float:
+    """Copper cross-section (mm²) that fits in a bundle of the given outer diameter (mm)"""
+    return BUNDLE_FILL_FACTOR * math.pi * diameter * diameter / 4.0
+
+
+def route_with_capacity(edges: List[tuple], capacities: List[Optional[float]],
+                        wires: List[Tuple[str, str, float]], weighted: bool,
+                        workers: int = 0, iterations: int = CAPACITY_ITERATIONS) -> dict:
+    """
+    Route wires over plain graph data so no bundle carries more copper than
+    its capacity, where that can be avoided.
+
+    edges are (edge id, node id, node id, length), capacities the copper
+    cross-section each edge takes (None for unlimited), wires are (from node
+    id, to node id, cross-section).
+
+    Starts from the plain shortest paths and then runs negotiated congestion
+    routing: every iteration just enough wires to clear each overflowing
+    bundle are ripped up and rerouted with overflow priced in, and bundles
+    that stay overflowed pick up a permanent history cost. Loads, overflow and edge
+    costs are NumPy columns updated in one go per iteration, the searches
+    themselves run once per source node, not per wire.
+
+    Returns {'paths': {wire index: [edge ids]}, 'load': {edge id: mm²},
+    'overflow': {edge id: excess mm²}, 'iterations': n}. Wires without any
+    path are missing from 'paths'.
+    """
+    solver = _CapacitySolver(edges, capacities, weighted)
+    legs: List[Tuple[str, str]] = []
+    leg_index: Dict[Tuple[str, str], int] = {}
+    wire_leg = []
+    for start, end, _ in wires:
+        key = (start, end)
+        if key not in leg_index:
+            leg_index[key] = len(legs)
+            legs.append(key)
+        wire_leg.append(leg_index[key])
+
+    # Uncapacitated start, identical to what plain routing would do
+    resolved = route_plain(edges, legs, weighted, workers)
+    demand = np.array([cross_section or DEFAULT_CROSS_SECTION for _, _, cross_section in wires],
+                      dtype=np.float64)
+    paths: Dict[int, List[int]] = {}
+    for wire_index, leg in enumerate(wire_leg):
+        if leg in resolved and resolved[leg][0]:
+            paths[wire_index] = [solver.edge_index[edge_id] for edge_id in resolved[leg][0]]
+
+    done = solver.negotiate(paths, demand, [legs[leg] for leg in wire_leg], iterations)
+    load = solver.load(paths, demand)
+    overflow = load - solver.capacity
+    return {
+        'paths': {wire_index: [solver.edge_ids[e] for e in path] for wire_index, path in paths.items()},
+        'load': {solver.edge_ids[e]: float(load[e]) for e in np.flatnonzero(load)},
+        'overflow': {solver.edge_ids[e]: float(overflow[e]) for e in np.flatnonzero(overflow > 1e-9)},
+        'iterations': done
+    }
+
+
+class _CapacitySolver:
+    """Edge columns and adjacency behind route_with_capacity"""
+
+    def __init__(self, edges, capacities, weighted):
+        self.edge_ids = [edge[0] for edge in edges]
+        self.edge_index = {edge_id: e for e, edge_id in enumerate(self.edge_ids)}
+        self.lengths = np.array([length if weighted else 1.0 for _, _, _, length in edges],
+                                dtype=np.float64).reshape(-1)
+        self.capacity = np.array([math.inf if cap is None or cap <= 0 else cap for cap in capacities],
+                                 dtype=np.float64).reshape(-1)
+        self.history = np.zeros(len(edges), dtype=np.float64)
+
+        self.node_order: Dict[str, int] = {}
+        self.adjacency: Dict[str, List[Tuple[str, int]]] = {}
+        for e, (_, a, b, _) in enumerate(edges):
+            for node_id in (a, b):
+                if node_id not in self.node_order:
+                    self.node_order[node_id] = len(self.node_order)
+                    self.adjacency[node_id] = []
+            self.adjacency[a].append((b, e))
+            if a != b:
+                self.adjacency[b].append((a, e))
+        self.node_ids = list(self.node_order)
+        self.rows = [[(self.node_order[neighbor], e) for neighbor, e in self.adjacency[node_id]]
+                     for node_id in self.node_ids]
+        # Every path across a bridge uses it, rerouting can't relieve those
+        self.bridges = np.zeros(len(edges), dtype=bool)
+        self.bridges[self._bridges()] = True
+
+    def _bridges(self) -> List[int]:
+        """Edges whose removal disconnects the graph (iterative Tarjan)"""
+        index: Dict[str, int] = {}
+        low: Dict[str, int] = {}
+        bridges = []
+        for root in self.adjacency:
+            if root in index:
+                continue
+            index[root] = low[root] = len(index)
+            stack = [(root, -1, iter(self.adjacency[root]))]
+            while stack:
+                node, via, neighbors = stack[-1]
+                advanced = False
+                for neighbor, e in neighbors:
+                    if e == via:
+                        continue
+                    if neighbor in index:
+                        low[node] = min(low[node], index[neighbor])
+                    else:
+                        index[neighbor] = low[neighbor] = len(index)
+                        stack.append((neighbor, e, iter(self.adjacency[neighbor])))
+                        advanced = True
+                        break
+                if advanced:
+                    continue
+                stack.pop()
+                if stack:
+                    parent = stack[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                    if low[node] > index[parent]:
+                        bridges.append(via)
+        return bridges
+
+    def load(self, paths: Dict[int, List[int]], demand: np.ndarray) -> np.ndarray:
+        """Copper per edge, summed over all routed wires in one bincount"""
+        if not paths:
+            return np.zeros(len(self.edge_ids), dtype=np.float64)
+        wire_rows = np.fromiter((w for w, path in paths.items() for _ in path), dtype=np.int64)
+        edge_rows = np.fromiter((e for path in paths.values() for e in path), dtype=np.int64)
+        return np.bincount(edge_rows, weights=demand[wire_rows], minlength=len(self.edge_ids))
+
+    def negotiate(self, paths, demand, wire_ends, iterations) -> int:
+        """Rip up and reroute until nothing overflows (or nothing improves), returns iterations run"""
+        # Only bundles with a capacity and a way around them can be relieved
+        fixable = np.isfinite(self.capacity) & ~self.bridges
+        if not fixable.any() or not paths:
+            return 0
+
+        best_paths = dict(paths)
+        load = self.load(paths, demand)
+        best_overflow = self._overflow(load, fixable)
+        present = PRESENT_FACTOR
+        stalled = 0
+        done = 0
+        for done in range(1, iterations + 1):
+            excess = load - self.capacity
+            congested = (excess > 1e-9) & fixable
+            if not congested.any() or stalled >= STALL_ITERATIONS:
+                break
+            ratio = np.zeros_like(excess)
+            ratio[congested] = excess[congested] / self.capacity[congested]
+            self.history += HISTORY_FACTOR * np.minimum(ratio, 1.0)
+            base = (self.lengths * (1.0 + self.history)).tolist()
+
+            ripped = self._rip_up(paths, demand, excess, congested)
+            for w in ripped:
+                del paths[w]
+            load = self.load(paths, demand)
+
+            by_source: Dict[str, List[int]] = {}
+            for w in ripped:
+                by_source.setdefault(wire_ends[w][0], []).append(w)
+            load_list = load.tolist()
+            capacity = self.capacity.tolist()
+            for source in sorted(by_source, key=self.node_order.get):
+                self._reroute_source(source, by_source[source], paths, demand, wire_ends,
+                                     base, load_list, capacity, present)
+            load = np.array(load_list, dtype=np.float64)
+
+            total_overflow = self._overflow(load, fixable)
+            if total_overflow < best_overflow - 1e-9:
+                best_overflow = total_overflow
+                best_paths = dict(paths)
+                stalled = 0
+            else:
+                stalled += 1
+            present *= PRESENT_GROWTH
+
+        if self._overflow(load, fixable) > best_overflow + 1e-9:
+            paths.clear()
+            paths.update(best_paths)
+        return done
+
+    @staticmethod
+    def _rip_up(paths, demand, excess, congested) -> List[int]:
+        """Wires to reroute: per overflowing bundle the biggest ones until its excess is covered"""
+        through: Dict[int, List[int]] = {}
+        for w, path in paths.items():
+            for e in path:
+                if congested[e]:
+                    through.setdefault(e, []).append(w)
+        ripped = set()
+        for e in sorted(through):
+            still = excess[e] - sum(demand[w] for w in through[e] if w in ripped)
+            for w in sorted(through[e], key=lambda w: (-demand[w], w)):
+                if still <= 1e-9:
+                    break
+                if w not in ripped:
+                    ripped.add(w)
+                    still -= demand[w]
+        return sorted(ripped)
+
+    def _overflow(self, load, fixable) -> float:
+        """Summed copper above capacity on the bundles rerouting can relieve"""
+        return float(np.maximum(load[fixable] - self.capacity[fixable], 0.0).sum())
+
+    def _reroute_source(self, source, wires, paths, demand, wire_ends, base, load, capacity, present):
+        """Reroute the ripped wires of one source, one search covers all their targets"""
+        pending = wires
+        for round_ in range(SEARCH_ROUNDS):
+            if not pending:
+                return
+            smallest = min(demand[w] for w in pending)
+            parents = self._search(source, {wire_ends[w][1] for w in pending}, smallest,
+                                   base, load, capacity, present)
+            last_round = round_ == SEARCH_ROUNDS - 1
+            left = []
+            # Biggest wires first, they are the hardest to fit
+            for w in sorted(pending, key=lambda w: (-demand[w], w)):
+                target = wire_ends[w][1]
+                if target not in parents:
+                    continue  # unreachable, stays unrouted
+                path = _walk(parents, target)
+                residual = min((capacity[e] - load[e] for e in path), default=math.inf)
+                if residual + 1e-9 < demand[w] and not last_round:
+                    left.append(w)
+                    continue
+                paths[w] = path
+                for e in path:
+                    load[e] += demand[w]
+            if len(left) == len(pending):
+                # Nothing fitted, the loads didn't change so neither would the next search
+                for w in left:
+                    path = _walk(parents, wire_ends[w][1])
+                    paths[w] = path
+                    for e in path:
+                        load[e] += demand[w]
+                return
+            pending = left
+
+    def _search(self, source, targets, wire_demand, base, load, capacity, present):
+        """Dijkstra from source with overflow priced in, until every target is settled.
+        Runs on node rows (plain lists) rather than ids, it is the hot loop."""
+        order = self.node_order
+        adjacency = self.rows
+        count = len(adjacency)
+        dist = [math.inf] * count
+        parents = [None] * count
+        settled = [False] * count
+        start = order[source]
+        remaining = {order[target] for target in targets if target in order}
+        remaining.discard(start)
+        dist[start] = 0.0
+        heap = [(0.0, start)]
+        while heap and remaining:
+            current_dist, current = heapq.heappop(heap)
+            if settled[current]:
+                continue
+            settled[current] = True
+            remaining.discard(current)
+            for neighbor, e in adjacency[current]:
+                if settled[neighbor]:
+                    continue
+                cost = base[e]
+                if load[e] + wire_demand > capacity[e]:
+                    cost *= 1.0 + present
+                candidate = current_dist + cost
+                if candidate < dist[neighbor]:
+                    dist[neighbor] = candidate
+                    parents[neighbor] = (current, e)
+                    heapq.heappush(heap, (candidate, neighbor))
+        node_ids = self.node_ids
+        found = {source: None}
+        for row in range(count):
+            if settled[row] and parents[row] is not None:
+                found[node_ids[row]] = (node_ids[parents[row][0]], parents[row][1])
+        return found
+
+
+def _walk(parents, node) -> List[int]:
+    path = []
+    while parents[node] is not None:
+        node, e = parents[node]
+        path.append(e)
+    path.reverse()
+    return path
@@ -0,0 +1,219 @@
+#model/harness_json
+"""
+Streaming JSON for WiringHarness.save_to_file / load_from_file
+
+The document is the same as json.dump(harness.to_dict()) writes, so either
+side can read what the other wrote. Writing goes entity by entity instead
+of building the whole to_dict() tree first. Reading takes the file in
+chunks and builds each connector, wire, branch, ... as soon as its record
+is complete, only one record is held as plain dicts at a time.
+
+Files are gzip compressed when the name ends in .gz (or compress=True),
+reading recognizes gzip by its magic bytes whatever the name.
+"""
+import gzip
+import json
+from datetime import datetime
+from typing import Iterator, Optional, TextIO
+
+# Characters read per chunk
+READ_CHUNK = 1 << 20
+
+# Entities written per write() call
+WRITE_BATCH = 512
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+# Top-level scalar fields, in to_dict order
+HEADER_FIELDS = ('id', 'name', 'part_number', 'revision', 'created_date', 'modified_date')
+
+
+def _sections():
+    """(key, entity class) of the harness dicts, in to_dict order"""
+    from model.models import Connector, Wire, HarnessBranch, BranchProtection, Node
+    return (('connectors', Connector), ('wires', Wire), ('branches', HarnessBranch),
+            ('protections', BranchProtection), ('nodes', Node))
+
+
+# ---- writing ----
+
+def write_harness_file(harness, filename: str, compact: bool = False, compress: Optional[bool] = None):
+    """Write harness to filename, indented like json.dump(indent=2) unless compact"""
+    if compress is None:
+        compress = str(filename).endswith('.gz')
+    if compress:
+        f = gzip.open(filename, 'wt', encoding='utf-8', compresslevel=6)
+    else:
+        f = open(filename, 'w', encoding='utf-8')
+    with f:
+        write_harness(harness, f, compact)
+
+
+def write_harness(harness, f: TextIO, compact: bool = False):
+    """Stream harness to an open text file, one entity at a time"""
+    if compact:
+        sep, key_sep, open_, close = ',', ':', '{', '}'
+
+        def dumps(value, level):
+            return json.dumps(value, separators=(',', ':'))
+
+        def pad(level):
+            return ''
+    else:
+        # What json.dump(indent=2) writes for the whole tree
+        sep, key_sep, open_, close = ',\n', ': ', '{\n', '\n}'
+
+        def dumps(value, level):
+            return json.dumps(value, indent=2).replace('\n', '\n' + pad(level))
+
+        def pad(level):
+            return '  ' * level
+
+    header = {
+        'id': harness.id,
+        'name': harness.name,
+        'part_number': harness.part_number,
+        'revision': harness.revision,
+        'created_date': harness.created_date.isoformat(),
+        'modified_date': harness.modified_date.isoformat(),
+    }
+    f.write(open_ + sep.join(f"{pad(1)}{json.dumps(key)}{key_sep}{dumps(value, 1)}"
+                             for key, value in header.items()))
+
+    for key, _cls in _sections():
+        entities = getattr(harness, key)
+        f.write(f"{sep}{pad(1)}{json.dumps(key)}{key_sep}")
+        if not entities:
+            f.write('{}')
+            continue
+        f.write(open_)
+        batch = []
+        for count, (entity_key, entity) in enumerate(entities.items(), 1):
+            batch.append(f"{pad(2)}{json.dumps(entity_key)}{key_sep}{dumps(entity.to_dict(), 2)}")
+            if len(batch) >= WRITE_BATCH or count == len(entities):
+                f.write(sep.join(batch) + (sep if count < len(entities) else ''))
+                batch = []
+        f.write(close.replace('}', pad(1) + '}'))
+    f.write(close)
+
+
+# ---- reading ----
+
+def read_harness_file(filename: str, harness_cls=None):
+    """Read a harness written by write_harness_file or json.dump(to_dict()), plain or gzip"""
+    with open(filename, 'rb') as probe:
+        compressed = probe.read(2) == GZIP_MAGIC
+    if compressed:
+        f = gzip.open(filename, 'rt', encoding='utf-8')
+    else:
+        f = open(filename, 'r', encoding='utf-8')
+    with f:
+        return read_harness(f, harness_cls)
+
+
+def read_harness(f: TextIO, harness_cls=None):
+    """Build a harness from an open text file, entity by entity"""
+    if harness_cls is None:
+        from model.models import WiringHarness
+        harness_cls = WiringHarness
+    harness = harness_cls()
+    sections = dict(_sections())
+    reader = _JsonStream(f)
+
+    for key in reader.members():
+        cls = sections.get(key)
+        if cls is not None and reader.peek() == '{':
+            target = getattr(harness, key)
+            for entity_key in reader.members():
+                target[entity_key] = cls.from_dict(reader.value())
+            continue
+
+        value = reader.value()
+        if key in ('created_date', 'modified_date'):
+            value = datetime.fromisoformat(value)
+        if key in HEADER_FIELDS:
+            setattr(harness, key, value)
+    return harness
+
+
+class _JsonStream:
+    """
+    Pull parser over a text file for the harness document: walks the
+    members of objects one key at a time and hands whole values to
+    json.JSONDecoder.raw_decode, reading more of the file whenever a
+    value isn't complete yet.
+    """
+
+    _WHITESPACE = ' \t\n\r'
+    _NUMBER = '0123456789+-.eE'
+
+    def __init__(self, f: TextIO):
+        self.f = f
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self) -> bool:
+        """Read another chunk, dropping what was consumed. False at end of file."""
+        if self.eof:
+            return False
+        chunk = self.f.read(READ_CHUNK)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character, '' at end of file"""
+        while True:
+            buffer, pos = self.buffer, self.pos
+            while pos < len(buffer) and buffer[pos] in self._WHITESPACE:
+                pos += 1
+            self.pos = pos
+            if pos < len(buffer):
+                return buffer[pos]
+            if not self._fill():
+                return ''
+
+    def _expect(self, char: str):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} at offset {self.pos} but found {found!r}")
+        self.pos += 1
+
+    def value(self):
+        """Decode the next complete JSON value"""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # A number running up to the end of the buffer may go on in the next chunk
+            if (isinstance(value, (int, float)) and not self.eof
+                    and not self.buffer[end:].strip(self._NUMBER) and self._fill()):
+                continue
+            self.pos = end
+            return value
+
+    def members(self) -> Iterator[str]:
+        """Keys of the object starting here, the caller reads each member's value"""
+        self._expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self._expect(':')
+            yield key
+            char = self.peek()
+            self.pos += 1
+            if char == '}':
+                return
+            if char != ',':
+                raise ValueError(f"Expected ',' or '}}' at offset {self.pos - 1} but found {char!r}")
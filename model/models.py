@@ -121,6 +121,9 @@ class CombinedWireColor:
     
     def __str__(self) -> str:
         return self.code
+    
+    def to_dict(self) -> dict:
+        return {'base_color': self.base_color, 'stripe_color': self.stripe_color}
 class ConnectorType(Enum):
     JT = "Junior Timer"
     GT = "General Timer"
@@ -229,6 +232,7 @@ class Pin:
         self.wire_id.append(wire)
     def to_dict(self) -> dict:
         return {
+            'pid': self.pid,
             'number': self.number,
             'gender': self.gender.value,
             'seal': self.seal.value,
@@ -240,6 +244,7 @@ class Pin:
     @classmethod
     def from_dict(cls, data: dict) -> 'Pin':
         return cls(
+            pid=data.get('pid', data['number']),
             number=data['number'],
             gender=Gender(data['gender']),
             seal=SealType(data['seal']),
@@ -544,14 +549,13 @@ class WiringHarness:
         
         return harness
     
-    def save_to_file(self, filename: str) -> None:
-        """Save harness to JSON file"""
-        with open(filename, 'w') as f:
-            json.dump(self.to_dict(), f, indent=2)
+    def save_to_file(self, filename: str, compact: bool = False, compress: Optional[bool] = None) -> None:
+        """Save harness to JSON file entity by entity, gzip when compress (default: a .gz filename)"""
+        from model.harness_json import write_harness_file
+        write_harness_file(self, filename, compact=compact, compress=compress)
     
     @classmethod
     def load_from_file(cls, filename: str) -> 'WiringHarness':
-        """Load harness from JSON file"""
-        with open(filename, 'r') as f:
-            data = json.load(f)
-        return cls.from_dict(data)
+        """Load harness from JSON file (plain or gzip), building entities as they are read"""
+        from model.harness_json import read_harness_file
+        return read_harness_file(filename, cls)
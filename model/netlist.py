@@ -1,4 +1,5 @@
 #model/netlist
+from typing import Dict, Iterable, List, Optional, Tuple
 from PyQt5.QtGui import  QColor
 class Net:
     def __init__(self, name):
@@ -12,32 +13,99 @@ class Net:
     def __str__(self):
         return str(self.name)
 class Netlist:
+    """
+    Nets kept as a disjoint-set forest over pins (path compression + union by rank).
+    Net objects are only created when somebody asks for the net of a pin.
+    """
     def __init__(self):
-        self.nets = {}
+        self._parent: Dict[object, object] = {}  # pin -> parent pin
+        self._rank: Dict[object, int] = {}  # root pin -> rank
+        self._members: Dict[object, set] = {}  # root pin -> pins in the set
+        self._nets: Dict[object, Net] = {}  # root pin -> materialised Net
+        self._net_counter = 0
 
-    def connect(self, pin_a, pin_b):
-        net_a = self.find_net(pin_a)
-        net_b = self.find_net(pin_b)
-        
-        if net_a and net_b and net_a != net_b:
-            net_a.pins |= net_b.pins
-            del self.nets[net_b.name]
+    @property
+    def nets(self) -> Dict[str, Net]:
+        """All nets by name (materialises every set)"""
+        return {net.name: net for net in (self._net_for_root(root) for root in list(self._members))}
+
+    def _add(self, pin):
+        if pin not in self._parent:
+            self._parent[pin] = pin
+            self._rank[pin] = 0
+            self._members[pin] = {pin}
+
+    def _find(self, pin):
+        """Root of the pin's set, compressing the path on the way"""
+        root = pin
+        parent = self._parent
+        while parent[root] != root:
+            root = parent[root]
+        while parent[pin] != root:
+            parent[pin], pin = root, parent[pin]
+        return root
+
+    def _union(self, pin_a, pin_b):
+        root_a = self._find(pin_a)
+        root_b = self._find(pin_b)
+        if root_a == root_b:
+            return root_a
+
+        # Union by rank, root_a survives
+        if self._rank[root_a] < self._rank[root_b]:
+            root_a, root_b = root_b, root_a
+        self._parent[root_b] = root_a
+        if self._rank[root_a] == self._rank[root_b]:
+            self._rank[root_a] += 1
+        del self._rank[root_b]
 
-        elif net_a:
-            net_a.pins.add(pin_b)
-            return net_a
+        # Merge the smaller member set into the larger one
+        members_a = self._members[root_a]
+        members_b = self._members.pop(root_b)
+        if len(members_b) > len(members_a):
+            members_a, members_b = members_b, members_a
+        members_a |= members_b
+        self._members[root_a] = members_a
 
+        # Keep already handed out Net objects alive on the surviving root
+        net_a = self._nets.get(root_a)
+        net_b = self._nets.pop(root_b, None)
+        if net_a and net_b:
+            net_a.wires.extend(net_b.wires)
+            net_a.segments.extend(net_b.segments)
+            net_a.junctions.extend(net_b.junctions)
+            net_a.connection_points.extend(net_b.connection_points)
         elif net_b:
-            net_b.pins.add(pin_a)
-            return net_b
-        else:
-            name = f"NET_{len(self.nets)+1}"
-            net = Net(name)
-            net.pins.update([pin_a, pin_b])
-            self.nets[name] = net
+            self._nets[root_a] = net_b
+        net = self._nets.get(root_a)
+        if net:
+            net.pins = members_a
+        return root_a
+
+    def _net_for_root(self, root) -> Net:
+        net = self._nets.get(root)
+        if net is None:
+            self._net_counter += 1
+            net = Net(f"NET_{self._net_counter}")
+            net.pins = self._members[root]
+            self._nets[root] = net
         return net
-    def find_net(self, pin):
-        for net in self.nets.values():
-            if pin in net.pins:
-                return net
-        return None
\ No newline at end of file
+
+    def connect(self, pin_a, pin_b):
+        self._add(pin_a)
+        self._add(pin_b)
+        return self._net_for_root(self._union(pin_a, pin_b))
+
+    def connect_many(self, pairs: Iterable[Tuple[object, object]]) -> List[Net]:
+        """Connect all pin pairs first, then return the final net of every pair"""
+        pairs = list(pairs)
+        for pin_a, pin_b in pairs:
+            self._add(pin_a)
+            self._add(pin_b)
+            self._union(pin_a, pin_b)
+        return [self._net_for_root(self._find(pin_a)) for pin_a, _ in pairs]
+
+    def find_net(self, pin) -> Optional[Net]:
+        if pin not in self._parent:
+            return None
+        return self._net_for_root(self._find(pin))
@@ -0,0 +1,118 @@
+#model/pair_index
+from typing import Dict, List, Optional, Tuple
+
+
+def pair_key(node_id_a: str, node_id_b: str) -> Tuple[str, str]:
+    """Key for an unordered pair of node ids"""
+    return (node_id_a, node_id_b) if node_id_a <= node_id_b else (node_id_b, node_id_a)
+
+
+class NodePairIndex:
+    """Segments and bundles keyed by the unordered pair of their end node ids"""
+
+    def __init__(self):
+        self._segments: Dict[Tuple[str, str], List] = {}
+        self._bundles: Dict[Tuple[str, str], List] = {}
+        self._bundle_keys: Dict[object, Tuple[str, str]] = {}  # bundle -> key it is filed under
+        self._node_bundles: Dict[str, List] = {}  # node id -> bundles ending there
+
+    # ---- segments ----
+
+    def add_segment(self, segment):
+        if segment.start_node is None or segment.end_node is None:
+            return
+        entries = self._segments.setdefault(pair_key(segment.start_node.id, segment.end_node.id), [])
+        if segment not in entries:
+            entries.append(segment)
+
+    def remove_segment(self, segment):
+        if segment.start_node is None or segment.end_node is None:
+            return
+        key = pair_key(segment.start_node.id, segment.end_node.id)
+        entries = self._segments.get(key)
+        if entries and segment in entries:
+            entries.remove(segment)
+            if not entries:
+                del self._segments[key]
+
+    def segments_between(self, node_a, node_b) -> List:
+        return self._segments.get(pair_key(node_a.id, node_b.id), [])
+
+    def segment_between(self, node_a, node_b):
+        entries = self._segments.get(pair_key(node_a.id, node_b.id))
+        return entries[0] if entries else None
+
+    def clear_segments(self):
+        self._segments.clear()
+
+    # ---- bundles ----
+
+    def add_bundle(self, bundle) -> bool:
+        """File a bundle under its current end nodes, re-filing it if they changed.
+        Returns True if the index changed."""
+        old_key = self._bundle_keys.get(bundle)
+        new_key = None
+        if bundle.start_node is not None and bundle.end_node is not None:
+            new_key = pair_key(bundle.start_node.id, bundle.end_node.id)
+        if old_key == new_key:
+            return False
+        if old_key is not None:
+            self._discard_bundle(bundle, old_key)
+        if new_key is not None:
+            self._bundles.setdefault(new_key, []).append(bundle)
+            self._bundle_keys[bundle] = new_key
+            for node_id in set(new_key):
+                self._node_bundles.setdefault(node_id, []).append(bundle)
+        return True
+
+    def remove_bundle(self, bundle) -> bool:
+        key = self._bundle_keys.get(bundle)
+        if key is None:
+            return False
+        self._discard_bundle(bundle, key)
+        return True
+
+    def _discard_bundle(self, bundle, key):
+        entries = self._bundles.get(key)
+        if entries and bundle in entries:
+            entries.remove(bundle)
+            if not entries:
+                del self._bundles[key]
+        for node_id in set(key):
+            at_node = self._node_bundles.get(node_id)
+            if at_node and bundle in at_node:
+                at_node.remove(bundle)
+                if not at_node:
+                    del self._node_bundles[node_id]
+        self._bundle_keys.pop(bundle, None)
+
+    def bundles_at(self, node) -> List:
+        """Bundles with an end at the node"""
+        return self._node_bundles.get(node.id, [])
+
+    def bundles_between(self, node_a, node_b) -> List:
+        return self._bundles.get(pair_key(node_a.id, node_b.id), [])
+
+    def bundles_between_ids(self, node_id_a: str, node_id_b: str) -> List:
+        return self._bundles.get(pair_key(node_id_a, node_id_b), [])
+
+    def all_bundles(self) -> List:
+        """Every indexed bundle"""
+        return list(self._bundle_keys)
+
+    def bundle_count(self) -> int:
+        return len(self._bundle_keys)
+
+    def bundle_between(self, node_a, node_b, key=None):
+        """First bundle between two nodes, or the one with the smallest key(bundle)"""
+        entries = self._bundles.get(pair_key(node_a.id, node_b.id))
+        if not entries:
+            return None
+        if key is None or len(entries) == 1:
+            return entries[0]
+        return min(entries, key=key)
+
+    def clear_bundles(self):
+        self._bundles.clear()
+        self._bundle_keys.clear()
+        self._node_bundles.clear()
@@ -0,0 +1,192 @@
+#model/parallel_routing
+from typing import Dict, List, Tuple
+from concurrent.futures import ProcessPoolExecutor
+import heapq
+import multiprocessing
+
+from model.topology import ROUTE_LENGTH
+
+# Below this many distinct legs the process start-up costs more than it saves
+PARALLEL_MIN_LEGS = 200
+
+
+def build_partitions(edges: List[tuple], legs: List[Tuple[str, str]], weighted: bool) -> List[dict]:
+    """
+    Split plain graph data into one partition per connected component that
+    has legs in it. edges are (edge id, node id, node id, length), legs are
+    (from node id, to node id).
+
+    Each partition is {'nodes': [node id], 'edges': [edge], 'legs': [(leg
+    index, from id, to id)], 'weighted': bool}. Nodes, edges and legs are in
+    a stable order so a partition routes the same way in every worker.
+    """
+    adjacency: Dict[str, List[tuple]] = {}
+    for edge in edges:
+        _, a, b, _ = edge
+        adjacency.setdefault(a, []).append(edge)
+        if a != b:
+            adjacency.setdefault(b, []).append(edge)
+
+    component_of: Dict[str, int] = {}
+    components: List[List[str]] = []
+    for node_id in sorted(adjacency):
+        if node_id in component_of:
+            continue
+        comp_id = len(components)
+        members = [node_id]
+        component_of[node_id] = comp_id
+        for current in members:  # grows while iterating -> BFS
+            for _, a, b, _ in adjacency[current]:
+                for other in (a, b):
+                    if other not in component_of:
+                        component_of[other] = comp_id
+                        members.append(other)
+        components.append(members)
+
+    partition_legs: Dict[int, List[tuple]] = {}
+    for index, (start, end) in enumerate(legs):
+        comp_id = component_of.get(start)
+        if comp_id is None or comp_id != component_of.get(end):
+            continue  # no path possible, left unresolved
+        partition_legs.setdefault(comp_id, []).append((index, start, end))
+
+    partition_edges: Dict[int, List[tuple]] = {comp_id: [] for comp_id in partition_legs}
+    for edge in edges:
+        comp_id = component_of[edge[1]]
+        if comp_id in partition_edges:
+            partition_edges[comp_id].append(edge)
+
+    return [{'nodes': components[comp_id], 'edges': partition_edges[comp_id],
+             'legs': partition_legs[comp_id], 'weighted': weighted}
+            for comp_id in sorted(partition_legs)]
+
+
+def route_partition(partition: dict) -> List[Tuple[int, List[str], float]]:
+    """
+    Route all legs of one partition, returns [(leg index, segment ids, length)].
+    Pure function on plain data so it can run in a worker process. One search
+    per distinct source node covers all of that source's targets.
+    """
+    order = {node_id: i for i, node_id in enumerate(partition['nodes'])}
+    graph: Dict[str, List[tuple]] = {node_id: [] for node_id in partition['nodes']}
+    for seg_id, a, b, length in partition['edges']:
+        graph[a].append((b, seg_id, length))
+        if a != b:
+            graph[b].append((a, seg_id, length))
+
+    targets_by_source: Dict[str, set] = {}
+    for _, start, end in partition['legs']:
+        targets_by_source.setdefault(start, set()).add(end)
+
+    weighted = partition['weighted']
+    routes: Dict[Tuple[str, str], Tuple[List[str], float]] = {}
+    for source in sorted(targets_by_source, key=order.get):
+        targets = targets_by_source[source]
+        parents, dist = _search(graph, order, source, targets, weighted)
+        for target in targets:
+            if target == source:
+                routes[(source, target)] = ([], 0.0)
+            elif target in parents:
+                routes[(source, target)] = (_walk(parents, target), dist[target])
+
+    results = []
+    for index, start, end in partition['legs']:
+        path, length = routes.get((start, end), ([], 0.0))
+        results.append((index, path, length))
+    return results
+
+
+def _search(graph, order, source, targets, weighted):
+    """Dijkstra (or BFS) from source until all targets are settled.
+    Ties are broken by node order so the result never depends on timing."""
+    parents = {source: None}
+    dist = {source: 0.0}
+    remaining = set(targets)
+    remaining.discard(source)
+    settled = set()
+
+    if weighted:
+        heap = [(0.0, order[source], source)]
+        while heap and remaining:
+            current_dist, _, current = heapq.heappop(heap)
+            if current in settled:
+                continue
+            settled.add(current)
+            remaining.discard(current)
+            for neighbor, seg_id, length in graph[current]:
+                if neighbor in settled:
+                    continue
+                candidate = current_dist + length
+                if candidate < dist.get(neighbor, float('inf')):
+                    dist[neighbor] = candidate
+                    parents[neighbor] = (current, seg_id)
+                    heapq.heappush(heap, (candidate, order[neighbor], neighbor))
+        # Drop tentative entries that never got settled
+        parents = {node: parent for node, parent in parents.items() if node in settled}
+    else:
+        frontier = [source]
+        while frontier and remaining:
+            next_frontier = []
+            for current in frontier:
+                remaining.discard(current)
+                for neighbor, seg_id, length in graph[current]:
+                    if neighbor in parents:
+                        continue
+                    parents[neighbor] = (current, seg_id)
+                    dist[neighbor] = dist[current] + length
+                    next_frontier.append(neighbor)
+            frontier = next_frontier
+    return parents, dist
+
+
+def _walk(parents, node) -> List[str]:
+    path = []
+    while parents[node] is not None:
+        node, seg_id = parents[node]
+        path.append(seg_id)
+    path.reverse()
+    return path
+
+
+def route_plain(edges: List[tuple], legs: List[Tuple[str, str]], weighted: bool,
+                workers: int = 0) -> Dict[int, Tuple[List[str], float]]:
+    """
+    Route legs over plain graph data, per connected component. With
+    workers > 1 the components are routed in a process pool.
+    Returns {leg index: (edge ids, length)} for every leg with a path.
+    The merge is keyed by leg index, so the result is the same for any
+    number of workers.
+    """
+    partitions = build_partitions(edges, legs, weighted)
+    # Biggest components first so one large sub-harness doesn't end up last
+    partitions.sort(key=lambda partition: len(partition['edges']), reverse=True)
+
+    if workers > 1 and len(partitions) > 1:
+        # spawn, forking a process with a running Qt application is not safe
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=min(workers, len(partitions)), mp_context=context) as pool:
+            partition_results = list(pool.map(route_partition, partitions))
+    else:
+        partition_results = [route_partition(partition) for partition in partitions]
+
+    resolved = {}
+    for results in partition_results:
+        for index, edge_ids, length in results:
+            if edge_ids or legs[index][0] == legs[index][1]:
+                resolved[index] = (edge_ids, length)
+    return resolved
+
+
+def route_legs_parallel(manager, legs: List[Tuple[object, object]], mode: str,
+                        workers: int) -> Dict[int, Tuple[List, float]]:
+    """
+    Route legs (pairs of topology nodes) of a TopologyManager per connected
+    component in a process pool, returns {leg index: (segments, length)}.
+    """
+    edges = [(segment.id, segment.start_node.id, segment.end_node.id, manager.segment_length(segment))
+             for segment in manager.segments.values()
+             if segment.start_node is not None and segment.end_node is not None]
+    plain_legs = [(start.id, end.id) for start, end in legs]
+    resolved = route_plain(edges, plain_legs, mode == ROUTE_LENGTH, workers)
+    return {index: ([manager.segments[seg_id] for seg_id in seg_ids], length)
+            for index, (seg_ids, length) in resolved.items()}
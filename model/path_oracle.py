@@ -0,0 +1,153 @@
+#model/path_oracle
+from typing import List, Dict, Optional, Tuple
+from collections import deque
+
+
+class TreePathOracle:
+    """
+    Answers path queries on the tree components of the topology graph.
+
+    Harness topologies are mostly trees, where the path between two nodes
+    is unique. For every tree component we root the tree once and keep
+    parent/depth/distance arrays plus a binary lifting table, so a query is
+    an LCA lookup followed by walking the parent segments, no graph search.
+    Components with cycles are marked and left to the caller's Dijkstra/BFS.
+
+    adjacency maps node id -> incident edges (segments or bundles, anything
+    with start_node/end_node), edge_length gives the routing length of an edge.
+    """
+
+    def __init__(self, adjacency, edge_length):
+        self.adjacency = adjacency
+        self.edge_length = edge_length
+        self.index: Dict[str, int] = {}  # node id -> position in the arrays below
+        self.component: List[int] = []
+        self.is_tree: List[bool] = []  # per component
+        self.parent: List[int] = []
+        self.parent_segment: List = []
+        self.depth: List[int] = []
+        self.dist: List[float] = []
+        self.up: List[List[int]] = []  # up[k][i] = 2^k-th ancestor of i
+        self._build()
+
+    def _build(self):
+        """Split the graph into components and root every tree component"""
+        adjacency = self.adjacency
+        edge_length = self.edge_length
+
+        for node_id in adjacency:
+            if node_id in self.index:
+                continue
+
+            comp_id = len(self.is_tree)
+            self._add_node(node_id, comp_id, -1, None, 0, 0.0)
+            seen_edges = set()
+            tree = True
+
+            queue = deque([node_id])
+            while queue:
+                current_id = queue.popleft()
+                current = self.index[current_id]
+                for segment in adjacency.get(current_id, ()):
+                    if id(segment) in seen_edges:
+                        continue
+                    seen_edges.add(id(segment))
+
+                    start, end = segment.start_node, segment.end_node
+                    if start is None or end is None:
+                        continue
+                    next_id = end.id if start.id == current_id else start.id
+                    if next_id in self.index:
+                        # Reached an already visited node over a new segment -> cycle
+                        # (self loops and parallel segments end up here too)
+                        tree = False
+                        continue
+
+                    self._add_node(next_id, comp_id, current, segment,
+                                   self.depth[current] + 1,
+                                   self.dist[current] + edge_length(segment))
+                    queue.append(next_id)
+
+            self.is_tree.append(tree)
+
+        # Binary lifting table over all nodes; roots point to themselves
+        count = len(self.parent)
+        self.up = [[p if p >= 0 else i for i, p in enumerate(self.parent)]]
+        max_depth = max(self.depth) if self.depth else 0
+        k = 1
+        while (1 << k) <= max_depth:
+            prev = self.up[k - 1]
+            self.up.append([prev[prev[i]] for i in range(count)])
+            k += 1
+
+    def _add_node(self, node_id, comp_id, parent, segment, depth, dist) -> int:
+        idx = len(self.parent)
+        self.index[node_id] = idx
+        self.component.append(comp_id)
+        self.parent.append(parent)
+        self.parent_segment.append(segment)
+        self.depth.append(depth)
+        self.dist.append(dist)
+        return idx
+
+    def covers(self, start_node, end_node) -> bool:
+        """True if the oracle can answer this query without a graph search"""
+        a = self.index.get(start_node.id)
+        b = self.index.get(end_node.id)
+        if a is None or b is None:
+            return True  # at least one node has no segments -> no path
+        if self.component[a] != self.component[b]:
+            return True  # different components -> no path
+        return self.is_tree[self.component[a]]
+
+    def lca(self, a: int, b: int) -> int:
+        """Lowest common ancestor of two nodes in the same tree"""
+        if self.depth[a] < self.depth[b]:
+            a, b = b, a
+        diff = self.depth[a] - self.depth[b]
+        k = 0
+        while diff:
+            if diff & 1:
+                a = self.up[k][a]
+            diff >>= 1
+            k += 1
+        if a == b:
+            return a
+        for k in range(len(self.up) - 1, -1, -1):
+            if self.up[k][a] != self.up[k][b]:
+                a = self.up[k][a]
+                b = self.up[k][b]
+        return self.parent[a]
+
+    def distance(self, start_node, end_node) -> Optional[float]:
+        """Path length between two nodes in a tree component, None if unreachable"""
+        a = self.index.get(start_node.id)
+        b = self.index.get(end_node.id)
+        if a is None or b is None or self.component[a] != self.component[b]:
+            return None
+        return self.dist[a] + self.dist[b] - 2 * self.dist[self.lca(a, b)]
+
+    def find_path(self, start_node, end_node) -> Tuple[List, float]:
+        """Unique path between two nodes of a tree component, returns (segments, length)"""
+        if start_node == end_node:
+            return [], 0.0
+        a = self.index.get(start_node.id)
+        b = self.index.get(end_node.id)
+        if a is None or b is None or self.component[a] != self.component[b]:
+            return [], 0.0
+
+        top = self.lca(a, b)
+
+        up_part = []
+        while a != top:
+            up_part.append(self.parent_segment[a])
+            a = self.parent[a]
+
+        down_part = []
+        while b != top:
+            down_part.append(self.parent_segment[b])
+            b = self.parent[b]
+        down_part.reverse()
+
+        length = self.dist[self.index[start_node.id]] + self.dist[self.index[end_node.id]] - 2 * self.dist[top]
+        return up_part + down_part, length
@@ -0,0 +1,180 @@
+#model/route_cache
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+import math
+
+from model.topology import ROUTE_HOPS
+from model.topology_journal import NODE, BUNDLE, TOPOLOGY, MOVE, REMOVE
+
+# Routes kept before the least recently used ones are dropped
+ROUTE_CACHE_SIZE = 20000
+
+
+@dataclass
+class CachedRoute:
+    """Bundle route between two connector nodes, stored from the lower node id"""
+    node_path: List[str]
+    bundle_ids: List[str]
+    length: float
+    start_position: Tuple[float, float]
+    end_position: Tuple[float, float]
+
+
+class RouteCache:
+    """
+    Bounded LRU cache of bundle routes keyed by (from node, to node, mode).
+
+    Every entry is valid for the topology version the cache was last synced
+    to. sync() walks the journal since then and only drops what an edit can
+    affect: routes over a removed or changed bundle or a moved node, and
+    routes a new or shortened bundle could undercut (checked with the same
+    straight-line lower bound the A* heuristic uses). Segments created while
+    routing don't touch the bundle routes, so they invalidate nothing.
+    """
+
+    def __init__(self, max_entries: int = ROUTE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.version = -1
+        self._routes: "OrderedDict[Tuple[str, str, str], CachedRoute]" = OrderedDict()
+        self._by_node: Dict[str, Set[tuple]] = {}
+        self._by_bundle: Dict[str, Set[tuple]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidated = 0
+
+    # ---- lookup ----
+
+    @staticmethod
+    def _key(from_id: str, to_id: str, mode: str) -> Tuple[Tuple[str, str, str], bool]:
+        """Cache key and whether the stored route runs the other way"""
+        if from_id <= to_id:
+            return (from_id, to_id, mode), False
+        return (to_id, from_id, mode), True
+
+    def get(self, from_id: str, to_id: str, mode: str) -> Optional[CachedRoute]:
+        key, reverse = self._key(from_id, to_id, mode)
+        route = self._routes.get(key)
+        if route is None:
+            self.misses += 1
+            return None
+        self._routes.move_to_end(key)
+        self.hits += 1
+        if reverse:
+            return CachedRoute(route.node_path[::-1], route.bundle_ids[::-1], route.length,
+                               route.end_position, route.start_position)
+        return route
+
+    def put(self, from_id: str, to_id: str, mode: str, node_path: List[str], bundle_ids: List[str],
+            length: float, start_position, end_position):
+        key, reverse = self._key(from_id, to_id, mode)
+        if reverse:
+            node_path, bundle_ids = node_path[::-1], bundle_ids[::-1]
+            start_position, end_position = end_position, start_position
+        self._discard(key)
+        self._routes[key] = CachedRoute(list(node_path), list(bundle_ids), length,
+                                        tuple(start_position), tuple(end_position))
+        for node_id in node_path:
+            self._by_node.setdefault(node_id, set()).add(key)
+        for bundle_id in bundle_ids:
+            self._by_bundle.setdefault(bundle_id, set()).add(key)
+        while len(self._routes) > self.max_entries:
+            self._discard(next(iter(self._routes)))
+
+    def _discard(self, key):
+        route = self._routes.pop(key, None)
+        if route is None:
+            return False
+        for index, ids in ((self._by_node, route.node_path), (self._by_bundle, route.bundle_ids)):
+            for entity_id in ids:
+                keys = index.get(entity_id)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del index[entity_id]
+        return True
+
+    def clear(self):
+        self.invalidated += len(self._routes)
+        self._routes.clear()
+        self._by_node.clear()
+        self._by_bundle.clear()
+
+    def __len__(self) -> int:
+        return len(self._routes)
+
+    # ---- invalidation ----
+
+    def sync(self, manager, heuristic_scale: float = 1.0):
+        """Drop the routes the topology edits since the last sync can change"""
+        if self.version == manager.version:
+            return self
+        changes = manager.changes_since(self.version) if self.version >= 0 else None
+        if changes is None or any(change.kind == TOPOLOGY for change in changes):
+            self.clear()
+            self.version = manager.version
+            return self
+
+        dropped = 0
+        for change in changes:
+            if change.kind == BUNDLE:
+                dropped += self._drop(self._by_bundle.get(change.entity_id))
+                if change.action != REMOVE and len(change.node_ids) == 2:
+                    for bundle in manager.pair_index.bundles_between_ids(*change.node_ids):
+                        if bundle.bundle_id == change.entity_id:
+                            dropped += self._drop_undercut(bundle, heuristic_scale)
+            elif change.kind == NODE:
+                dropped += self._drop(self._by_node.get(change.entity_id))
+                node = manager.nodes.get(change.entity_id)
+                if change.action == MOVE and node is not None:
+                    # Drawn lengths around the node changed, they may be shorter now
+                    for bundle in manager.bundles_at(node):
+                        dropped += self._drop_undercut(bundle, heuristic_scale)
+        self.invalidated += dropped
+        self.version = manager.version
+        return self
+
+    def _drop(self, keys) -> int:
+        if not keys:
+            return 0
+        return sum(self._discard(key) for key in list(keys))
+
+    def _drop_undercut(self, bundle, scale: float) -> int:
+        """Drop the routes a path over this bundle could be shorter than"""
+        from model.bundle_graph import bundle_length, node_distance
+        start, end = bundle.start_node, bundle.end_node
+        if start is None or end is None or not self._routes:
+            return 0
+        length = bundle_length(bundle)
+        span = node_distance(start, end)
+        if span > 0:
+            scale = min(scale, length / span)
+        a, b = start.position, end.position
+
+        stale = []
+        for key, route in self._routes.items():
+            if key[2] == ROUTE_HOPS:
+                # Hops to reach the bundle ends are at least 1 unless already there
+                s, t = key[0], key[1]
+                bound = 1 + min((s != start.id) + (end.id != t), (s != end.id) + (start.id != t))
+                if bound < len(route.bundle_ids):
+                    stale.append(key)
+            else:
+                s, t = route.start_position, route.end_position
+                detour = min(math.dist(s, a) + math.dist(b, t), math.dist(s, b) + math.dist(a, t))
+                if scale * detour + length < route.length - 1e-9:
+                    stale.append(key)
+        for key in stale:
+            self._discard(key)
+        return len(stale)
+
+    # ---- statistics ----
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> dict:
+        return {'entries': len(self._routes), 'hits': self.hits, 'misses': self.misses,
+                'invalidated': self.invalidated, 'hit_rate': self.hit_rate}
@@ -0,0 +1,164 @@
+#model/steiner_tree
+from typing import Dict, List, Tuple
+import math
+import numpy as np
+
+# How much a wire between two connectors shortens their MST edge cost,
+# heavily wired connectors end up next to each other in the tree
+WIRE_WEIGHT = 0.1
+
+# Pairs of tree edges meeting under less than 120 degrees get a Steiner point
+STEINER_ANGLE = 2.0 * math.pi / 3.0
+
+
+def minimum_spanning_tree(positions: np.ndarray, wire_counts: Dict[Tuple[int, int], int] = None) -> List[Tuple[int, int]]:
+    """
+    Prim's algorithm on the complete graph over the points, dense O(n^2)
+    with NumPy rows. Edge cost is the Euclidean distance divided by
+    (1 + WIRE_WEIGHT * wires between the two points).
+    """
+    count = len(positions)
+    if count < 2:
+        return []
+
+    delta = positions[:, None, :] - positions[None, :, :]
+    cost = np.sqrt(np.einsum('ijk,ijk->ij', delta, delta))
+    if wire_counts:
+        rows = np.fromiter((i for i, _ in wire_counts), dtype=np.int64, count=len(wire_counts))
+        cols = np.fromiter((j for _, j in wire_counts), dtype=np.int64, count=len(wire_counts))
+        counts = np.fromiter(wire_counts.values(), dtype=np.float64, count=len(wire_counts))
+        factor = np.ones_like(cost)
+        np.add.at(factor, (rows, cols), WIRE_WEIGHT * counts)
+        np.add.at(factor, (cols, rows), WIRE_WEIGHT * counts)
+        cost /= factor
+
+    in_tree = np.zeros(count, dtype=bool)
+    in_tree[0] = True
+    best = cost[0].copy()
+    best[0] = np.inf
+    parent = np.zeros(count, dtype=np.int64)
+
+    edges = []
+    for _ in range(count - 1):
+        nxt = int(np.argmin(best))
+        edges.append((int(parent[nxt]), nxt))
+        in_tree[nxt] = True
+        best[nxt] = np.inf
+        closer = (cost[nxt] < best) & ~in_tree
+        best[closer] = cost[nxt][closer]
+        parent[closer] = nxt
+    return edges
+
+
+def fermat_point(a, b, c, iterations: int = 64) -> Tuple[float, float]:
+    """Point minimising the summed distance to a, b and c (Weiszfeld iteration).
+    Plain floats, three points are far below where NumPy pays off."""
+    points = (a, b, c)
+    x = (a[0] + b[0] + c[0]) / 3.0
+    y = (a[1] + b[1] + c[1]) / 3.0
+    for _ in range(iterations):
+        sum_w = sum_x = sum_y = 0.0
+        for px, py in points:
+            dist = math.hypot(px - x, py - y)
+            if dist < 1e-9:
+                return x, y
+            weight = 1.0 / dist
+            sum_w += weight
+            sum_x += px * weight
+            sum_y += py * weight
+        new_x, new_y = sum_x / sum_w, sum_y / sum_w
+        if math.hypot(new_x - x, new_y - y) < 1e-6:
+            return new_x, new_y
+        x, y = new_x, new_y
+    return x, y
+
+
+def steiner_tree(positions: np.ndarray, wire_counts: Dict[Tuple[int, int], int] = None) -> Tuple[List[Tuple[float, float]], List[Tuple[int, int]]]:
+    """
+    Euclidean Steiner tree approximation over the terminal points.
+
+    Starts from the (wire weighted) MST, then wherever two tree edges meet
+    at a node under less than 120 degrees both are replaced by a Steiner
+    point at the Fermat point of the three nodes, as long as that shortens
+    the tree. Returns (steiner points, edges); edge indices below
+    len(positions) are terminals, the rest index the Steiner points.
+    """
+    points = [tuple(map(float, p)) for p in positions]
+    count = len(points)
+    neighbors: List[set] = [set() for _ in range(count)]
+    for a, b in minimum_spanning_tree(np.asarray(positions, dtype=np.float64), wire_counts):
+        neighbors[a].add(b)
+        neighbors[b].add(a)
+
+    def distance(i, j):
+        return math.hypot(points[i][0] - points[j][0], points[i][1] - points[j][1])
+
+    def sharpest_pair(u):
+        """Pair of neighbours of u with the smallest angle between them"""
+        px, py = points[u]
+        around = sorted((math.atan2(points[v][1] - py, points[v][0] - px), v) for v in neighbors[u])
+        best = None
+        for k in range(len(around)):
+            angle_a, v = around[k]
+            angle_b, w = around[(k + 1) % len(around)]
+            gap = (angle_b - angle_a) % (2.0 * math.pi)
+            if best is None or gap < best[0]:
+                best = (gap, v, w)
+        return best
+
+    queue = list(range(count))
+    while queue:
+        u = queue.pop()
+        while len(neighbors[u]) >= 2:
+            gap, v, w = sharpest_pair(u)
+            if gap >= STEINER_ANGLE:
+                break
+            s_pos = fermat_point(points[u], points[v], points[w])
+            saving = distance(u, v) + distance(u, w) - (
+                math.hypot(s_pos[0] - points[u][0], s_pos[1] - points[u][1]) +
+                math.hypot(s_pos[0] - points[v][0], s_pos[1] - points[v][1]) +
+                math.hypot(s_pos[0] - points[w][0], s_pos[1] - points[w][1]))
+            if saving <= 1e-6:
+                break
+
+            s = len(points)
+            points.append(s_pos)
+            neighbors.append({u, v, w})
+            for other in (v, w):
+                neighbors[u].discard(other)
+                neighbors[other].discard(u)
+                neighbors[other].add(s)
+            neighbors[u].add(s)
+            # v and w lost a sharp edge and got a new one, look at them again
+            queue.extend((v, w))
+
+    # A Steiner point that lost edges to later insertions is a plain bend now,
+    # connecting its neighbours directly is never longer
+    for s in range(count, len(points)):
+        if len(neighbors[s]) == 2:
+            v, w = neighbors[s]
+            neighbors[v].discard(s)
+            neighbors[w].discard(s)
+            neighbors[v].add(w)
+            neighbors[w].add(v)
+            neighbors[s] = set()
+        elif len(neighbors[s]) == 1:
+            v, = neighbors[s]
+            neighbors[v].discard(s)
+            neighbors[s] = set()
+
+    # Renumber the surviving Steiner points
+    renumber = list(range(count))
+    kept = []
+    for s in range(count, len(points)):
+        if neighbors[s]:
+            renumber.append(count + len(kept))
+            kept.append(points[s])
+        else:
+            renumber.append(-1)
+    edges = [(renumber[a], renumber[b]) for a in range(len(points)) for b in neighbors[a] if a < b]
+    return kept, edges
+
+
+def tree_length(points: List[Tuple[float, float]], edges: List[Tuple[int, int]]) -> float:
+    return sum(math.hypot(points[a][0] - points[b][0], points[a][1] - points[b][1]) for a, b in edges)
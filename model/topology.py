@@ -3,6 +3,10 @@ from dataclasses import dataclass, field
 from typing import List, Dict, Optional, Set
 import uuid
 
+# Routing modes
+ROUTE_HOPS = "hops"  # fewest segments
+ROUTE_LENGTH = "length"  # shortest physical length
+
 class TopologyNode:
     """Base class for nodes in the topology graph (connectors, junctions, branch points)"""
     def __init__(self, node_id: str = None, position=(0, 0),node_type="connector"):
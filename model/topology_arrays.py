@@ -0,0 +1,200 @@
+#model/topology_arrays
+from typing import List, Optional, Tuple
+import numpy as np
+
+from model.topology_journal import NODE, SEGMENT, BUNDLE, TOPOLOGY, MOVE
+
+
+class TopologyArrays:
+    """
+    Columnar mirror of the topology graph for vectorized geometry queries.
+
+    Nodes are rows of a (N, 2) position array, segments are pairs of node
+    rows, and adjacency is kept in CSR form: the neighbours of node i are
+    neighbors[indptr[i]:indptr[i + 1]], reached over edge_segments[...].
+
+    The mirror follows the TopologyManager journal. Node moves only rewrite
+    the moved rows, specified length changes only the length column, any
+    structural edit (add/remove/split/clear) rebuilds the arrays.
+    """
+
+    def __init__(self, manager):
+        self.manager = manager
+        self.version = -1
+
+        self.node_ids: List[str] = []
+        self.nodes: List = []
+        self.node_index = {}  # node id -> row
+        self.positions = np.zeros((0, 2), dtype=np.float64)
+
+        self.segments: List = []
+        self.segment_index = {}  # segment id -> row
+        self.seg_start = np.zeros(0, dtype=np.int64)
+        self.seg_end = np.zeros(0, dtype=np.int64)
+        self.specified = np.zeros(0, dtype=np.float64)  # NaN where no length is specified
+
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.neighbors = np.zeros(0, dtype=np.int64)
+        self.edge_segments = np.zeros(0, dtype=np.int64)
+
+    # ---- sync ----
+
+    def sync(self):
+        """Bring the arrays up to date with the manager"""
+        manager = self.manager
+        if self.version == manager.version:
+            return self
+        changes = manager.changes_since(self.version) if self.version >= 0 else None
+        if changes is None or any(self._is_structural(change) for change in changes):
+            self.rebuild()
+            return self
+
+        moved = manager.journal.affected_ids(changes, NODE)
+        for node_id in moved:
+            row = self.node_index.get(node_id)
+            if row is not None:
+                self.positions[row] = self.nodes[row].position
+        if any(change.kind == BUNDLE for change in changes):
+            self.specified = self._specified_lengths()
+        self.version = manager.version
+        return self
+
+    @staticmethod
+    def _is_structural(change) -> bool:
+        if change.kind == TOPOLOGY:
+            return True
+        if change.kind == NODE:
+            return change.action != MOVE
+        if change.kind == SEGMENT:
+            return True
+        return False  # bundle add/remove/change only touches lengths
+
+    def rebuild(self):
+        """Rebuild every array from the manager"""
+        manager = self.manager
+        self.nodes = list(manager.nodes.values())
+        self.node_index = {node.id: row for row, node in enumerate(self.nodes)}
+        # Segment ends that were never registered as nodes still get a row
+        for segment in manager.segments.values():
+            for node in (segment.start_node, segment.end_node):
+                if node is not None and node.id not in self.node_index:
+                    self.node_index[node.id] = len(self.nodes)
+                    self.nodes.append(node)
+        self.node_ids = [node.id for node in self.nodes]
+        if self.nodes:
+            self.positions = np.array([node.position for node in self.nodes], dtype=np.float64).reshape(-1, 2)
+        else:
+            self.positions = np.zeros((0, 2), dtype=np.float64)
+
+        # Dangling segments (missing an end) can't be placed
+        index = self.node_index
+        self.segments = [segment for segment in manager.segments.values()
+                         if segment.start_node is not None and segment.end_node is not None]
+        self.segment_index = {segment.id: row for row, segment in enumerate(self.segments)}
+        self.seg_start = np.fromiter((index[s.start_node.id] for s in self.segments),
+                                     dtype=np.int64, count=len(self.segments))
+        self.seg_end = np.fromiter((index[s.end_node.id] for s in self.segments),
+                                   dtype=np.int64, count=len(self.segments))
+        self.specified = self._specified_lengths()
+
+        # CSR adjacency, every segment appears once from each end
+        seg_rows = np.arange(len(self.segments), dtype=np.int64)
+        sources = np.concatenate([self.seg_start, self.seg_end])
+        targets = np.concatenate([self.seg_end, self.seg_start])
+        edges = np.concatenate([seg_rows, seg_rows])
+        order = np.argsort(sources, kind='stable')
+        self.neighbors = targets[order]
+        self.edge_segments = edges[order]
+        counts = np.bincount(sources, minlength=len(self.nodes))
+        self.indptr = np.zeros(len(self.nodes) + 1, dtype=np.int64)
+        np.cumsum(counts, out=self.indptr[1:])
+
+        self.version = manager.version
+        return self
+
+    def _specified_lengths(self) -> np.ndarray:
+        """Specified length per segment, same lookup as TopologyManager.segment_length"""
+        values = np.full(len(self.segments), np.nan, dtype=np.float64)
+        for row, segment in enumerate(self.segments):
+            specified = getattr(segment, 'specified_length', None)
+            if specified is None:
+                specified = getattr(getattr(segment, 'graphics_item', None), 'specified_length', None)
+            if specified is not None:
+                values[row] = float(specified)
+        return values
+
+    # ---- vectorized helpers ----
+
+    def neighbors_of(self, node) -> Tuple[np.ndarray, np.ndarray]:
+        """(neighbour node rows, segment rows) around a node"""
+        row = self.node_index[node.id]
+        lo, hi = self.indptr[row], self.indptr[row + 1]
+        return self.neighbors[lo:hi], self.edge_segments[lo:hi]
+
+    def degrees(self) -> np.ndarray:
+        return np.diff(self.indptr)
+
+    def geometric_lengths(self) -> np.ndarray:
+        """Straight-line length of every segment"""
+        delta = self.positions[self.seg_end] - self.positions[self.seg_start]
+        return np.hypot(delta[:, 0], delta[:, 1])
+
+    def segment_lengths(self) -> np.ndarray:
+        """Routing length of every segment: specified if set, geometric otherwise"""
+        geometric = self.geometric_lengths()
+        return np.where(np.isnan(self.specified), geometric, self.specified)
+
+    def total_length(self) -> float:
+        return float(self.segment_lengths().sum())
+
+    def heuristic_scale(self) -> float:
+        """Largest k with k * straight-line distance <= routing length for all segments"""
+        geometric = self.geometric_lengths()
+        mask = geometric > 0
+        if not mask.any():
+            return 1.0
+        ratio = self.segment_lengths()[mask] / geometric[mask]
+        return float(max(min(1.0, ratio.min()), 0.0))
+
+    def bounding_box(self) -> Optional[Tuple[float, float, float, float]]:
+        """(min_x, min_y, max_x, max_y) of all nodes, None for an empty topology"""
+        if not len(self.positions):
+            return None
+        low = self.positions.min(axis=0)
+        high = self.positions.max(axis=0)
+        return float(low[0]), float(low[1]), float(high[0]), float(high[1])
+
+    def nearest_node(self, x: float, y: float, max_distance: float = None):
+        """Closest node to a point, or None if nothing is within max_distance"""
+        if not len(self.positions):
+            return None
+        delta = self.positions - (x, y)
+        dist2 = np.einsum('ij,ij->i', delta, delta)
+        row = int(np.argmin(dist2))
+        if max_distance is not None and dist2[row] > max_distance * max_distance:
+            return None
+        return self.nodes[row]
+
+    def nodes_in_rect(self, x1: float, y1: float, x2: float, y2: float) -> List:
+        """Nodes inside the axis aligned rectangle (corners in any order)"""
+        min_x, max_x = min(x1, x2), max(x1, x2)
+        min_y, max_y = min(y1, y2), max(y1, y2)
+        xs, ys = self.positions[:, 0], self.positions[:, 1]
+        mask = (xs >= min_x) & (xs <= max_x) & (ys >= min_y) & (ys <= max_y)
+        return [self.nodes[row] for row in np.flatnonzero(mask)]
+
+    def segments_within(self, x: float, y: float, radius: float) -> List:
+        """Segments passing within radius of a point"""
+        if not self.segments:
+            return []
+        start = self.positions[self.seg_start]
+        delta = self.positions[self.seg_end] - start
+        to_point = np.array((x, y)) - start
+        length2 = np.einsum('ij,ij->i', delta, delta)
+        # Projection of the point onto each segment, clamped to the segment
+        t = np.divide(np.einsum('ij,ij->i', to_point, delta), length2,
+                      out=np.zeros_like(length2), where=length2 > 0)
+        t = np.clip(t, 0.0, 1.0)
+        offset = to_point - delta * t[:, None]
+        dist2 = np.einsum('ij,ij->i', offset, offset)
+        return [self.segments[row] for row in np.flatnonzero(dist2 <= radius * radius)]
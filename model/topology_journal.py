@@ -0,0 +1,105 @@
+#model/topology_journal
+from dataclasses import dataclass
+from bisect import bisect_right
+from typing import List, Optional, Tuple, Set
+
+# Entity kinds
+NODE = "node"
+SEGMENT = "segment"
+BUNDLE = "bundle"
+TOPOLOGY = "topology"  # whole graph, used for bulk clears
+
+# Actions
+ADD = "add"
+REMOVE = "remove"
+MOVE = "move"
+CHANGE = "change"  # e.g. a bundle's specified length
+SPLIT = "split"
+CLEAR = "clear"
+
+
+@dataclass(frozen=True)
+class TopologyChange:
+    """One journal entry"""
+    version: int
+    kind: str
+    action: str
+    entity_id: str
+    node_ids: Tuple[str, ...] = ()  # nodes touched by the change
+    related_ids: Tuple[str, ...] = ()  # e.g. segments created by a split
+
+
+class ChangeJournal:
+    """
+    Monotonically versioned log of topology edits.
+
+    Consumers remember the version they last synced to and call
+    changes_since(version). A None result means the journal was trimmed past
+    that version (or the topology was cleared) and the consumer has to
+    rebuild from scratch.
+    """
+
+    def __init__(self, max_entries: int = 5000):
+        self.version = 0
+        self.max_entries = max_entries
+        self._changes: List[TopologyChange] = []
+        self._versions: List[int] = []  # parallel to _changes, for bisect
+        self._horizon = 0  # changes at or before this version are gone
+
+    def record(self, kind: str, action: str, entity_id: str,
+               node_ids: Tuple[str, ...] = (), related_ids: Tuple[str, ...] = ()) -> int:
+        """Append a change and return its version"""
+        self.version += 1
+
+        # Coalesce repeated moves of the same node (drags emit one per mouse move)
+        if action == MOVE and self._changes:
+            last = self._changes[-1]
+            if last.action == MOVE and last.kind == kind and last.entity_id == entity_id:
+                self._changes.pop()
+                self._versions.pop()
+
+        if action == CLEAR:
+            # Nothing before a clear is useful to anyone
+            self._changes.clear()
+            self._versions.clear()
+            self._horizon = self.version
+            return self.version
+
+        self._changes.append(TopologyChange(self.version, kind, action, entity_id,
+                                            tuple(node_ids), tuple(related_ids)))
+        self._versions.append(self.version)
+
+        if len(self._changes) > self.max_entries:
+            drop = len(self._changes) - self.max_entries // 2
+            self._horizon = self._versions[drop - 1]
+            del self._changes[:drop]
+            del self._versions[:drop]
+
+        return self.version
+
+    def changes_since(self, version: int) -> Optional[List[TopologyChange]]:
+        """Changes after the given version, None if a full rebuild is needed"""
+        if version < self._horizon:
+            return None
+        return self._changes[bisect_right(self._versions, version):]
+
+    @staticmethod
+    def affected_nodes(changes: List[TopologyChange]) -> Set[str]:
+        """Ids of all nodes touched by the changes"""
+        node_ids = set()
+        for change in changes:
+            node_ids.update(change.node_ids)
+            if change.kind == NODE:
+                node_ids.add(change.entity_id)
+        return node_ids
+
+    @staticmethod
+    def affected_ids(changes: List[TopologyChange], kind: str) -> Set[str]:
+        """Ids of all entities of one kind touched by the changes"""
+        ids = set()
+        for change in changes:
+            if change.kind == kind:
+                ids.add(change.entity_id)
+                if change.action == SPLIT:
+                    ids.update(change.related_ids)
+        return ids
@@ -1,23 +1,82 @@
 #model/topology_manager
-from typing import List, Dict, Optional, Set
-from model.topology import TopologyNode, JunctionNode, BranchPointNode, WireSegment, Bundle
+from typing import List, Dict, Optional, Set, Tuple
+from collections import deque
+from dataclasses import dataclass, field
+import heapq
+import itertools
+import math
+from model.topology import TopologyNode, JunctionNode, BranchPointNode, WireSegment, Bundle, ROUTE_HOPS, ROUTE_LENGTH
 from model.wire import Wire
+from model.pair_index import NodePairIndex
+from model.topology_journal import ChangeJournal, NODE, SEGMENT, BUNDLE, TOPOLOGY, ADD, REMOVE, MOVE, CHANGE, SPLIT, CLEAR
 from graphics.pin_item import PinItem
 from graphics.connection_point import ConnectionPoint
 from PyQt5.QtCore import QPointF
 import uuid
 from graphics.bundle_item import BundleItem
 
+
+@dataclass
+class RouteRequest:
+    """One wire to route with TopologyManager.route_wires"""
+    from_pin: object
+    to_pin: object
+    via_nodes: List = field(default_factory=list)
+    wid: str = None
+    import_wire: object = None
+    tag: object = None  # caller data, handed back untouched in the result
+
+@dataclass
+class RouteResult:
+    """Outcome of one RouteRequest"""
+    request: RouteRequest
+    wire: Optional[Wire] = None
+    segments: List = field(default_factory=list)
+    length: float = 0.0
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
 class TopologyManager:
     def __init__(self,main_window):
         self.main_window = main_window
         self.nodes: Dict[str, TopologyNode] = {}
         self.segments: Dict[str, WireSegment] = {}
+        self.adjacency: Dict[str, List[WireSegment]] = {}  # node id -> incident segments
+        self.pair_index = NodePairIndex()  # unordered node pair -> segments / bundles
+        self._segment_counter = 0
+        self._heuristic_scale = None  # cached A* scale, see _get_heuristic_scale
+        self._path_oracle = None  # TreePathOracle, rebuilt lazily after edits
+        self._defer_invalidation = False  # set by route_wires while it adds direct segments
+        self._lengths_stale = False  # an edit came in while invalidation was deferred
+        self._arrays = None  # TopologyArrays, synced from the journal on access
         self.branches: Dict[str, HarnessBranch] = {}  # NEW
         self.bundles: Dict[str, Bundle] = {}
         self.wires: Dict[str, Wire] = {}
         self.connection_points: Dict[str, ConnectionPoint] = {}
         self.netlist = None  # Will be set from main window
+        self.journal = ChangeJournal()  # versioned log of topology edits
+        
+    @property
+    def version(self) -> int:
+        """Current topology version, bumped by every recorded change"""
+        return self.journal.version
+
+    def changes_since(self, version: int):
+        """Changes after version, None if the caller has to rebuild from scratch"""
+        return self.journal.changes_since(version)
+
+    def _record(self, kind, action, entity_id, node_ids=(), related_ids=()) -> int:
+        # Adding or dropping a node alone changes no path or length (its
+        # segments are recorded on their own)
+        if not (kind == NODE and action in (ADD, REMOVE)):
+            if self._defer_invalidation:
+                self._lengths_stale = True
+            else:
+                self.invalidate_lengths()
+        return self.journal.record(kind, action, entity_id, node_ids, related_ids)
         
     def set_netlist(self, netlist):
         """Set the netlist for creating nets"""
@@ -31,28 +90,135 @@ class TopologyManager:
         )
         node.node_type = "connector"
         node.connector_ref = connector  # Store reference
-        self.nodes[node.id] = node
+        self.add_node(node)
         connector.topology_node = node
         return node
     
     def create_branch_point(self, position, bp_type="split") -> BranchPointNode:
         """Create a new branch point"""
         bp = BranchPointNode(position, bp_type)
-        self.nodes[bp.id] = bp
+        self.add_node(bp)
         return bp
     
     def create_junction(self, position) -> JunctionNode:
         """Create a new junction"""
         junction = JunctionNode(position)
-        self.nodes[junction.id] = junction
+        self.add_node(junction)
         return junction
+
+    def add_node(self, node: TopologyNode) -> TopologyNode:
+        """Register a node created elsewhere"""
+        self.nodes[node.id] = node
+        self._record(NODE, ADD, node.id)
+        return node
+
+    def remove_node(self, node: TopologyNode):
+        """Remove a node and every segment attached to it"""
+        for segment in list(self.segments_at(node)):
+            self.remove_segment(segment)
+        if self.nodes.get(node.id) is node:
+            del self.nodes[node.id]
+            self._record(NODE, REMOVE, node.id)
+
+    def move_node(self, node: TopologyNode, position):
+        """Update a node position (connector or branch point moved)"""
+        node.position = position
+        self._record(NODE, MOVE, node.id, (node.id,))
     
     def create_segment(self, start_node: TopologyNode, end_node: TopologyNode) -> WireSegment:
         """Create a wire segment between two nodes"""
-        segment_id = f"SEG_{len(self.segments) + 1}"
+        # Counter instead of len(self.segments) so ids stay unique after deletes
+        self._segment_counter += 1
+        segment_id = f"SEG_{self._segment_counter}"
+        while segment_id in self.segments:
+            self._segment_counter += 1
+            segment_id = f"SEG_{self._segment_counter}"
         segment = WireSegment(segment_id, start_node, end_node)
-        self.segments[segment.id] = segment
+        self.add_segment(segment)
         return segment
+
+    def add_segment(self, segment: WireSegment):
+        """Register an existing segment and index it by its end nodes"""
+        self.segments[segment.id] = segment
+        self.pair_index.add_segment(segment)
+        self._record(SEGMENT, ADD, segment.id, self._segment_node_ids(segment))
+        for node in (segment.start_node, segment.end_node):
+            if node is None:
+                continue
+            incident = self.adjacency.setdefault(node.id, [])
+            if segment not in incident:
+                incident.append(segment)
+            if segment not in node.connected_segments:
+                node.connected_segments.append(segment)
+
+    def remove_segment(self, segment: WireSegment):
+        """Remove a segment from the graph and the adjacency index"""
+        if self.segments.pop(segment.id, None) is not None:
+            self._record(SEGMENT, REMOVE, segment.id, self._segment_node_ids(segment))
+        self.pair_index.remove_segment(segment)
+        for node in (segment.start_node, segment.end_node):
+            if node is None:
+                continue
+            incident = self.adjacency.get(node.id)
+            if incident and segment in incident:
+                incident.remove(segment)
+                if not incident:
+                    del self.adjacency[node.id]
+            if segment in node.connected_segments:
+                node.connected_segments.remove(segment)
+
+    @staticmethod
+    def _segment_node_ids(segment) -> tuple:
+        return tuple(node.id for node in (segment.start_node, segment.end_node) if node is not None)
+
+    def segments_at(self, node: TopologyNode) -> List[WireSegment]:
+        """Segments incident to a node"""
+        return self.adjacency.get(node.id, [])
+
+    def clear_segments(self):
+        """Drop all segments and reset the adjacency index"""
+        for node in self.nodes.values():
+            node.connected_segments = []
+        self.segments.clear()
+        self.adjacency.clear()
+        self.pair_index.clear_segments()
+        self._record(TOPOLOGY, CLEAR, "segments")
+
+    def rebuild_adjacency(self):
+        """Rebuild the adjacency index from self.segments"""
+        self.adjacency.clear()
+        self.pair_index.clear_segments()
+        for segment in list(self.segments.values()):
+            self.add_segment(segment)
+
+    def segment_between(self, node1: TopologyNode, node2: TopologyNode) -> Optional[WireSegment]:
+        """Existing segment between two nodes (either direction)"""
+        return self.pair_index.segment_between(node1, node2)
+
+    def index_bundle(self, bundle):
+        """File a bundle under its end nodes; call again when its nodes change"""
+        if self.pair_index.add_bundle(bundle):
+            self._record(BUNDLE, ADD, bundle.bundle_id, self._segment_node_ids(bundle))
+
+    def unindex_bundle(self, bundle):
+        if self.pair_index.remove_bundle(bundle):
+            self._record(BUNDLE, REMOVE, bundle.bundle_id, self._segment_node_ids(bundle))
+
+    def bundle_changed(self, bundle):
+        """A bundle's routing length changed"""
+        self._record(BUNDLE, CHANGE, bundle.bundle_id, self._segment_node_ids(bundle))
+
+    def clear_bundle_index(self):
+        self.pair_index.clear_bundles()
+        self._record(TOPOLOGY, CLEAR, "bundles")
+
+    def bundles_at(self, node: TopologyNode) -> List:
+        """Indexed bundles with an end at the node"""
+        return self.pair_index.bundles_at(node)
+
+    def bundle_between(self, node1: TopologyNode, node2: TopologyNode, key=None):
+        """Bundle between two nodes (either direction), smallest key(bundle) if several"""
+        return self.pair_index.bundle_between(node1, node2, key)
     def create_bundle_from_segment(self, segment: WireSegment) -> BundleItem:
         """Create a graphics bundle from a topology segment"""
         from graphics.bundle_item import BundleItem
@@ -86,104 +252,320 @@ class TopologyManager:
         bundle.auto_created = True
         
         self.bundles[bundle.bundle_id] = bundle
+        self.index_bundle(bundle)
         return bundle
 
 
     def find_path(self, start_node: TopologyNode, end_node: TopologyNode) -> List[WireSegment]:
-        """Find shortest path between two nodes using BFS"""
+        """Find shortest path (fewest segments) between two nodes using BFS"""
         if start_node == end_node:
             return []
         
-        visited = set()
-        queue = [(start_node, [])]
+        # node id -> (previous node, segment used to reach it)
+        parents = {start_node.id: None}
+        queue = deque([start_node])
         
         while queue:
-            current_node, path = queue.pop(0)
+            current_node = queue.popleft()
             
-            if current_node == end_node:
-                return path
+            if current_node.id == end_node.id:
+                return self._walk_parents(parents, current_node.id)
             
-            if current_node.id in visited:
+            for segment in self.adjacency.get(current_node.id, ()):
+                next_node = segment.end_node if segment.start_node == current_node else segment.start_node
+                if next_node is not None and next_node.id not in parents:
+                    parents[next_node.id] = (current_node, segment)
+                    queue.append(next_node)
+        
+        return []  # No path found
+
+    def find_weighted_path(self, start_node: TopologyNode, end_node: TopologyNode) -> Tuple[List[WireSegment], float]:
+        """Find the physically shortest path using A*, returns (segments, length)"""
+        if start_node == end_node:
+            return [], 0.0
+        
+        scale = self._get_heuristic_scale()
+        goal_x, goal_y = end_node.position[0], end_node.position[1]
+        
+        def heuristic(node):
+            return scale * math.hypot(node.position[0] - goal_x, node.position[1] - goal_y)
+        
+        dist = {start_node.id: 0.0}
+        parents = {start_node.id: None}
+        closed = set()
+        tie = itertools.count()  # nodes are not comparable, break ties by insertion order
+        heap = [(heuristic(start_node), next(tie), start_node)]
+        
+        while heap:
+            _, _, current_node = heapq.heappop(heap)
+            if current_node.id in closed:
                 continue
-                
-            visited.add(current_node.id)
+            if current_node.id == end_node.id:
+                return self._walk_parents(parents, current_node.id), dist[current_node.id]
+            closed.add(current_node.id)
             
-            # Check all segments connected to current node
-            for segment in self.segments.values():
-                next_node = None
-                if segment.start_node == current_node:
-                    next_node = segment.end_node
-                elif segment.end_node == current_node:
-                    next_node = segment.start_node
-                
-                if next_node and next_node.id not in visited:
-                    queue.append((next_node, path + [segment]))
+            current_dist = dist[current_node.id]
+            for segment in self.adjacency.get(current_node.id, ()):
+                next_node = segment.end_node if segment.start_node == current_node else segment.start_node
+                if next_node is None or next_node.id in closed:
+                    continue
+                candidate = current_dist + self.segment_length(segment)
+                if candidate < dist.get(next_node.id, math.inf):
+                    dist[next_node.id] = candidate
+                    parents[next_node.id] = (current_node, segment)
+                    heapq.heappush(heap, (candidate + heuristic(next_node), next(tie), next_node))
         
-        return []  # No path found
+        return [], 0.0  # No path found
+
+    def find_route(self, start_node: TopologyNode, end_node: TopologyNode, mode: str = None) -> Tuple[List[WireSegment], float]:
+        """Find a path in the given routing mode, returns (segments, length)"""
+        mode = mode or self.routing_mode()
+        # Tree components have a single path, the oracle answers it for both modes
+        oracle = self.path_oracle()
+        if oracle.covers(start_node, end_node):
+            return oracle.find_path(start_node, end_node)
+        if mode == ROUTE_LENGTH:
+            return self.find_weighted_path(start_node, end_node)
+        path = self.find_path(start_node, end_node)
+        return path, self.path_length(path)
+
+    def routing_mode(self) -> str:
+        """Routing mode from settings, defaults to shortest length"""
+        settings = getattr(self.main_window, 'settings_manager', None)
+        if settings:
+            return settings.get('routing_mode', ROUTE_LENGTH)
+        return ROUTE_LENGTH
+
+    def _walk_parents(self, parents, node_id) -> List[WireSegment]:
+        """Rebuild a segment path from search parent pointers"""
+        path = []
+        while parents[node_id] is not None:
+            prev_node, segment = parents[node_id]
+            path.append(segment)
+            node_id = prev_node.id
+        path.reverse()
+        return path
+
+    def segment_length(self, segment: WireSegment) -> float:
+        """Routing length of a segment: specified length if set, geometric otherwise"""
+        specified = getattr(segment, 'specified_length', None)
+        if specified is None:
+            # Bundles created from segments keep the user override
+            specified = getattr(getattr(segment, 'graphics_item', None), 'specified_length', None)
+        if specified is not None:
+            return float(specified)
+        return self._node_distance(segment.start_node, segment.end_node)
+
+    def path_length(self, segments: List[WireSegment]) -> float:
+        """Accumulated length of a segment path"""
+        return sum(self.segment_length(segment) for segment in segments)
+
+    def invalidate_lengths(self):
+        """Call when a specified length, node position or the graph changes"""
+        self._heuristic_scale = None
+        self._path_oracle = None
+
+    def path_oracle(self):
+        """Tree path oracle for the current topology"""
+        if self._path_oracle is None:
+            from model.path_oracle import TreePathOracle
+            self._path_oracle = TreePathOracle(self.adjacency, self.segment_length)
+        return self._path_oracle
+
+    def arrays(self):
+        """Columnar (NumPy) mirror of the topology, brought up to date on access"""
+        if self._arrays is None:
+            from model.topology_arrays import TopologyArrays
+            self._arrays = TopologyArrays(self)
+        return self._arrays.sync()
+
+    def _get_heuristic_scale(self) -> float:
+        """
+        Largest k with k * straight-line distance <= length for every segment.
+        Specified lengths are in mm while positions are in workspace units, so
+        the straight-line heuristic has to be scaled to stay admissible.
+        """
+        if self._heuristic_scale is None:
+            self._heuristic_scale = self.arrays().heuristic_scale()
+        return self._heuristic_scale
+
+    @staticmethod
+    def _node_distance(node1: TopologyNode, node2: TopologyNode) -> float:
+        if node1 is None or node2 is None:
+            return 0.0
+        return math.hypot(node1.position[0] - node2.position[0], node1.position[1] - node2.position[1])
     
     def route_wire(self, from_pin: PinItem, to_pin: PinItem, 
-                   via_nodes: List[TopologyNode] = None,wid:str=None,import_wire = None) -> Optional[Wire]:
+                   via_nodes: List[TopologyNode] = None,wid:str=None,import_wire = None, mode: str = None) -> Optional[Wire]:
         """Route a wire through the topology graph"""
-        from_connector = from_pin.parent
-        to_connector = to_pin.parent
-        
-        # Get connector nodes
-        from_node = from_connector.topology_node
-        to_node = to_connector.topology_node
-        
-        if not from_node or not to_node:
-            print("Connector missing topology node")
-            return None
-        
-        # Build path nodes
-        path_nodes = []
-        path_nodes.append(from_node)
-        if via_nodes:
-            path_nodes.extend(via_nodes)
-        if to_node != from_node:
-            path_nodes.append(to_node)
-        
-        # Find segments between consecutive nodes
-        wire_segments = []
-        for i in range(len(path_nodes) - 1):
-            path = self.find_path(path_nodes[i], path_nodes[i + 1])
-            if not path:
-                # No path exists - create direct segment
-                print(f"Creating direct segment between nodes")
-                segment = self.create_segment(path_nodes[i], path_nodes[i + 1])
-                path = [segment]
-            wire_segments.extend(path)
-        
-        if not wire_segments:
-            print("No path found")
-            return None
-        
-        # Create wire
-        wire_id = f"W{len(self.wires) + 1}"
-        
-        # Import here to avoid circular imports
-        from model.wire import Wire
-        if not import_wire:
-            wire = Wire(wire_id, from_pin, to_pin,wid)
-        else:
-            wire = Wire(wire_id =wire_id, from_pin=from_pin, to_pin =to_pin, color_txt = import_wire.color,cross_section= import_wire.cross_section)
+        request = RouteRequest(from_pin, to_pin, via_nodes or [], wid, import_wire)
+        result = self.route_wires([request], mode)[0]
+        if result.error:
+            print(result.error)
+        return result.wire
+
+    def route_wires(self, requests: List['RouteRequest'], mode: str = None,
+                    create_wires: bool = True, create_missing: bool = True) -> List['RouteResult']:
+        """
+        Route many wires at once. Requests are bucketed by (from node, to node,
+        via nodes) so every distinct path is searched only once, then the
+        segments are attached to all wires of the bucket in bulk.
+        Returns one RouteResult per request, in request order.
+        create_wires=False only resolves paths (segments and length).
+        create_missing=False reports unconnected pairs instead of creating
+        a direct segment for them.
+        """
+        mode = mode or self.routing_mode()
+        results = [RouteResult(request) for request in requests]
+        
+        # Bucket requests by endpoints
+        buckets: Dict[tuple, List[int]] = {}
+        bucket_nodes: Dict[tuple, List[TopologyNode]] = {}
+        for i, request in enumerate(requests):
+            from_node = getattr(request.from_pin.parent, 'topology_node', None)
+            to_node = getattr(request.to_pin.parent, 'topology_node', None)
+            if not from_node or not to_node:
+                results[i].error = "Connector missing topology node"
+                continue
             
-        # Add wire to each segment
-        for segment in wire_segments:
-            wire.add_segment(segment)
-            if wire not in segment.wires:
-                segment.wires.append(wire)
+            via_nodes = list(request.via_nodes or [])
+            key = (from_node.id, to_node.id, tuple(node.id for node in via_nodes))
+            if key not in buckets:
+                # Build path nodes
+                path_nodes = [from_node] + via_nodes
+                if to_node != from_node:
+                    path_nodes.append(to_node)
+                buckets[key] = []
+                bucket_nodes[key] = path_nodes
+            buckets[key].append(i)
         
-        self.wires[wire.id] = wire
+        # Every distinct leg (consecutive path node pair) is searched once
+        legs: List[Tuple[TopologyNode, TopologyNode]] = []
+        leg_index: Dict[Tuple[str, str], int] = {}
+        for path_nodes in bucket_nodes.values():
+            for i in range(len(path_nodes) - 1):
+                leg = (path_nodes[i].id, path_nodes[i + 1].id)
+                if leg not in leg_index:
+                    leg_index[leg] = len(legs)
+                    legs.append((path_nodes[i], path_nodes[i + 1]))
+        resolved = self._resolve_legs(legs, mode)
         
-        # Create net if netlist exists
-        if self.netlist:
-            net = self.netlist.connect(from_pin, to_pin)
-            wire.net = net
+        connections = []  # (result index, (from pin, to pin)), in bucket order
         
-
-        return wire
+        # The only edits below are direct segments between nodes without a
+        # path, i.e. joining two components: paths inside either one stay the
+        # same and a plain segment doesn't lower the A* scale, so the oracle
+        # and the scale stay valid until the batch is done
+        self._defer_invalidation = True
+        try:
+            self._attach_buckets(buckets, bucket_nodes, leg_index, resolved, results,
+                                 connections, mode, create_wires, create_missing)
+        finally:
+            self._defer_invalidation = False
+            if self._lengths_stale:
+                self._lengths_stale = False
+                self.invalidate_lengths()
+        
+        # Create nets if netlist exists
+        if self.netlist and connections:
+            nets = self.netlist.connect_many(pins for _, pins in connections)
+            for (i, _), net in zip(connections, nets):
+                results[i].wire.net = net
+        
+        return results
+    
+    def _attach_buckets(self, buckets, bucket_nodes, leg_index, resolved, results,
+                        connections, mode, create_wires, create_missing):
+        """Chain the legs of every bucket and create its wires, the second half of route_wires"""
+        from model.wire import Wire
+        direct_segments = False
+        
+        for key, indexes in buckets.items():
+            path_nodes = bucket_nodes[key]
+            
+            # Chain the legs of the bucket
+            wire_segments = []
+            total_length = 0.0
+            missing = False
+            for i in range(len(path_nodes) - 1):
+                leg = leg_index[(path_nodes[i].id, path_nodes[i + 1].id)]
+                path, length = resolved.get(leg, ([], 0.0))
+                if not path and direct_segments:
+                    # A direct segment created for an earlier leg may connect this one
+                    path, length = self.find_route(path_nodes[i], path_nodes[i + 1], mode)
+                if not path:
+                    if not create_missing:
+                        missing = True
+                        break
+                    # No path exists - create direct segment
+                    print(f"Creating direct segment between nodes")
+                    segment = self.create_segment(path_nodes[i], path_nodes[i + 1])
+                    path = [segment]
+                    length = self.segment_length(segment)
+                    resolved[leg] = (path, length)
+                    direct_segments = True
+                wire_segments.extend(path)
+                total_length += length
+            
+            if missing or not wire_segments:
+                for i in indexes:
+                    results[i].error = "No path found"
+                continue
+            
+            bucket_wires = []
+            for i in indexes:
+                result = results[i]
+                result.segments = wire_segments
+                result.length = total_length
+                if not create_wires:
+                    continue
+                
+                request = result.request
+                wire_id = f"W{len(self.wires) + 1}"
+                if not request.import_wire:
+                    wire = Wire(wire_id, request.from_pin, request.to_pin, request.wid)
+                else:
+                    wire = Wire(wire_id =wire_id, from_pin=request.from_pin, to_pin =request.to_pin,
+                                color_txt = request.import_wire.color,cross_section= request.import_wire.cross_section)
+                wire.segments = list(wire_segments)
+                wire.length = total_length
+                self.wires[wire.id] = wire
+                result.wire = wire
+                bucket_wires.append(wire)
+                connections.append((i, (request.from_pin, request.to_pin)))
+            
+            # Add all wires of the bucket to each segment, once
+            for segment in wire_segments:
+                on_segment = {id(wire) for wire in segment.wires}
+                for wire in bucket_wires:
+                    if id(wire) not in on_segment:
+                        segment.wires.append(wire)
+                        on_segment.add(id(wire))
     
+    def _resolve_legs(self, legs: List[Tuple[TopologyNode, TopologyNode]], mode: str) -> Dict[int, Tuple[List[WireSegment], float]]:
+        """
+        Paths for a list of node pairs, {leg index: (segments, length)} for
+        the legs that have one. With routing_workers > 1 and enough legs the
+        connected components are routed in worker processes.
+        """
+        settings = getattr(self.main_window, 'settings_manager', None)
+        workers = settings.get('routing_workers', 0) if settings else 0
+        
+        from model.parallel_routing import PARALLEL_MIN_LEGS, route_legs_parallel
+        if workers and workers > 1 and len(legs) >= PARALLEL_MIN_LEGS:
+            try:
+                return route_legs_parallel(self, legs, mode, workers)
+            except Exception as e:
+                # Worker start-up can fail (frozen builds, sandboxing), route inline instead
+                print(f"Parallel routing failed, routing inline: {e}")
+        
+        resolved = {}
+        for index, (start, end) in enumerate(legs):
+            path, length = self.find_route(start, end, mode)
+            if path:
+                resolved[index] = (path, length)
+        return resolved
+
     def split_segment(self, segment: WireSegment, split_position, create_junction=True) -> List[WireSegment]:
         """Split a segment at a position"""
         if create_junction:
@@ -194,23 +576,42 @@ class TopologyManager:
             seg1 = self.create_segment(segment.start_node, junction)
             seg2 = self.create_segment(junction, segment.end_node)
             
-            # Transfer wires from old segment to new segments
+            # Transfer wires from old segment to new segments, keeping path order
             for wire in segment.wires[:]:  # Copy list
-                wire.segments.remove(segment)
-                wire.add_segment(seg1)
-                wire.add_segment(seg2)
+                index = wire.segments.index(segment)
+                if self._runs_backwards(wire, index):
+                    wire.segments[index:index + 1] = [seg2, seg1]
+                else:
+                    wire.segments[index:index + 1] = [seg1, seg2]
                 seg1.wires.append(wire)
                 seg2.wires.append(wire)
             
             # Remove old segment
-            if segment.id in self.segments:
-                del self.segments[segment.id]
+            self.remove_segment(segment)
+            self._record(SEGMENT, SPLIT, segment.id,
+                         (segment.start_node.id, junction.id, segment.end_node.id), (seg1.id, seg2.id))
             
             return [seg1, seg2]
         return [segment]
+    
+    @staticmethod
+    def _runs_backwards(wire, index: int) -> bool:
+        """Whether a wire crosses wire.segments[index] from its end node to its start node"""
+        path = wire.segments
+        segment = path[index]
+        if index > 0:
+            previous = path[index - 1]
+            return segment.start_node not in (previous.start_node, previous.end_node)
+        if index + 1 < len(path):
+            following = path[index + 1]
+            return segment.end_node not in (following.start_node, following.end_node)
+        # A single segment, the wire starts at its from pin's node
+        from_node = getattr(getattr(wire.from_pin, 'parent', None), 'topology_node', None)
+        return from_node is segment.end_node
+    
     def create_fastener_node(self, position, fastener_type="cable_tie", part_number=None):
         """Create a new fastener node"""
         from model.topology import FastenerNode
         fastener = FastenerNode(position, fastener_type, part_number)
-        self.nodes[fastener.id] = fastener
+        self.add_node(fastener)
         return fastener
\ No newline at end of file
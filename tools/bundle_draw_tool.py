@@ -324,7 +324,7 @@ class BundleDrawTool(QObject):
             node = BranchPointNode((end_pos.x(), end_pos.y()), "junction")
             graphics = BranchPointGraphicsItem(node)
             self.scene.addItem(graphics)
-            self.main_window.topology_manager.nodes[node.id] = node
+            self.main_window.topology_manager.add_node(node)
             end_node = node
             end_item = graphics
         
@@ -8,7 +8,7 @@ from PyQt5.QtWidgets import (
     QTreeWidget, QTreeWidgetItem, QHeaderView, QShortcut,
     QMessageBox, QInputDialog, QFileDialog
 )
-from PyQt5.QtCore import Qt, QPointF
+from PyQt5.QtCore import Qt, QPointF, QTimer
 from PyQt5.QtGui import QKeySequence, QIcon, QPainter
 
 from graphics.schematic_view import SchematicView
@@ -17,10 +17,13 @@ from graphics.wire_item import WireItem
 from model.netlist import Netlist
 from model.models import WiringHarness
 from model.topology_manager import TopologyManager
+from model.bundle_graph import BundleGraph
+from model.route_cache import RouteCache
 from graphics.visualization_manager import VisualizationManager
 from commands.undo_manager import UndoManager
 from utils.settings_manager import SettingsManager
 from utils.update_dispatcher import UpdateDispatcher
+from utils.autosave import AutosaveService
 from database.project_db import ProjectFileHandler
 
 # Import UI components
@@ -63,9 +66,18 @@ class MainWindow(QMainWindow):
         self.wiringharness = WiringHarness()
         
         self.topology_manager = TopologyManager(self)
+        # Routing graph over the bundles for the whole session, kept in step
+        # with the bundle commands through the topology journal
+        self.bundle_graph = BundleGraph(self.topology_manager)
+        # Bundle routes of earlier runs, see BundleRouter._route_cached
+        self.route_cache = RouteCache()
+        # Viewport-first open still creating items, see SceneLoader
+        self.scene_loader = None
+        self.autosave = AutosaveService(self)
         self.update_dispatcher = UpdateDispatcher()
         self.viz_manager = VisualizationManager(self)
         self.project_handler = ProjectFileHandler()
+        self.project_handler.use_snapshots = self.settings_manager.get('project_snapshots', True)
         
         # Connect signals
         self.update_dispatcher.connector_moved.connect(self.on_connector_moved)
@@ -87,12 +99,14 @@ class MainWindow(QMainWindow):
         # Final setup
         self.refresh_connector_labels()
         self.statusBar().showMessage("Loading complete...", 0)
+        self.autosave.start()
+        QTimer.singleShot(0, self.autosave.offer_recovery)
     def export_to_excel(self):
         """ tbd """
-        pass
+        ProjectController.finish_loading(self)
     def export_hdt(self):
         """ tbd """
-        pass
+        ProjectController.finish_loading(self)
     def setup_scene(self):
         """Setup graphics scene and view"""
         self.scene = QGraphicsScene(-2000, -2000, 4000, 4000)
@@ -361,8 +375,9 @@ class MainWindow(QMainWindow):
         """Refresh all connector info labels"""
         for item in self.conns:
             if isinstance(item, ConnectorItem):
-                item.info.update_text()
-                item.info_table.update_table()
+                if hasattr(item, 'info'):
+                    item.info.update_text()
+                item.update_info_display()
     
     def refresh_tree_views(self):
         """Refresh tree widget contents"""
@@ -611,6 +626,8 @@ class MainWindow(QMainWindow):
         )
         
         if reply == QMessageBox.Yes:
+            # Routes every wire, the ones a viewport-first open hasn't created yet too
+            ProjectController.finish_loading(self)
             self.auto_router.clear_topology()
             success = self.auto_router.route_from_imported_data()
             
@@ -623,6 +640,8 @@ class MainWindow(QMainWindow):
     
     def clear_topology(self):
         """Remove all branch points and segments, keep connectors and wires"""
+        # A load still running would restore its saved routes after the clear
+        ProjectController.finish_loading(self)
         if hasattr(self, 'auto_router'):
             self.auto_router.clear_topology()
             self.statusBar().showMessage("Topology cleared", 3000)
@@ -676,6 +695,8 @@ class MainWindow(QMainWindow):
         
         self.view.setRenderHint(QPainter.Antialiasing, 
                                self.settings_manager.get('antialiasing', True))
+        self.autosave.start()
+        self.project_handler.use_snapshots = self.settings_manager.get('project_snapshots', True)
         
         self.statusBar().showMessage("Settings updated", 3000)
     
@@ -717,6 +738,10 @@ class MainWindow(QMainWindow):
         """Publish current project to central database"""
         ProjectController.publish_project(self)
     
+    def open_archived_version(self):
+        """Open a version archived when publishing"""
+        ProjectController.open_archived_version(self)
+    
     def open_from_database(self):
         """Open a project from central database"""
         ProjectController.open_from_database(self)
@@ -727,6 +752,7 @@ class MainWindow(QMainWindow):
     
     def clear_scene(self):
         """Clear the scene and all associated data"""
+        ProjectController.stop_loading(self)
         self.objects_dock.connectors_tree.clear()
         self.objects_dock.wires_tab.wires_tree.clear()
         if hasattr(self, 'bundles_tree'):
@@ -753,8 +779,15 @@ class MainWindow(QMainWindow):
         
         self.wires.clear()
         
+        if hasattr(self, 'auto_router'):
+            # Its items go with the scene
+            self.auto_router.bundles.clear()
+            self.auto_router.branch_points.clear()
+            self.auto_router.segment_items.clear()
+        
+        self.topology_manager.clear_segments()
+        self.topology_manager.clear_bundle_index()
         self.topology_manager.nodes.clear()
-        self.topology_manager.segments.clear()
         self.topology_manager.wires.clear()
         
         self.scene.clear()
@@ -771,10 +804,14 @@ class MainWindow(QMainWindow):
             
             if reply == QMessageBox.Yes:
                 self.save_project()
+                # Autosaves stay for recovery if the save failed
+                self.autosave.shutdown(discard=not self.project_handler.modified)
                 event.accept()
             elif reply == QMessageBox.No:
+                self.autosave.shutdown()
                 event.accept()
             else:
                 event.ignore()
         else:
+            self.autosave.shutdown(discard=self.undo_manager.undo_stack.isClean())
             event.accept()
@@ -342,20 +342,24 @@ class WiresTab(QWidget):
     def route_single_wire_through_bundles(self, wire_item, wire_data):
         """Route a single wire through existing bundles"""
         from utils.bundle_router import BundleRouter
+        from controllers.project_controller import ProjectController
         
+        # The saved routes a load still running restores would overwrite this one
+        ProjectController.finish_loading(self.main_window)
         router = BundleRouter(self.main_window)
         wire_item.setVisible(False)
         
         wires = [wire_item]
         bundles = getattr(self.main_window, 'bundles', [])
         
-        router._ensure_bundle_nodes(bundles)
-        graph = router._build_bundle_graph(bundles)
+        # Bundle commands index their bundles, only unindexed ones need nodes
+        if self.main_window.topology_manager.pair_index.bundle_count() != len(bundles):
+            router._ensure_bundle_nodes(bundles)
         
         created_segments = []
         routed_wires = []
         
-        success = router._route_single_wire(wire_item, bundles, graph, created_segments, routed_wires)
+        success = router._route_single_wire(wire_item, bundles, created_segments, routed_wires)
         
         if success and routed_wires:
             if not hasattr(self.main_window, 'routed_wire_items'):
@@ -12,6 +12,7 @@ class HarnessAutoRouter:
         self.main_window = main_window
         self.bundles = []
         self.branch_points = []
+        self.segment_items = []  # Segments without a bundle, restored with a saved project
         
     def route_from_imported_data(self):
         """
@@ -42,12 +43,15 @@ class HarnessAutoRouter:
         
         # Clear existing topology
         self.clear_topology()
+        base_version = self.topology_manager.version
         
-        # Analyze wire patterns
-        wire_groups = self._group_wires_by_path(wire_items)
-        
-        # Create branch points and segments
-        self._create_topology_from_groups(wire_groups)
+        # Plan branch points and bundles headless, then build them in the scene
+        from utils.routing_engine import RoutingEngine
+        problem = self._routing_problem(wire_items)
+        settings = self.main_window.settings_manager
+        engine = RoutingEngine(hub_threshold=settings.get('auto_route_threshold', 2),
+                               topology=settings.get('auto_topology', 'hub'))
+        self._apply_topology_plan(engine.plan_topology(problem))
         
         # Add segmented wire visualization
         self._add_segmented_visualization(wire_items)
@@ -66,8 +70,12 @@ class HarnessAutoRouter:
             self.main_window.viz_manager.show_direct_wires = False
             self.main_window.viz_manager.update_visibility()
         
-        # Force update of connectors to refresh wires
+        # Refresh only connectors whose topology changed during routing
+        changes = self.topology_manager.changes_since(base_version)
+        touched = None if changes is None else self.topology_manager.journal.affected_nodes(changes)
         for c in self.main_window.conns:
+            if touched is not None and (c.topology_node is None or c.topology_node.id not in touched):
+                continue
             c.update()
             c._update_connected_segments()
         
@@ -90,191 +98,94 @@ class HarnessAutoRouter:
 
 
     
-    def _group_wires_by_path(self, wire_items):
-        """Group wires that share common paths"""
-        from collections import defaultdict
+    def _routing_problem(self, wire_items):
+        """Connectors and wires of the scene as a headless RoutingProblem"""
+        from utils.routing_engine import RoutingProblem, RoutingNode, RoutingWire
         
-        connections = defaultdict(list)
+        problem = RoutingProblem()
+        for conn in self.main_window.conns:
+            if conn.topology_node:
+                problem.nodes[conn.topology_node.id] = RoutingNode(
+                    conn.topology_node.id, (conn.pos().x(), conn.pos().y()))
         
         for wire in wire_items:
-            from_conn = wire.start_pin.parent
-            to_conn = wire.end_pin.parent
-            key = (from_conn.cid, to_conn.cid)
-            connections[key].append(wire)
-        
-        # Find connectors that appear frequently (hub candidates)
-        connector_frequency = defaultdict(int)
-        for (from_id, to_id), wires in connections.items():
-            connector_frequency[from_id] += len(wires)
-            connector_frequency[to_id] += len(wires)
-        
-        # Identify central connectors (hubs)
-        central_connectors = []
-        for conn_id, freq in connector_frequency.items():
-            if freq > 2:  # Adjust threshold
-                central_connectors.append(conn_id)
-        
-        print(f"Identified central connectors: {central_connectors}")
-        
-        # Group wires
-        groups = {
-            'direct': [],  # Direct connections (no branch needed)
-            'via_central': defaultdict(list)  # via_central[central_id] = list of wires
-        }
+            from_node = wire.start_pin.parent.topology_node
+            to_node = wire.end_pin.parent.topology_node
+            problem.wires.append(RoutingWire(
+                wire.wid,
+                from_node.id if from_node else None,
+                to_node.id if to_node else None
+            ))
+        return problem
+    
+    def _apply_topology_plan(self, plan):
+        """Create the planned branch points and bundles - USING BUNDLEITEM"""
+        from graphics.topology_item import BranchPointGraphicsItem
         
-        for (from_id, to_id), wires in connections.items():
-            if from_id in central_connectors:
-                groups['via_central'][from_id].extend(wires)
-            elif to_id in central_connectors:
-                groups['via_central'][to_id].extend(wires)
-            else:
-                groups['direct'].extend(wires)
+        nodes = {conn.topology_node.id: conn.topology_node
+                 for conn in self.main_window.conns if conn.topology_node}
         
-        return groups
-    
-    def _create_topology_from_groups(self, wire_groups):
-        """Create branch points and bundles - USING BUNDLEITEM"""
-        
-        # Create branch points for central connectors
-        central_bps = {}
-        
-        for central_id, wires in wire_groups['via_central'].items():
-            # Find the central connector
-            central_conn = None
-            for conn in self.main_window.conns:
-                if conn.cid == central_id:
-                    central_conn = conn
-                    break
-            
-            if not central_conn:
-                continue
-            
-            # Create branch point near the central connector
-            pos = (central_conn.pos().x() + 80, central_conn.pos().y() - 20)
-            bp = self.topology_manager.create_branch_point(pos, "split")
-            
-            # Create graphics
-            from graphics.topology_item import BranchPointGraphicsItem
+        for planned in plan.branch_points:
+            bp = self.topology_manager.create_branch_point(planned.position, "split")
             bp_graphics = BranchPointGraphicsItem(bp)
             self.main_window.scene.addItem(bp_graphics)
             self.branch_points.append(bp_graphics)
+            nodes[planned.id] = bp
+        
+        for planned in plan.bundles:
+            start_node = nodes.get(planned.start_id)
+            end_node = nodes.get(planned.end_id)
+            if start_node is None or end_node is None:
+                continue
             
-            # Create segment in topology manager
-            seg = self.topology_manager.create_segment(
-                central_conn.topology_node,
-                bp
-            )
-            
-            # Create BUNDLE from the segment
-            from graphics.bundle_item import BundleItem
+            # Create segment, then the bundle from it
+            seg = self.topology_manager.create_segment(start_node, end_node)
             bundle = self.topology_manager.create_bundle_from_segment(seg)
             self.main_window.scene.addItem(bundle)
             self.main_window.bundles.append(bundle)
             self.bundles.append(bundle)  # Store for undo
-            
-            central_bps[central_id] = (bp, bundle)
-        
-        # Create segments from branch points to other connectors
-        for central_id, (bp_node, trunk_bundle) in central_bps.items():
-            central_conn = None
-            for conn in self.main_window.conns:
-                if conn.cid == central_id:
-                    central_conn = conn
-                    break
-            
-            if not central_conn:
-                continue
-            
-            # Find all other connectors that connect to this central
-            connected_connectors = set()
-            for wire in wire_groups['via_central'][central_id]:
-                if wire.start_pin.parent != central_conn:
-                    connected_connectors.add(wire.start_pin.parent)
-                if wire.end_pin.parent != central_conn:
-                    connected_connectors.add(wire.end_pin.parent)
-            
-            # Create bundles to each connected connector
-            for other_conn in connected_connectors:
-                existing = self._find_bundle(bp_node, other_conn.topology_node)
-                if not existing:
-                    # Create segment
-                    seg = self.topology_manager.create_segment(
-                        bp_node,
-                        other_conn.topology_node
-                    )
-                    # Create bundle
-                    bundle = self.topology_manager.create_bundle_from_segment(seg)
-                    self.main_window.scene.addItem(bundle)
-                    self.main_window.bundles.append(bundle)
-                    self.bundles.append(bundle)
-        
-        # Handle direct connections (no branch point)
-        for wire in wire_groups['direct']:
-            self._create_direct_bundle(wire)
-
-    
-    def _create_direct_bundle(self, wire_item):
-        """Create direct bundle between two connectors"""
-        from_node = wire_item.start_pin.parent.topology_node
-        to_node = wire_item.end_pin.parent.topology_node
-        
-        # Check if bundle already exists
-        existing = self._find_bundle(from_node, to_node)
-        if existing:
-            return existing
-        
-        # Create segment
-        segment = self.topology_manager.create_segment(from_node, to_node)
-        
-        # Create bundle
-        bundle = self.topology_manager.create_bundle_from_segment(segment)
-        self.main_window.scene.addItem(bundle)
-        self.main_window.bundles.append(bundle)
-        self.bundles.append(bundle)
-        
-        return bundle
 
     
     def _find_bundle(self, node1, node2):
         """Find existing bundle between two nodes"""
-        for bundle in self.main_window.bundles:
-            if (bundle.start_node == node1 and bundle.end_node == node2) or \
-               (bundle.start_node == node2 and bundle.end_node == node1):
-                return bundle
-        return None
+        return self.topology_manager.bundle_between(node1, node2)
 
     
     def _add_segmented_visualization(self, wire_items):
         """ADD segmented wire visualization - unchanged"""
         # This method stays the same
         from graphics.wire_item import SegmentedWireItem
+        from model.topology_manager import RouteRequest
         
         # Group wires that share the same path
         wire_paths = {}
         
-        for wire_item in wire_items:
-            from_pin = wire_item.start_pin
-            to_pin = wire_item.end_pin
-            
-            # Find path through topology
-            from_node = from_pin.parent.topology_node
-            to_node = to_pin.parent.topology_node
-            
-            path = self.topology_manager.find_path(from_node, to_node)
+        # Resolve all paths in one batch, each connector pair is searched once
+        requests = [RouteRequest(wire_item.start_pin, wire_item.end_pin, tag=wire_item)
+                    for wire_item in wire_items]
+        results = self.topology_manager.route_wires(requests, create_wires=False, create_missing=False)
+        
+        for result in results:
+            wire_item = result.request.tag
+            from_node = wire_item.start_pin.parent.topology_node
+            to_node = wire_item.end_pin.parent.topology_node
+            path, length = result.segments, result.length
             
-            if path:
+            if result.ok and path:
                 # Create key from node IDs in path
                 path_key = tuple([from_node.id] + [p.id for p in path] + [to_node.id])
                 
                 if path_key not in wire_paths:
                     wire_paths[path_key] = {
                         'path': path,
+                        'length': length,
                         'from_node': from_node,
                         'to_node': to_node,
                         'wires': []
                     }
                 
                 wire_paths[path_key]['wires'].append(wire_item)
+                wire_item.routed_length = length
         
         # Create one SegmentedWireItem per unique path
         for path_key, path_info in wire_paths.items():
@@ -295,6 +206,7 @@ class HarnessAutoRouter:
             # Copy properties
             wire.color_data = template_wire.color_data
             wire.color = template_wire.color
+            wire.length = path_info['length']
             
             # Add segments
             for segment in path_info['path']:
@@ -326,9 +238,10 @@ class HarnessAutoRouter:
         for bundle in self.bundles:
             if bundle.scene():
                 self.main_window.scene.removeItem(bundle)
+            self.topology_manager.unindex_bundle(bundle)
         
-        # Remove branch point graphics
-        for item in self.branch_points:
+        # Remove branch point and segment graphics
+        for item in self.branch_points + self.segment_items:
             if item.scene():
                 self.main_window.scene.removeItem(item)
         
@@ -340,7 +253,7 @@ class HarnessAutoRouter:
             self.main_window.routed_wire_items = []
         
         # Clear topology data but KEEP connector nodes
-        self.topology_manager.segments.clear()
+        self.topology_manager.clear_segments()
         self.topology_manager.bundles.clear()
         self.topology_manager.nodes = {
             k: v for k, v in self.topology_manager.nodes.items()
@@ -350,6 +263,7 @@ class HarnessAutoRouter:
         
         self.bundles.clear()
         self.branch_points.clear()
+        self.segment_items.clear()
         
         print("Topology cleared - original wires preserved")
 
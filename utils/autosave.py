@@ -0,0 +1,293 @@
+#utils/autosave
+import hashlib
+import os
+import re
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+from PyQt5.QtWidgets import QApplication, QMessageBox
+
+from database.project_db import ProjectDatabase
+from database.project_snapshot import SNAPSHOT_SUFFIX
+
+# Retry delay when a tick comes in while the user is dragging something
+AUTOSAVE_RETRY_MS = 2000
+
+AUTOSAVE_SUFFIX = ".autosave"
+
+
+class AutosaveService(QObject):
+    """
+    Periodic autosave of the open project to autosave_path.
+
+    Every autosave_interval minutes the project is snapshotted on the GUI
+    thread with ProjectDatabase.collect_rows (plain tuples, a few ms for 10k
+    wires) and written by a single worker thread, so a save never blocks
+    the UI. Each project keeps autosave_generations files, <name>.autosave.1.ecad
+    being the newest. A new generation is made by rotating the files up
+    one, copying the previous generation with the SQLite online backup
+    API and writing only the rows that changed since it.
+
+    Saving the project or closing cleanly removes its autosaves, so
+    anything left over at start belongs to a session that died and is
+    offered for recovery.
+    """
+
+    saved = pyqtSignal(str)  # path of the new autosave
+    failed = pyqtSignal(str)  # error message
+
+    # Worker results, handled on the GUI thread (queued) where the state lives
+    _written = pyqtSignal(int, str, object, str)  # epoch, name, saved rows, path
+    _write_failed = pyqtSignal(int, str)  # epoch, error message
+
+    def __init__(self, main_window):
+        super().__init__(main_window)
+        self.main_window = main_window
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="autosave")
+        self.pending = None  # future of the autosave being written
+        self._in_flight = False  # until its result has been handled here
+        self._last_rows = None  # rows of the newest generation, to write only changes
+        self._last_name = None
+        self._saved_state = None  # edit state last written by a save or autosave
+        self._epoch = 0  # bumped by discard(), results of autosaves from before are dropped
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.autosave)
+        self.saved.connect(lambda path: main_window.statusBar().showMessage(f"Autosaved: {path}", 3000))
+        self.failed.connect(lambda error: main_window.statusBar().showMessage(f"Autosave failed: {error}", 5000))
+        self._written.connect(self._on_written)
+        self._write_failed.connect(self._on_write_failed)
+
+    # ---- timer ----
+
+    def start(self):
+        """(Re)start the timer from autosave_interval, 0 disables autosaving"""
+        minutes = self.main_window.settings_manager.get('autosave_interval', 5)
+        self.timer.stop()
+        if minutes and minutes > 0:
+            self.timer.start(int(minutes * 60 * 1000))
+
+    def shutdown(self, discard: bool = True):
+        """Stop autosaving and wait for the worker, removing this project's autosaves on a clean exit"""
+        self.timer.stop()
+        if discard:
+            self.discard()
+        self.executor.shutdown(wait=True)
+
+    # ---- saving ----
+
+    def _edit_state(self):
+        """Changes whenever the project is edited, cheap enough to check on every tick"""
+        main_window = self.main_window
+        return (main_window.project_handler.current_path,
+                main_window.undo_manager.undo_stack.index(),
+                main_window.topology_manager.version,
+                len(getattr(main_window, 'bundles', [])),
+                len(getattr(main_window, 'imported_wire_items', [])))
+
+    def autosave(self):
+        """Snapshot the project and hand it to the worker, skipped when nothing changed"""
+        main_window = self.main_window
+        handler = main_window.project_handler
+        if handler.current_project is None or getattr(main_window, 'scene_loader', None) is not None:
+            return
+        if self._in_flight:
+            return  # previous autosave still writing, or its rows not taken over yet
+        state = self._edit_state()
+        if state == self._saved_state:
+            return
+        if QApplication.mouseButtons():
+            # Mid-drag, the model is in flux and the snapshot would compete with the drag
+            QTimer.singleShot(AUTOSAVE_RETRY_MS, self.autosave)
+            return
+
+        rows = ProjectDatabase().collect_rows(
+            handler.current_project,
+            getattr(main_window, 'bundles', []),
+            getattr(main_window, 'imported_wire_items', []),
+            main_window.topology_manager)
+        rows['project_info'].append(('autosave_source', handler.current_path or ''))
+        rows['project_info'].append(('autosave_time', datetime.now().isoformat()))
+
+        name = self.autosave_name()
+        previous = self._last_rows if name == self._last_name else None
+        generations = max(1, int(self.main_window.settings_manager.get('autosave_generations', 3)))
+        self._saved_state = state
+        self._in_flight = True
+        self.pending = self.executor.submit(self._write, self._epoch, self._directory(), name, rows,
+                                            previous, generations)
+
+    def autosave_name(self) -> str:
+        """File name stem for the open project, unique per project path"""
+        handler = self.main_window.project_handler
+        if handler.current_path:
+            path = str(Path(handler.current_path).resolve())
+            stem = Path(path).stem
+            digest = hashlib.sha1(path.encode('utf-8')).hexdigest()[:8]
+            return f"{stem}-{digest}"
+        name = getattr(handler.current_project, 'name', None) or "untitled"
+        return re.sub(r'[^\w.-]+', '_', name)
+
+    def _directory(self) -> Path:
+        return Path(self.main_window.settings_manager.get('autosave_path', str(Path.home() / "ecad" / "autosave")))
+
+    @staticmethod
+    def _generation(directory: Path, name: str, generation: int) -> Path:
+        return directory / f"{name}{AUTOSAVE_SUFFIX}.{generation}.ecad"
+
+    def _write(self, epoch, directory, name, rows, previous, generations):
+        """Worker thread: rotate the generations and write the snapshot as the newest.
+        Touches no attributes, the outcome goes back to the GUI thread by signal."""
+        try:
+            directory.mkdir(parents=True, exist_ok=True)
+            remove_database(self._generation(directory, name, generations))
+            for generation in range(generations - 1, 0, -1):
+                move_database(self._generation(directory, name, generation),
+                              self._generation(directory, name, generation + 1))
+
+            newest = self._generation(directory, name, 1)
+            base = self._generation(directory, name, 2)
+            if previous is not None and base.exists():
+                copy_database(base, newest)
+            else:
+                previous = None
+
+            db = ProjectDatabase(str(newest))
+            ok = db.save_rows(rows, previous)
+            db.close()
+            if not ok:
+                raise RuntimeError("could not write the autosave file")
+            print(f"Autosaved to {newest}")
+            self._written.emit(epoch, name, db.saved_rows, str(newest))
+        except Exception as e:
+            print(f"Autosave failed: {e}")
+            import traceback
+            traceback.print_exc()
+            self._write_failed.emit(epoch, str(e))
+
+    def _on_written(self, epoch, name, saved_rows, path):
+        self._in_flight = False
+        if epoch == self._epoch:
+            self._last_rows, self._last_name = saved_rows, name
+        self.saved.emit(path)
+
+    def _on_write_failed(self, epoch, error):
+        self._in_flight = False
+        if epoch == self._epoch:
+            self._last_rows = self._last_name = None
+            self._saved_state = None  # try again on the next tick
+        self.failed.emit(error)
+
+    # ---- after saving / on exit ----
+
+    def discard(self, name: str = None):
+        """Remove the open project's autosaves (or those under name), they are older than what was just saved"""
+        self._saved_state = self._edit_state() if self.main_window.project_handler.current_project else None
+        self._last_rows = self._last_name = None
+        self._epoch += 1
+        name = name or self.autosave_name()
+        # Queued behind a running autosave, so that one can't bring them back
+        self.executor.submit(self._remove, self._directory(), name)
+
+    @staticmethod
+    def _remove(directory, name):
+        for path in directory.glob(f"{glob_escape(name)}{AUTOSAVE_SUFFIX}.*.ecad"):
+            remove_database(path)
+
+    # ---- recovery ----
+
+    def recoverable(self):
+        """Newest autosave of every project that wasn't saved or closed cleanly, newest first"""
+        directory = self._directory()
+        if not directory.exists():
+            return []
+        found = list(directory.glob(f"*{AUTOSAVE_SUFFIX}.1.ecad"))
+        return sorted(found, key=lambda path: path.stat().st_mtime, reverse=True)
+
+    def offer_recovery(self):
+        """Ask whether to reopen autosaves left by a session that didn't exit cleanly"""
+        for path in self.recoverable():
+            info = read_autosave_info(path)
+            source = info.get('autosave_source') or "(never saved)"
+            when = info.get('autosave_time', '')[:19].replace('T', ' ')
+            reply = QMessageBox.question(
+                self.main_window,
+                "Recover Autosave",
+                f"An autosave of '{info.get('name', path.stem)}' from {when} was found.\n"
+                f"Project file: {source}\n\n"
+                f"Recover it? No discards it, Cancel keeps it for later.",
+                QMessageBox.Yes | QMessageBox.No | QMessageBox.Cancel
+            )
+            if reply == QMessageBox.Yes:
+                self.recover(path, info.get('autosave_source'))
+                return
+            if reply == QMessageBox.No:
+                name = path.name[:-len(f"{AUTOSAVE_SUFFIX}.1.ecad")]
+                self._remove(self._directory(), name)
+
+    def recover(self, path, source=None):
+        """Open an autosave, saving then goes to the project file it was made from"""
+        from controllers.project_controller import ProjectController
+
+        ProjectController.open_project(self.main_window, str(path))
+        handler = self.main_window.project_handler
+        if handler.current_project is None:
+            return
+        # Opened from the autosave but belongs to the original file; a full
+        # rewrite on the next save since that file isn't what we loaded
+        handler.current_path = source or None
+        handler._saved_rows = None
+        handler._saved_stamp = None
+        handler.modified = True
+        self._saved_state = None
+        self.main_window.statusBar().showMessage(f"Recovered autosave {path.name}", 5000)
+
+
+def copy_database(source: Path, target: Path):
+    """Copy a database with the SQLite online backup API"""
+    remove_database(target)
+    src = sqlite3.connect(str(source))
+    dst = sqlite3.connect(str(target))
+    try:
+        src.backup(dst)
+    finally:
+        dst.close()
+        src.close()
+
+
+def move_database(source: Path, target: Path):
+    """Rename a database file with its WAL side files, if it exists"""
+    if not source.exists():
+        return
+    remove_database(target)
+    for suffix in ("", "-wal", "-shm", SNAPSHOT_SUFFIX):
+        side = Path(str(source) + suffix)
+        if side.exists():
+            os.replace(side, str(target) + suffix)
+
+
+def remove_database(path: Path):
+    """Delete a database file with its WAL side files"""
+    for suffix in ("", "-wal", "-shm", SNAPSHOT_SUFFIX):
+        side = Path(str(path) + suffix)
+        if side.exists():
+            side.unlink()
+
+
+def read_autosave_info(path: Path) -> dict:
+    """project_info of an autosave file, empty if it can't be read"""
+    try:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            return dict(conn.execute("SELECT key, value FROM project_info").fetchall())
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return {}
+
+
+def glob_escape(name: str) -> str:
+    return re.sub(r'([\[\]*?])', r'[\1]', name)
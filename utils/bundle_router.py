@@ -1,7 +1,11 @@
 from typing import List, Dict, Optional, Tuple
-from PyQt5.QtCore import QPointF
-import math
+from PyQt5.QtCore import QPointF, QEventLoop
+from PyQt5.QtWidgets import QApplication
 from graphics.visualization_manager import VisualizationMode
+from model.bundle_graph import bundle_length
+
+# Let the event loop breathe every N wires on large harnesses
+ROUTING_PROGRESS_INTERVAL = 200
 
 
 class BundleRouter:
@@ -11,6 +15,8 @@ class BundleRouter:
         self.main_window = main_window
         self.topology_manager = main_window.topology_manager
         self.scene = main_window.scene
+        self.failures: Dict[str, str] = {}  # wire id -> reason, filled per routing run
+        self.overflow: Dict[str, float] = {}  # bundle id -> mm² over capacity, capacity routing only
         
     def route_wires_through_bundles(self) -> bool:
         """
@@ -36,18 +42,49 @@ class BundleRouter:
         # First, ensure all bundles have proper node connections
         self._ensure_bundle_nodes(bundles)
         
-        # Build node graph from bundles
-        node_graph = self._build_bundle_graph(bundles)
+        # Route headless on plain data, then apply the result to the scene
+        problem, nodes, bundles_by_id = self._routing_problem(bundles, wires)
+        engine = self._engine()
+        if engine.capacity:
+            # Capacity routes depend on every other wire, nothing to reuse
+            result = engine.route(problem)
+        else:
+            result = self._route_cached(engine, problem, nodes, bundles_by_id)
+        self.overflow = result.overflow
+        for bundle_id, excess in sorted(result.overflow.items()):
+            print(f"Bundle {bundle_id}: {result.bundle_load[bundle_id]:.1f} mm² routed, "
+                  f"{excess:.1f} mm² over capacity")
         
         # Store created elements for undo
         created_segments = []
         routed_wires = []
+        self.failures = {}
         
-        # Route each wire through the bundle graph
         routed_count = 0
+        processed = 0
+        path_segments = {}  # node id path -> segments, created once per distinct path
         for wire in wires:
-            if self._route_single_wire(wire, bundles, node_graph, created_segments, routed_wires):
+            route = result.routes.get(wire.wid)
+            if route is None:
+                self._report_failure(wire, result.failures.get(wire.wid, "No bundle path found"))
+                processed += 1
+                continue
+            
+            path_nodes = [nodes[node_id] for node_id in route.node_path]
+            used_bundles = [bundles_by_id[bundle_id] for bundle_id in dict.fromkeys(route.bundle_ids)]
+            key = tuple(route.node_path)
+            if key not in path_segments:
+                path_segments[key] = self._segments_for_path(path_nodes, created_segments)
+            if self._create_routed_wire(wire, path_nodes, used_bundles, created_segments,
+                                        routed_wires, route.length, path_segments[key]):
                 routed_count += 1
+            processed += 1
+            if processed % ROUTING_PROGRESS_INTERVAL == 0:
+                self.main_window.statusBar().showMessage(f"Routing wires... {processed}/{len(wires)}")
+                QApplication.processEvents(QEventLoop.ExcludeUserInputEvents)
+        
+        if self.failures:
+            print(f"{len(self.failures)} wires could not be routed")
         
         if routed_count > 0:
             # Hide original direct wires
@@ -87,13 +124,103 @@ class BundleRouter:
             self.main_window.undo_manager.push(cmd)
             
             print(f"=== BUNDLE ROUTING COMPLETED: {routed_count} wires routed ===\n")
-            self.main_window.statusBar().showMessage(f"Routed {routed_count} wires through bundles", 3000)
+            message = f"Routed {routed_count} wires through bundles"
+            if self.overflow:
+                message += f", {len(self.overflow)} bundles over capacity"
+            self.main_window.statusBar().showMessage(message, 5000)
             return True
         else:
             print("=== BUNDLE ROUTING FAILED ===\n")
             self.main_window.statusBar().showMessage("No wires could be routed through bundles", 3000)
             return False
     
+    def _engine(self):
+        """RoutingEngine set up from the routing mode and settings"""
+        from utils.routing_engine import RoutingEngine
+        settings = self.main_window.settings_manager
+        return RoutingEngine(self.topology_manager.routing_mode(),
+                             settings.get('routing_workers', 0),
+                             capacity=settings.get('capacity_routing', False))
+    
+    def _routing_problem(self, bundles, wires):
+        """
+        Bundles and wires as a headless RoutingProblem.
+        Returns (problem, node id -> node, bundle id -> bundle) for applying the result.
+        """
+        from utils.routing_engine import RoutingProblem, RoutingNode, RoutingBundle, RoutingWire
+        from model.capacity_routing import capacity_from_diameter
+        
+        default_diameter = self.main_window.settings_manager.get('bundle_max_diameter', 0.0)
+        problem = RoutingProblem()
+        nodes = {}
+        bundles_by_id = {}
+        for bundle in bundles:
+            if not bundle.start_node or not bundle.end_node:
+                continue
+            for node in (bundle.start_node, bundle.end_node):
+                if node.id not in nodes:
+                    nodes[node.id] = node
+                    problem.nodes[node.id] = RoutingNode(node.id, tuple(node.position))
+            bundles_by_id[bundle.bundle_id] = bundle
+            diameter = getattr(bundle, 'max_diameter', None) or default_diameter
+            problem.bundles.append(RoutingBundle(bundle.bundle_id, bundle.start_node.id,
+                                                 bundle.end_node.id, self._bundle_length(bundle),
+                                                 capacity_from_diameter(diameter) if diameter else None))
+        
+        for wire in wires:
+            from_node = wire.start_pin.parent.topology_node
+            to_node = wire.end_pin.parent.topology_node
+            problem.wires.append(RoutingWire(
+                wire.wid,
+                from_node.id if from_node else None,
+                to_node.id if to_node else None,
+                getattr(wire, 'cross_section', None)
+            ))
+        return problem, nodes, bundles_by_id
+    
+    def _session_route_cache(self):
+        """Route cache of the main window, synced with the topology edits since the last run"""
+        cache = getattr(self.main_window, 'route_cache', None)
+        if cache is None:
+            from model.route_cache import RouteCache
+            cache = RouteCache()
+            self.main_window.route_cache = cache
+        graph = self._get_bundle_graph()
+        return cache.sync(self.topology_manager, graph.heuristic_scale)
+    
+    def _route_cached(self, engine, problem, nodes, bundles_by_id):
+        """Route the problem, only the connector pairs missing from the route cache hit the engine"""
+        from utils.routing_engine import WireRoute
+        
+        cache = self._session_route_cache()
+        cached = {}
+        missing = []
+        for wire in problem.wires:
+            route = None
+            if wire.from_id is not None and wire.to_id is not None:
+                route = cache.get(wire.from_id, wire.to_id, engine.mode)
+            if route is not None and all(bundle_id in bundles_by_id for bundle_id in route.bundle_ids):
+                cached[wire.id] = route
+            else:
+                missing.append(wire)
+        
+        problem.wires = missing
+        result = engine.route(problem)
+        for wire in missing:
+            route = result.routes.get(wire.id)
+            if route is not None:
+                cache.put(wire.from_id, wire.to_id, engine.mode, route.node_path, route.bundle_ids,
+                          route.length, nodes[wire.from_id].position, nodes[wire.to_id].position)
+        for wire_id, route in cached.items():
+            result.routes[wire_id] = WireRoute(wire_id, route.node_path, route.bundle_ids, route.length)
+            for bundle_id in dict.fromkeys(route.bundle_ids):
+                result.bundle_wires.setdefault(bundle_id, []).append(wire_id)
+        
+        stats = cache.stats()
+        print(f"Route cache: {stats['hits']} hits, {stats['misses']} misses "
+              f"({stats['hit_rate']:.0%}), {stats['entries']} routes, {stats['invalidated']} invalidated")
+        return result
+    
     def _ensure_bundle_nodes(self, bundles):
         """Ensure all bundles have valid start_node and end_node references"""
         for bundle in bundles:
@@ -109,7 +236,7 @@ class BundleRouter:
                     node = BranchPointNode((bundle.start_point.x(), bundle.start_point.y()), "junction")
                     graphics = BranchPointGraphicsItem(node)
                     self.scene.addItem(graphics)
-                    self.topology_manager.nodes[node.id] = node
+                    self.topology_manager.add_node(node)
                     bundle.start_node = node
                     bundle.start_item = graphics
             
@@ -125,173 +252,52 @@ class BundleRouter:
                     node = BranchPointNode((bundle.end_point.x(), bundle.end_point.y()), "junction")
                     graphics = BranchPointGraphicsItem(node)
                     self.scene.addItem(graphics)
-                    self.topology_manager.nodes[node.id] = node
+                    self.topology_manager.add_node(node)
                     bundle.end_node = node
                     bundle.end_item = graphics
+            
+            self.topology_manager.index_bundle(bundle)
     
-    def _build_bundle_graph(self, bundles):
-        """
-        Build a graph of nodes connected by bundles
-        Returns: {
-            node: [connected_nodes]
-        }
-        """
-        graph = {}
-        
-        for bundle in bundles:
-            if bundle.start_node and bundle.end_node:
-                # Add forward connection
-                if bundle.start_node not in graph:
-                    graph[bundle.start_node] = []
-                if bundle.end_node not in graph[bundle.start_node]:
-                    graph[bundle.start_node].append(bundle.end_node)
-                
-                # Add reverse connection
-                if bundle.end_node not in graph:
-                    graph[bundle.end_node] = []
-                if bundle.start_node not in graph[bundle.end_node]:
-                    graph[bundle.end_node].append(bundle.start_node)
-        
+    def _get_bundle_graph(self, bundles=None):
+        """Session bundle graph of the main window, synced with the bundle index"""
+        graph = getattr(self.main_window, 'bundle_graph', None)
+        if graph is None or graph.manager is not self.topology_manager:
+            from model.bundle_graph import BundleGraph
+            graph = BundleGraph(self.topology_manager)
+            self.main_window.bundle_graph = graph
+        graph.sync()
         return graph
     
-    def _find_path_through_bundles(self, start_node, end_node, graph):
-        """
-        Find a path through the bundle graph from start_node to end_node
-        Returns list of nodes in the path
-        """
-        if start_node == end_node:
-            return [start_node]
-        
-        # BFS to find path
-        from collections import deque
-        
-        visited = {start_node}
-        queue = deque([(start_node, [start_node])])
-        
-        while queue:
-            current, path = queue.popleft()
-            
-            for neighbor in graph.get(current, []):
-                if neighbor == end_node:
-                    return path + [neighbor]
-                
-                if neighbor not in visited:
-                    visited.add(neighbor)
-                    queue.append((neighbor, path + [neighbor]))
-        
-        return []  # No path found
+    def _bundle_length(self, bundle) -> float:
+        """Routing length of a bundle: specified length if set, drawn length otherwise"""
+        return bundle_length(bundle)
     
-    def _route_single_wire(self, wire, bundles, graph, created_segments, routed_wires):
-        """Route a single wire through the bundle graph and assign to bundles"""
-        
-        # Get the connectors
-        from_conn = wire.start_pin.parent
-        to_conn = wire.end_pin.parent
-        
-        if not from_conn.topology_node or not to_conn.topology_node:
-            print(f"Wire {wire.wid}: Missing connector topology nodes")
+    def _route_single_wire(self, wire, bundles, created_segments, routed_wires):
+        """Route a single wire through the bundles, as a one wire problem on the same engine and route cache"""
+        problem, nodes, bundles_by_id = self._routing_problem(bundles, [wire])
+        result = self._route_cached(self._engine(), problem, nodes, bundles_by_id)
+        route = result.routes.get(wire.wid)
+        if route is None:
+            self._report_failure(wire, result.failures.get(wire.wid, "No bundle path found"))
             return False
         
-        # Find which bundles connect to the from_connector
-        start_bundles = []
-        for bundle in bundles:
-            if bundle.start_node == from_conn.topology_node or bundle.end_node == from_conn.topology_node:
-                start_bundles.append(bundle)
-        
-        # Find which bundles connect to the to_connector
-        end_bundles = []
-        for bundle in bundles:
-            if bundle.start_node == to_conn.topology_node or bundle.end_node == to_conn.topology_node:
-                end_bundles.append(bundle)
-        
-        if not start_bundles or not end_bundles:
-            print(f"Wire {wire.wid}: No bundles connected to connectors")
-            return False
-        
-        # Try each possible start bundle
-        for start_bundle in start_bundles:
-            # Get the node that connects to from_connector
-            start_node = (start_bundle.end_node if start_bundle.start_node == from_conn.topology_node 
-                         else start_bundle.start_node)
-            
-            # Try each possible end bundle
-            for end_bundle in end_bundles:
-                # Get the node that connects to to_connector
-                end_node = (end_bundle.end_node if end_bundle.start_node == to_conn.topology_node 
-                           else end_bundle.start_node)
-                
-                # Find path through bundle graph
-                path_nodes = self._find_path_through_bundles(start_node, end_node, graph)
-                
-                if path_nodes:
-                    # Build complete node path including connectors
-                    full_path = [from_conn.topology_node] + path_nodes + [to_conn.topology_node]
-                    
-                    # Find which bundles are used in this path
-                    used_bundles = self._find_bundles_in_path(path_nodes, bundles)
-                    print("used",path_nodes,used_bundles,bundles)
-                    # Create the routed wire and assign to bundles
-                    return self._create_routed_wire(wire, full_path, used_bundles, 
-                                                    created_segments, routed_wires)
-        
-        print(f"Wire {wire.wid}: No bundle path found")
-        return False
-    def _find_bundles_in_path(self, path_nodes, bundles) -> List:
-        """
-        Find which bundles are used in the node path
-        Returns list of bundles that connect consecutive nodes in the path
-        """
-        used_bundles = []
-        
-        for i in range(len(path_nodes) - 1):
-            node1 = path_nodes[i]
-            node2 = path_nodes[i + 1]
-            
-            # Find bundle connecting these two nodes
-            # add check if conn is start and nodes match
-            for bundle in bundles:
-                if (bundle.start_node == node1 and bundle.end_node == node2) or \
-                   (bundle.start_node == node2 and bundle.end_node == node1):
-                    if bundle not in used_bundles:
-                        used_bundles.append(bundle)
-                    break
-        
-        return used_bundles
-
+        path_nodes = [nodes[node_id] for node_id in route.node_path]
+        used_bundles = [bundles_by_id[bundle_id] for bundle_id in dict.fromkeys(route.bundle_ids)]
+        return self._create_routed_wire(wire, path_nodes, used_bundles,
+                                        created_segments, routed_wires, route.length)
     
+    def _report_failure(self, wire, reason):
+        self.failures[wire.wid] = reason
+        print(f"Wire {wire.wid}: {reason}")
+
     def _create_routed_wire(self, original_wire, node_path, used_bundles, 
-                           created_segments, routed_wires):
+                           created_segments, routed_wires, length=None, path_segments=None):
         """Create a routed wire along the given node path and assign to bundles"""
         from graphics.wire_item import SegmentedWireItem
         from model.wire import Wire
         
-        # Find or create segments along the path
-        path_segments = []
-        
-        for i in range(len(node_path) - 1):
-            start_node = node_path[i]
-            end_node = node_path[i + 1]
-            
-            # Check if segment already exists
-            segment = self._find_segment_between_nodes(start_node, end_node)
-            
-            if not segment:
-                # Create new segment
-                from model.topology import WireSegment
-                from graphics.segment_item import SegmentGraphicsItem
-                
-                segment = WireSegment(
-                    start_node=start_node,
-                    end_node=end_node,
-                    wires=[]
-                )
-                self.topology_manager.segments[segment.id] = segment
-                
-                segment_graphics = SegmentGraphicsItem(segment, self.topology_manager)
-                self.scene.addItem(segment_graphics)
-                created_segments.append(segment_graphics)
-            
-            path_segments.append(segment)
+        if path_segments is None:
+            path_segments = self._segments_for_path(node_path, created_segments)
         
         # Create wire object
         wire_id = f"ROUTE_{original_wire.wid}"
@@ -304,12 +310,15 @@ class BundleRouter:
         )
         wire.cross_section = getattr(original_wire, 'cross_section', 0.5)
         wire.color_data = original_wire.color_data
+        if length is not None:
+            wire.length = length
+            # Picked up as calculated length when the project is saved
+            original_wire.routed_length = length
         
-        # Add wire to segments
+        # Add wire to segments (new wire, no membership checks needed)
+        wire.segments = list(path_segments)
         for segment in path_segments:
-            wire.add_segment(segment)
-            if wire not in segment.wires:
-                segment.wires.append(wire)
+            segment.wires.append(wire)
         
         # Create graphics
         wire_graphics = SegmentedWireItem(wire)
@@ -340,13 +349,40 @@ class BundleRouter:
         return True
 
     
+    def _segments_for_path(self, node_path, created_segments) -> List:
+        """Find or create the topology segments along a node path"""
+        path_segments = []
+        
+        for i in range(len(node_path) - 1):
+            start_node = node_path[i]
+            end_node = node_path[i + 1]
+            
+            # Check if segment already exists
+            segment = self._find_segment_between_nodes(start_node, end_node)
+            
+            if not segment:
+                # Create new segment
+                from model.topology import WireSegment
+                from graphics.segment_item import SegmentGraphicsItem
+                
+                segment = WireSegment(
+                    start_node=start_node,
+                    end_node=end_node,
+                    wires=[]
+                )
+                self.topology_manager.add_segment(segment)
+                
+                segment_graphics = SegmentGraphicsItem(segment, self.topology_manager)
+                self.scene.addItem(segment_graphics)
+                created_segments.append(segment_graphics)
+            
+            path_segments.append(segment)
+        
+        return path_segments
+    
     def _find_segment_between_nodes(self, node1, node2):
         """Find existing segment between two nodes"""
-        for segment in self.topology_manager.segments.values():
-            if (segment.start_node == node1 and segment.end_node == node2) or \
-               (segment.start_node == node2 and segment.end_node == node1):
-                return segment
-        return None
+        return self.topology_manager.segment_between(node1, node2)
     
     def _create_missing_segments(self, bundles, created_segments):
         """Create segments for bundles that don't have them"""
@@ -366,7 +402,7 @@ class BundleRouter:
                             end_node=bundle.end_node,
                             wires=[]
                         )
-                        self.topology_manager.segments[segment.id] = segment
+                        self.topology_manager.add_segment(segment)
                         
                         segment_graphics = SegmentGraphicsItem(segment, self.topology_manager)
                         self.scene.addItem(segment_graphics)
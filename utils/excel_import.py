@@ -402,6 +402,8 @@ def import_from_excel_to_topology(filepath, topology_manager, main_window, auto_
     main_window.imported_wire_items = []
     main_window.wires = []
     
+    # Resolve pins first so nets can be built in one pass
+    resolved = []
     for wd in wires:
         from_conn = created_connectors.get(wd.from_node_id)
         to_conn = created_connectors.get(wd.to_node_id)
@@ -415,9 +417,12 @@ def import_from_excel_to_topology(filepath, topology_manager, main_window, auto_
         if not from_pin or not to_pin:
             continue
         
-        # Create net
-        net = netlist.connect(from_pin, to_pin)
-        
+        resolved.append((wd, from_pin, to_pin))
+    
+    # Create nets
+    nets = netlist.connect_many((from_pin, to_pin) for _, from_pin, to_pin in resolved)
+    
+    for (wd, from_pin, to_pin), net in zip(resolved, nets):
         # CREATE DIRECT WIRE - ONLY ONCE
         wire = WireItem(
             wd.wire_id,
@@ -0,0 +1,457 @@
+#utils/routing_engine
+"""
+Headless harness routing engine.
+
+Works on plain data only (node ids, positions, bundle ends and lengths,
+wire end nodes), no Qt import anywhere below, so it can route projects on a
+build server or be benchmarked on its own. The GUI routers build a
+RoutingProblem from the scene, run the engine and apply the result.
+
+Command line:
+    python -m utils.routing_engine harness.ecad [more.ecad ...] [--mode hops]
+        [--workers 4] [--auto-topology] [--max-diameter 20] [--json results.json]
+"""
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+import math
+
+from model.topology import ROUTE_HOPS, ROUTE_LENGTH
+from model.parallel_routing import route_plain
+from model.capacity_routing import route_with_capacity, capacity_from_diameter
+
+# Automatic topology modes
+TOPOLOGY_HUB = "hub"  # branch point next to every busy connector, star shaped
+TOPOLOGY_STEINER = "steiner"  # shared trunks, Steiner tree over the connectors
+
+# Offset of the branch point placed next to a hub connector
+HUB_BRANCH_OFFSET = (80.0, -20.0)
+
+
+@dataclass
+class RoutingNode:
+    """Connector, branch point or any other node the bundles end at"""
+    id: str
+    position: Tuple[float, float] = (0.0, 0.0)
+    kind: str = "connector"
+
+
+@dataclass
+class RoutingBundle:
+    """Bundle between two nodes, length is the specified length if any,
+    capacity the copper cross-section (mm²) it takes, None for unlimited"""
+    id: str
+    start_id: str
+    end_id: str
+    length: Optional[float] = None
+    capacity: Optional[float] = None
+
+
+@dataclass
+class RoutingWire:
+    """Wire to route between the nodes of its two connectors"""
+    id: str
+    from_id: str
+    to_id: str
+    cross_section: Optional[float] = None
+
+
+@dataclass
+class RoutingProblem:
+    nodes: Dict[str, RoutingNode] = field(default_factory=dict)
+    bundles: List[RoutingBundle] = field(default_factory=list)
+    wires: List[RoutingWire] = field(default_factory=list)
+    name: str = ""
+
+    def bundle_length(self, bundle: RoutingBundle) -> float:
+        """Specified length if set, straight-line length otherwise"""
+        if bundle.length is not None:
+            return float(bundle.length)
+        start = self.nodes.get(bundle.start_id)
+        end = self.nodes.get(bundle.end_id)
+        if start is None or end is None:
+            return 0.0
+        return math.hypot(start.position[0] - end.position[0], start.position[1] - end.position[1])
+
+
+@dataclass
+class WireRoute:
+    wire_id: str
+    node_path: List[str]
+    bundle_ids: List[str]
+    length: float
+
+
+@dataclass
+class RoutingResult:
+    routes: Dict[str, WireRoute] = field(default_factory=dict)  # wire id -> route
+    failures: Dict[str, str] = field(default_factory=dict)  # wire id -> reason
+    bundle_wires: Dict[str, List[str]] = field(default_factory=dict)  # bundle id -> wire ids
+    bundle_load: Dict[str, float] = field(default_factory=dict)  # bundle id -> copper mm², capacity mode
+    overflow: Dict[str, float] = field(default_factory=dict)  # bundle id -> mm² above its capacity
+
+    @property
+    def total_length(self) -> float:
+        return sum(route.length for route in self.routes.values())
+
+    def to_dict(self) -> dict:
+        return {
+            'routes': {wire_id: {'nodes': route.node_path, 'bundles': route.bundle_ids,
+                                 'length': route.length}
+                       for wire_id, route in self.routes.items()},
+            'failures': self.failures,
+            'bundle_wires': self.bundle_wires,
+            'bundle_load': self.bundle_load,
+            'overflow': self.overflow,
+            'total_length': self.total_length
+        }
+
+
+@dataclass
+class TopologyPlan:
+    """Branch points and bundles to add before routing"""
+    branch_points: List[RoutingNode] = field(default_factory=list)
+    bundles: List[RoutingBundle] = field(default_factory=list)
+    hubs: Dict[str, str] = field(default_factory=dict)  # hub connector id -> branch point id
+    _pairs: set = field(default_factory=set, repr=False)
+
+    def add_bundle(self, start_id: str, end_id: str):
+        """Plan a bundle unless the pair already has one"""
+        pair = (start_id, end_id) if start_id <= end_id else (end_id, start_id)
+        if pair in self._pairs:
+            return
+        self._pairs.add(pair)
+        self.bundles.append(RoutingBundle(f"AUTO_{len(self.bundles) + 1}", start_id, end_id))
+
+
+class RoutingEngine:
+    """Routes a RoutingProblem and plans automatic topologies"""
+
+    def __init__(self, mode: str = ROUTE_LENGTH, workers: int = 0, hub_threshold: int = 2,
+                 topology: str = TOPOLOGY_HUB, capacity: bool = False):
+        self.mode = mode
+        self.workers = workers
+        self.hub_threshold = hub_threshold  # wires needed before a connector becomes a hub
+        self.topology = topology
+        self.capacity = capacity  # respect bundle capacities, see route_with_capacity
+
+    # ---- routing ----
+
+    def route(self, problem: RoutingProblem) -> RoutingResult:
+        """Route every wire through the bundles, each connector pair is searched once"""
+        result = RoutingResult()
+
+        bundles = {}
+        edges = []
+        nodes_with_bundles = set()
+        for bundle in problem.bundles:
+            if bundle.start_id is None or bundle.end_id is None:
+                continue
+            bundles[bundle.id] = bundle
+            edges.append((bundle.id, bundle.start_id, bundle.end_id, problem.bundle_length(bundle)))
+            nodes_with_bundles.add(bundle.start_id)
+            nodes_with_bundles.add(bundle.end_id)
+
+        # Bucket wires by connector pair
+        legs: List[Tuple[str, str]] = []
+        leg_index: Dict[Tuple[str, str], int] = {}
+        wire_legs = []
+        for wire in problem.wires:
+            if wire.from_id is None or wire.to_id is None:
+                result.failures[wire.id] = "Missing connector topology nodes"
+                continue
+            if wire.from_id not in nodes_with_bundles or wire.to_id not in nodes_with_bundles:
+                result.failures[wire.id] = "No bundles connected to connectors"
+                continue
+            key = (wire.from_id, wire.to_id)
+            if key not in leg_index:
+                leg_index[key] = len(legs)
+                legs.append(key)
+            wire_legs.append((wire, leg_index[key]))
+
+        if self.capacity:
+            self._route_capacity(problem, edges, bundles, wire_legs, legs, result)
+            return result
+
+        resolved = route_plain(edges, legs, self.mode == ROUTE_LENGTH, self.workers)
+
+        for wire, index in wire_legs:
+            if index not in resolved or not resolved[index][0]:
+                result.failures[wire.id] = "No bundle path found"
+                continue
+            bundle_ids, length = resolved[index]
+            node_path = self._node_path(legs[index][0], bundle_ids, bundles)
+            result.routes[wire.id] = WireRoute(wire.id, node_path, list(bundle_ids), length)
+            for bundle_id in dict.fromkeys(bundle_ids):
+                result.bundle_wires.setdefault(bundle_id, []).append(wire.id)
+
+        return result
+
+    def _route_capacity(self, problem, edges, bundles, wire_legs, legs, result):
+        """Per wire routes that keep bundles within their capacity where possible"""
+        capacities = [bundles[edge[0]].capacity for edge in edges]
+        plain_wires = [(legs[index][0], legs[index][1], wire.cross_section) for wire, index in wire_legs]
+        solved = route_with_capacity(edges, capacities, plain_wires, self.mode == ROUTE_LENGTH, self.workers)
+
+        lengths = {edge[0]: edge[3] for edge in edges}
+        for row, (wire, index) in enumerate(wire_legs):
+            bundle_ids = solved['paths'].get(row)
+            if not bundle_ids:
+                result.failures[wire.id] = "No bundle path found"
+                continue
+            node_path = self._node_path(legs[index][0], bundle_ids, bundles)
+            length = sum(lengths[bundle_id] for bundle_id in bundle_ids)
+            result.routes[wire.id] = WireRoute(wire.id, node_path, list(bundle_ids), length)
+            for bundle_id in dict.fromkeys(bundle_ids):
+                result.bundle_wires.setdefault(bundle_id, []).append(wire.id)
+        result.bundle_load = solved['load']
+        result.overflow = solved['overflow']
+
+    @staticmethod
+    def _node_path(start_id: str, bundle_ids: List[str], bundles: Dict[str, RoutingBundle]) -> List[str]:
+        """Nodes visited when walking the bundles from start_id"""
+        path = [start_id]
+        current = start_id
+        for bundle_id in bundle_ids:
+            bundle = bundles[bundle_id]
+            current = bundle.end_id if bundle.start_id == current else bundle.start_id
+            path.append(current)
+        return path
+
+    # ---- automatic topology ----
+
+    def plan_topology(self, problem: RoutingProblem) -> TopologyPlan:
+        """Branch points and bundles for the wires, in the engine's topology mode"""
+        if self.topology == TOPOLOGY_STEINER:
+            return self._plan_steiner(problem)
+        return self._plan_hub(problem)
+
+    def _plan_hub(self, problem: RoutingProblem) -> TopologyPlan:
+        """
+        Hub and spoke topology: connectors carrying more than hub_threshold
+        wires get a branch point next to them with a trunk bundle, every
+        connector talking to a hub gets a bundle to the hub's branch point,
+        all other connector pairs get a direct bundle.
+        """
+        plan = TopologyPlan()
+        connections: Dict[Tuple[str, str], List[RoutingWire]] = {}
+        for wire in problem.wires:
+            if wire.from_id is None or wire.to_id is None:
+                continue
+            connections.setdefault((wire.from_id, wire.to_id), []).append(wire)
+
+        frequency: Dict[str, int] = {}
+        for (from_id, to_id), wires in connections.items():
+            frequency[from_id] = frequency.get(from_id, 0) + len(wires)
+            frequency[to_id] = frequency.get(to_id, 0) + len(wires)
+        hubs = [node_id for node_id, count in frequency.items() if count > self.hub_threshold]
+        print(f"Identified central connectors: {hubs}")
+
+        via_hub: Dict[str, List[Tuple[str, str]]] = {}
+        direct: List[Tuple[str, str]] = []
+        for from_id, to_id in connections:
+            if from_id in hubs:
+                via_hub.setdefault(from_id, []).append((from_id, to_id))
+            elif to_id in hubs:
+                via_hub.setdefault(to_id, []).append((from_id, to_id))
+            else:
+                direct.append((from_id, to_id))
+
+        # Trunks from every hub to its branch point
+        for hub_id in via_hub:
+            hub = problem.nodes.get(hub_id)
+            if hub is None:
+                continue
+            bp = RoutingNode(f"BP_{hub_id}",
+                             (hub.position[0] + HUB_BRANCH_OFFSET[0], hub.position[1] + HUB_BRANCH_OFFSET[1]),
+                             "branch_point")
+            plan.branch_points.append(bp)
+            plan.hubs[hub_id] = bp.id
+            plan.add_bundle(hub_id, bp.id)
+
+        # Spokes from the branch points to the connectors talking to the hub
+        for hub_id, bp_id in plan.hubs.items():
+            for pair in via_hub[hub_id]:
+                for node_id in pair:
+                    if node_id != hub_id:
+                        plan.add_bundle(bp_id, node_id)
+
+        for from_id, to_id in direct:
+            plan.add_bundle(from_id, to_id)
+
+        return plan
+
+    def _plan_steiner(self, problem: RoutingProblem) -> TopologyPlan:
+        """
+        Shared trunk topology: one Euclidean Steiner tree per group of
+        connectors linked by wires, over the connector positions. Connectors
+        with many wires between them are pulled together in the tree, the
+        Steiner points become branch points.
+        """
+        from model.steiner_tree import steiner_tree
+        import numpy as np
+
+        plan = TopologyPlan()
+
+        # Wire counts per connector pair and groups of wired connectors
+        wire_counts: Dict[Tuple[str, str], int] = {}
+        group_of: Dict[str, str] = {}
+
+        def find(node_id):
+            root = node_id
+            while group_of[root] != root:
+                root = group_of[root]
+            while group_of[node_id] != root:
+                group_of[node_id], node_id = root, group_of[node_id]
+            return root
+
+        for wire in problem.wires:
+            if wire.from_id not in problem.nodes or wire.to_id not in problem.nodes or wire.from_id == wire.to_id:
+                continue
+            pair = (wire.from_id, wire.to_id) if wire.from_id <= wire.to_id else (wire.to_id, wire.from_id)
+            wire_counts[pair] = wire_counts.get(pair, 0) + 1
+            for node_id in pair:
+                group_of.setdefault(node_id, node_id)
+            root_a, root_b = find(pair[0]), find(pair[1])
+            if root_a != root_b:
+                group_of[root_b] = root_a
+
+        groups: Dict[str, List[str]] = {}
+        for node_id in group_of:
+            groups.setdefault(find(node_id), []).append(node_id)
+
+        for terminals in groups.values():
+            index = {node_id: i for i, node_id in enumerate(terminals)}
+            positions = np.array([problem.nodes[node_id].position for node_id in terminals], dtype=np.float64)
+            counts = {(index[a], index[b]): count for (a, b), count in wire_counts.items() if a in index}
+            steiner_points, edges = steiner_tree(positions, counts)
+
+            ids = list(terminals)
+            for position in steiner_points:
+                bp = RoutingNode(f"STP_{len(plan.branch_points) + 1}", position, "branch_point")
+                plan.branch_points.append(bp)
+                ids.append(bp.id)
+            for a, b in edges:
+                plan.add_bundle(ids[a], ids[b])
+
+        print(f"Steiner topology: {len(plan.branch_points)} branch points, {len(plan.bundles)} bundles")
+        return plan
+
+    @staticmethod
+    def apply_plan(problem: RoutingProblem, plan: TopologyPlan) -> RoutingProblem:
+        """Problem with the planned branch points and bundles added"""
+        nodes = dict(problem.nodes)
+        for bp in plan.branch_points:
+            nodes[bp.id] = bp
+        return RoutingProblem(nodes, list(problem.bundles) + plan.bundles, list(problem.wires), problem.name)
+
+
+def load_problem(path: str) -> RoutingProblem:
+    """Read connectors, bundles and wires of a saved .ecad project"""
+    from database.project_db import ProjectDatabase
+
+    # Read only, routing must not migrate or re-index the user's file
+    db = ProjectDatabase(path, read_only=True)
+    try:
+        harness = db.load_project()
+        bundle_rows = db.load_bundles()
+    finally:
+        db.close()
+    if harness is None:
+        raise ValueError(f"{path} is not a project file")
+
+    problem = RoutingProblem(name=harness.name)
+    for connector in harness.connectors.values():
+        problem.nodes[connector.id] = RoutingNode(connector.id, tuple(connector.position or (0.0, 0.0)))
+
+    def connector_node(node_id):
+        """Connector id behind a stored node id (NODE_x, CONN_x, older files nest prefixes)"""
+        node = harness.nodes.get(node_id)
+        if node is not None and node.connector_id:
+            return node.connector_id
+        stripped = node_id
+        while stripped and stripped not in harness.connectors and stripped.startswith(("NODE_", "CONN_")):
+            stripped = stripped[5:]
+        return stripped if stripped in harness.connectors else node_id
+
+    for row in bundle_rows:
+        for key in ('start_node_id', 'end_node_id'):
+            if row.get(key):
+                row[key] = connector_node(row[key])
+        for key, x_key, y_key in (('start_node_id', 'start_point_x', 'start_point_y'),
+                                  ('end_node_id', 'end_point_x', 'end_point_y')):
+            node_id = row.get(key)
+            if not node_id:
+                # Free bundle end, the GUI puts a branch point there when routing
+                # (BundleRouter._ensure_bundle_nodes); ends drawn on the same
+                # point meet at the same one
+                x, y = row.get(x_key) or 0.0, row.get(y_key) or 0.0
+                node_id = row[key] = f"BP_{round(x, 3):g}_{round(y, 3):g}"
+            if node_id not in problem.nodes:
+                # Branch points are only known through the bundle ends
+                problem.nodes[node_id] = RoutingNode(node_id, (row.get(x_key) or 0.0, row.get(y_key) or 0.0),
+                                                     "branch_point")
+        problem.bundles.append(RoutingBundle(row['id'], row.get('start_node_id'), row.get('end_node_id'),
+                                             row.get('specified_length')))
+
+    for wire in harness.wires.values():
+        problem.wires.append(RoutingWire(wire.id, connector_node(wire.from_node_id),
+                                         connector_node(wire.to_node_id), wire.cross_section))
+    return problem
+
+
+def main(argv=None) -> int:
+    import argparse
+    import json
+    import time
+
+    parser = argparse.ArgumentParser(description="Route harness projects without the GUI")
+    parser.add_argument('projects', nargs='+', help=".ecad project files")
+    parser.add_argument('--mode', choices=[ROUTE_LENGTH, ROUTE_HOPS], default=ROUTE_LENGTH)
+    parser.add_argument('--workers', type=int, default=0, help="worker processes per project")
+    parser.add_argument('--auto-topology', action='store_true',
+                        help="plan bundles instead of using the drawn ones")
+    parser.add_argument('--topology', choices=[TOPOLOGY_HUB, TOPOLOGY_STEINER], default=TOPOLOGY_HUB,
+                        help="shape of planned topologies")
+    parser.add_argument('--max-diameter', type=float, default=0.0,
+                        help="route with every bundle limited to this outer diameter (mm)")
+    parser.add_argument('--json', help="write all results to this file")
+    args = parser.parse_args(argv)
+
+    engine = RoutingEngine(args.mode, args.workers, topology=args.topology,
+                           capacity=args.max_diameter > 0)
+    report = {}
+    failed = False
+    for path in args.projects:
+        try:
+            problem = load_problem(path)
+        except Exception as e:
+            print(f"{path}: {e}")
+            failed = True
+            continue
+        started = time.perf_counter()
+        if args.auto_topology or not problem.bundles:
+            problem = engine.apply_plan(RoutingProblem(
+                {k: v for k, v in problem.nodes.items() if v.kind == "connector"},
+                [], problem.wires, problem.name), engine.plan_topology(problem))
+        if engine.capacity:
+            for bundle in problem.bundles:
+                if bundle.capacity is None:
+                    bundle.capacity = capacity_from_diameter(args.max_diameter)
+        result = engine.route(problem)
+        elapsed = time.perf_counter() - started
+        print(f"{path}: {len(result.routes)}/{len(problem.wires)} wires routed, "
+              f"{len(result.failures)} failed, total length {result.total_length:.1f}, {elapsed:.3f}s")
+        for bundle_id, excess in sorted(result.overflow.items()):
+            print(f"  bundle {bundle_id} over capacity by {excess:.2f} mm²")
+        report[path] = result.to_dict()
+        failed = failed or bool(result.failures)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(main())
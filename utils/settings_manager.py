@@ -40,7 +40,10 @@ class AppSettings:
     
     # Behavior
     autosave_interval: int = 5  # minutes
+    autosave_generations: int = 3  # autosaves kept per project, newest first
     undo_limit: int = 50
+    lazy_load_threshold: int = 5000  # projects with more items open with the visible part first, 0 = never
+    project_snapshots: bool = True  # keep <file>.ecad.snap next to saved projects so they reopen fast
     snap_to_grid: bool = True
     snap_to_pins: bool = True
     
@@ -51,8 +54,13 @@ class AppSettings:
     
     # Auto-route settings
     auto_route_threshold: int = 2  # wires needed to create branch point
+    auto_topology: str = "hub"  # "hub" (branch point per busy connector) or "steiner" (shared trunks)
     use_curved_wires: bool = True
     bend_radius: float = 10.0
+    routing_mode: str = "length"  # "length" (shortest physical route) or "hops"
+    routing_workers: int = 0  # >1 routes independent sub-harnesses in worker processes
+    capacity_routing: bool = False  # keep bundles within their diameter limit, rerouting around full ones
+    bundle_max_diameter: float = 20.0  # mm, limit for bundles without their own max_diameter
     
     # Manufacturing
     service_loop_percent: float = 7.0  # extra length for service loops